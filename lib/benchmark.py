@@ -0,0 +1,255 @@
+# lib/benchmark.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import gc
+import itertools
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+
+import networkx as nx
+import pandas as pd
+
+from lib.chunker import chunk_sources
+from lib.dice import roll_many
+from lib.entity_linker import build_linker, link_entity_mentions
+from lib.evidence_graph import build_evidence_edges
+from lib.graph_paths import SemanticPathFinder
+from lib.index_builder import (
+    build_chunk_to_entities,
+    build_entity_to_chunks,
+    build_player_to_chunks,
+    build_source_files,
+    link_author_mentions,
+)
+from lib.index_query import IndexQueryEngine
+from lib.rebuild import CHUNK_META_COLS
+from lib.semantic_graph import build_relationship_semantics, build_semantic_edges, load_predicate_rules, load_relationships
+from lib.source_loader import load_sources
+from lib.synthetic_world import SIZES, SyntheticWorld, WorldSpec, generate_world
+from lib.vocab_tables import build_vocab_df, build_vocab_lookup, load_author_aliases, load_vocab_tables
+
+# Workload per stage (fixed across sizes so throughput is comparable)
+INDEX_QUERIES = 200
+PATH_QUERIES = 50
+DICE_ROLLS = 100_000
+DICE_EXPRS = ["4d6kh3", "2d8+1d4+3", "1d20+5"]
+
+RESULT_COLS = ["size", "stage", "seconds", "items", "unit", "per_second", "peak_mb"]
+
+Stage = Tuple[str, str, Callable[[Dict[str, Any]], int]]
+
+def _measure(fn: Callable[[], int], measure_memory: bool) -> Tuple[int, float, Optional[float]]:
+    """(items, wall seconds, peak traced MiB). Memory is a second, traced run so timings stay clean."""
+    gc.collect()
+    t0 = time.perf_counter()
+    items = fn()
+    seconds = time.perf_counter() - t0
+    peak = None
+    if measure_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return items, seconds, peak
+
+def _chunk_entity_pairs(c2e: pd.DataFrame) -> pd.DataFrame:
+    """Semantic Indexing R1 + R2 as the notebook runs them (chunk-level entity pairs)."""
+    evidence = (
+        c2e[["chunk_id", "source_id", "source_type", "relpath", "chunk_start_line", "chunk_end_line", "entity_ids"]]
+        .assign(entity_id=lambda df: df["entity_ids"].fillna("").astype(str).str.split("|"))
+        .explode("entity_id", ignore_index=True)
+        .assign(entity_id=lambda df: df["entity_id"].fillna("").astype(str).str.strip())
+        .loc[lambda df: df["entity_id"] != ""]
+        .drop(columns=["entity_ids"])
+        .drop_duplicates(subset=["chunk_id", "entity_id"])
+        .reset_index(drop=True)
+    )
+    pairs = (
+        evidence.groupby("chunk_id")["entity_id"]
+        .apply(lambda entities: list(itertools.combinations(sorted(set(entities)), 2)))
+        .explode()
+        .dropna()
+        .reset_index()
+    )
+    return pairs.assign(
+        entity_id_a=lambda df: df["entity_id"].str[0],
+        entity_id_b=lambda df: df["entity_id"].str[1],
+    ).drop(columns="entity_id")
+
+def pipeline_stages(world: SyntheticWorld, seed: int = 0) -> List[Stage]:
+    """
+    (stage, unit, fn) in pipeline order. Each fn reads earlier results from
+    the shared context dict, stores its own, and returns the item count.
+    """
+    def load(ctx):
+        ctx["entities_df"], ctx["aliases_df"] = load_vocab_tables(world.vocab_entities, world.vocab_aliases)
+        ctx["loaded"] = load_sources(world.source_files)
+        return sum(len(s["lines"]) for s in ctx["loaded"])
+
+    def chunking(ctx):
+        ctx["chunks"] = chunk_sources(ctx["loaded"])
+        return sum(len(s["lines"]) for s in ctx["loaded"])
+
+    def linking(ctx):
+        vocab_df = build_vocab_df(ctx["entities_df"], ctx["aliases_df"])
+        ctx["mentions"] = pd.DataFrame(link_entity_mentions(ctx["chunks"], vocab_df, linker=build_linker(vocab_df)))
+        ctx["author_mentions"] = pd.DataFrame(
+            link_author_mentions(ctx["chunks"], ctx["entities_df"], load_author_aliases(world.author_aliases))
+        )
+        return len(ctx["chunks"])
+
+    def phase8(ctx):
+        chunks_df = pd.DataFrame([{k: c[k] for k in CHUNK_META_COLS} for c in ctx["chunks"]], columns=CHUNK_META_COLS)
+        ctx["source_files_df"] = build_source_files(chunks_df)
+        ctx["c2e"] = build_chunk_to_entities(ctx["mentions"])
+        ctx["e2c"] = build_entity_to_chunks(ctx["mentions"])
+        ctx["p2c"] = build_player_to_chunks(ctx["author_mentions"])
+        return len(ctx["mentions"])
+
+    def evidence_edges(ctx):
+        lookup = build_vocab_lookup(ctx["entities_df"], ctx["aliases_df"])
+        ctx["evidence_edges"] = build_evidence_edges(ctx["c2e"], lookup)
+        return len(ctx["evidence_edges"])
+
+    def semantic_pairs(ctx):
+        ctx["pairs"] = _chunk_entity_pairs(ctx["c2e"])
+        return len(ctx["pairs"])
+
+    def index_build(ctx):
+        ctx["engine"] = IndexQueryEngine(ctx["e2c"], ctx["c2e"], ctx["entities_df"], ctx["aliases_df"], ctx["p2c"])
+        return len(ctx["c2e"])
+
+    def index_queries(ctx):
+        r = random.Random(seed)
+        engine, ids = ctx["engine"], ctx["e2c"]["entity_id"].tolist()
+        for _ in range(INDEX_QUERIES):
+            a, b, c = (r.choice(ids) for _ in range(3))
+            engine.query(all_of=[a], any_of=[b, c], none_of=[] if r.random() < 0.5 else [c])
+            engine.cooccurring(a)
+        return INDEX_QUERIES
+
+    def semantic_graph(ctx):
+        semantics = build_relationship_semantics(load_relationships(world.relationships), load_predicate_rules(world.predicate_policy))
+        G = nx.MultiDiGraph()
+        for s, p, o in build_semantic_edges(semantics)[["subject_id", "predicate", "object_id"]].itertuples(index=False, name=None):
+            G.add_edge(s, o, predicate=p)
+        ctx["finder"] = SemanticPathFinder(G, world.predicate_cost, world.predicate_reverse)
+        ctx["finder"].view("undirected")
+        return G.number_of_edges()
+
+    def q4_paths(ctx):
+        r = random.Random(seed)
+        finder = ctx["finder"]
+        finder.invalidate()
+        nodes = sorted(finder.graph.nodes)
+        for _ in range(PATH_QUERIES):
+            a, b = r.sample(nodes, 2)
+            finder.paths(a, b, max_paths=10, max_length=4)
+        return PATH_QUERIES
+
+    def dice(ctx):
+        for expr in DICE_EXPRS:
+            roll_many(expr, DICE_ROLLS, rng=seed)
+        return DICE_ROLLS * len(DICE_EXPRS)
+
+    return [
+        ("load_sources", "lines", load),
+        ("chunking", "lines", chunking),
+        ("entity_linking", "chunks", linking),
+        ("phase8_aggregation", "mentions", phase8),
+        ("evidence_edges", "edges", evidence_edges),
+        ("semantic_pairs", "pairs", semantic_pairs),
+        ("index_build", "chunks", index_build),
+        ("index_queries", "queries", index_queries),
+        ("semantic_graph", "edges", semantic_graph),
+        ("q4_paths", "queries", q4_paths),
+        ("dice_roll_many", "rolls", dice),
+    ]
+
+def run_size(world: SyntheticWorld, size: str = "", measure_memory: bool = True, stages: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Run every pipeline stage (or the named subset plus what it needs) on one world."""
+    ctx: Dict[str, Any] = {}
+    rows = []
+    wanted = set(stages) if stages else None
+    for name, unit, fn in pipeline_stages(world, seed=world.spec.seed):
+        if wanted is not None and name not in wanted:
+            fn(ctx)  # prerequisite for a later stage; not reported
+            continue
+        items, seconds, peak = _measure(lambda: fn(ctx), measure_memory)
+        rows.append(
+            {
+                "size": size,
+                "stage": name,
+                "seconds": round(seconds, 6),
+                "items": items,
+                "unit": unit,
+                "per_second": round(items / seconds, 1) if seconds > 0 else None,
+                "peak_mb": round(peak, 3) if peak is not None else None,
+            }
+        )
+    return rows
+
+def run_benchmark(
+    sizes: Sequence[str] = ("tiny", "small"),
+    root: Optional[Path] = None,
+    measure_memory: bool = True,
+    stages: Optional[Sequence[str]] = None,
+    specs: Optional[Dict[str, WorldSpec]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Generate a synthetic world per size (lib.synthetic_world.SIZES, or specs)
+    and time every stage on it. Worlds go under root (a temp dir by default).
+    Returns one row per (size, stage): seconds, items, unit, per_second, peak_mb.
+    """
+    specs = {**SIZES, **(specs or {})}
+    unknown = [s for s in sizes if s not in specs]
+    if unknown:
+        raise ValueError(f"Unknown benchmark sizes: {unknown} (known: {sorted(specs)})")
+
+    rows: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="iwtc_bench_") as tmp:
+        base = Path(root) if root else Path(tmp)
+        for size in sizes:
+            world = generate_world(base / f"world_{size}", specs[size], overwrite=True)
+            rows.extend(run_size(world, size, measure_memory=measure_memory, stages=stages))
+    return rows
+
+def format_results(rows: Sequence[Dict[str, Any]]) -> List[str]:
+    """Fixed-width table lines for run_benchmark() rows."""
+    lines = [f"{'size':<8} {'stage':<20} {'seconds':>10} {'items':>10} {'unit':<9} {'items/s':>12} {'peak MiB':>9}"]
+    for r in rows:
+        rate = f"{r['per_second']:>12,.0f}" if r["per_second"] is not None else f"{'-':>12}"
+        peak = f"{r['peak_mb']:>9.1f}" if r["peak_mb"] is not None else f"{'-':>9}"
+        lines.append(f"{r['size']:<8} {r['stage']:<20} {r['seconds']:>10.4f} {r['items']:>10} {r['unit']:<9} {rate} {peak}")
+    return lines
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the IWTC indexing and query pipeline on synthetic worlds.")
+    parser.add_argument("--sizes", default="tiny,small", help=f"comma-separated sizes from {sorted(SIZES)}")
+    parser.add_argument("--stages", default="", help="comma-separated subset of stages to report")
+    parser.add_argument("--root", type=Path, default=None, help="keep generated worlds here instead of a temp dir")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced peak-memory pass")
+    parser.add_argument("--json", type=Path, default=None, help="also write the rows as JSON")
+    args = parser.parse_args(argv)
+
+    rows = run_benchmark(
+        sizes=[s for s in args.sizes.split(",") if s],
+        root=args.root,
+        measure_memory=not args.no_memory,
+        stages=[s for s in args.stages.split(",") if s] or None,
+    )
+    print("\n".join(format_results(rows)))
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
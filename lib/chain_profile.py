@@ -0,0 +1,139 @@
+# lib/chain_profile.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from lib.graph_store import GraphStore
+
+MISSING = "<missing>"
+PROFILE_VERSION = 1
+
+CHAIN_COLS = ["p1", "p2", "count"]
+SCHEMA_COLS = ["p1", "p2", "a_type", "b_type", "c_type", "count"]
+
+# results per graph version (content hash), shared across calls in a session
+_CACHE: Dict[str, Tuple[pd.DataFrame, pd.DataFrame]] = {}
+
+def chain_profile(edges: pd.DataFrame, node_type: pd.Series) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    G3.2 / G3.3 counts for A --p1--> B --p2--> C without building 2-hop paths.
+
+    edges: src, dst, predicate (one row per edge); node_type: node -> type.
+    Each middle node contributes in(B, p1, type A) x out(B, p2, type C), so
+    the join is over per-node (predicate, type) groups, not over edges.
+    """
+    e = edges.loc[:, ["src", "dst", "predicate"]]
+    e = e.assign(
+        src_type=e["src"].map(node_type).fillna(MISSING).to_numpy(),
+        dst_type=e["dst"].map(node_type).fillna(MISSING).to_numpy(),
+    )
+
+    into = e.groupby(["dst", "predicate", "src_type"], sort=False).size().rename("n_in").reset_index()
+    into.columns = ["b", "p1", "a_type", "n_in"]
+    out = e.groupby(["src", "predicate", "dst_type"], sort=False).size().rename("n_out").reset_index()
+    out.columns = ["b", "p2", "c_type", "n_out"]
+
+    joined = into.merge(out, on="b")
+    joined["count"] = joined["n_in"].to_numpy(dtype=np.int64) * joined["n_out"].to_numpy(dtype=np.int64)
+    joined["b_type"] = joined["b"].map(node_type).fillna(MISSING).to_numpy()
+
+    schemas = joined.groupby(["p1", "p2", "a_type", "b_type", "c_type"], sort=False)["count"].sum().reset_index()
+    chains = schemas.groupby(["p1", "p2"], sort=False)["count"].sum().reset_index()
+
+    chains = chains.sort_values(["count", "p1", "p2"], ascending=[False, True, True]).reset_index(drop=True)
+    schemas = (
+        schemas.merge(chains.rename(columns={"count": "total"}), on=["p1", "p2"])
+          .sort_values(
+              ["total", "p1", "p2", "count", "a_type", "b_type", "c_type"],
+              ascending=[False, True, True, False, True, True, True],
+          )
+          .drop(columns="total")
+          .reset_index(drop=True)
+    )
+    return chains[CHAIN_COLS], schemas[SCHEMA_COLS]
+
+def _store_tables(store: GraphStore) -> Tuple[pd.DataFrame, pd.Series]:
+    a = store.arrays
+    preds = np.asarray(store.tables["predicate"], dtype=object)
+    types = np.asarray(store.tables["node_type"] + [MISSING], dtype=object)
+    edges = pd.DataFrame({"src": np.asarray(a["src"]), "dst": np.asarray(a["dst"]), "predicate": preds[np.asarray(a["predicate"])]})
+    return edges, pd.Series(types[np.asarray(a["node_type"])])
+
+def _networkx_tables(G: Any) -> Tuple[pd.DataFrame, pd.Series]:
+    edges = pd.DataFrame(
+        [(u, v, d.get("predicate", MISSING)) for u, v, d in G.edges(data=True)],
+        columns=["src", "dst", "predicate"],
+    )
+    node_type = pd.Series({n: d.get("node_type", MISSING) for n, d in G.nodes(data=True)}, dtype=object)
+    return edges, node_type
+
+def graph_version(store: GraphStore) -> str:
+    """Content hash of the edge/type arrays and tables the profile depends on."""
+    h = hashlib.sha1(f"chain_profile:{PROFILE_VERSION}".encode("utf-8"))
+    for name in ("src", "dst", "predicate", "node_type"):
+        h.update(np.ascontiguousarray(store.arrays[name]).tobytes())
+    h.update(json.dumps([store.tables["predicate"], store.tables["node_type"]]).encode("utf-8"))
+    return h.hexdigest()
+
+def profile_graph(graph: Any, cache_dir: Optional[Path] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    (predicate chains, schema chains) for a GraphStore or networkx MultiDiGraph.
+
+    GraphStore results are cached per graph version in memory and, with
+    cache_dir, as chain_profile_<version>.json on disk.
+    """
+    if not isinstance(graph, GraphStore):
+        return chain_profile(*_networkx_tables(graph))
+
+    version = graph_version(graph)
+    if version in _CACHE:
+        return _CACHE[version]
+
+    cache_path = Path(cache_dir) / f"chain_profile_{version[:16]}.json" if cache_dir else None
+    if cache_path is not None and cache_path.exists():
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        if cached.get("version") == version:
+            result = (
+                pd.DataFrame(cached["chains"], columns=CHAIN_COLS),
+                pd.DataFrame(cached["schemas"], columns=SCHEMA_COLS),
+            )
+            _CACHE[version] = result
+            return result
+
+    result = chain_profile(*_store_tables(graph))
+    _CACHE[version] = result
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(
+            json.dumps(
+                {
+                    "version": version,
+                    "chains": result[0].values.tolist(),
+                    "schemas": result[1].values.tolist(),
+                }
+            ),
+            encoding="utf-8",
+        )
+    return result
+
+def format_predicate_chains(chains: pd.DataFrame) -> List[str]:
+    """G3.2 printout (per graph, below the header)."""
+    lines = [f"Distinct predicate chains: {len(chains)}", "", "All 2-step predicate chains (p1 -> p2):"]
+    lines += [f"- ({ct:>8})  {p1} -> {p2}" for p1, p2, ct in chains.itertuples(index=False, name=None)]
+    return lines
+
+def format_schema_chains(schemas: pd.DataFrame) -> List[str]:
+    """G3.3 printout (per graph, below the header)."""
+    n_pairs = len(schemas.drop_duplicates(subset=["p1", "p2"]))
+    lines = [f"Distinct predicate chains: {n_pairs}", ""]
+    for (p1, p2), g in schemas.groupby(["p1", "p2"], sort=False):
+        lines.append(f"{p1} -> {p2}   (total 2-step chains: {int(g['count'].sum())})")
+        for a_t, b_t, c_t, ct in g[["a_type", "b_type", "c_type", "count"]].itertuples(index=False, name=None):
+            lines.append(f"  - ({ct:>8})  ({a_t}) --{p1}--> ({b_t}) --{p2}--> ({c_t})")
+        lines.append("")
+    return lines
@@ -0,0 +1,433 @@
+# lib/chunk_search.py
+from __future__ import annotations
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import argparse
+import math
+import re
+import shlex
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from lib.graph_store import _StringPool, _pack_strings, open_arrays, save_arrays
+
+SEARCH_MAGIC = b"IWTCSRC1"
+SEARCH_VERSION = 1
+SEARCH_FILENAME = "search_chunks_v0.idx"
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNIPPET_CONTEXT_LINES = 1
+SNIPPET_MAX_LINES = 5
+HIGHLIGHT = ("[[", "]]")
+
+TOKEN_REGEX = re.compile(r"[^\W_]+", re.UNICODE)
+
+def fold(text: str) -> str:
+    """Case- and accent-insensitive form used for indexing and queries."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_REGEX.findall(fold(text))
+
+def _token_spans(line: str) -> List[Tuple[str, int, int]]:
+    """(token, start, end) with offsets into the original line (for highlighting)."""
+    out = []
+    for m in TOKEN_REGEX.finditer(line):
+        for tok in tokenize(m.group()):
+            out.append((tok, m.start(), m.end()))
+    return out
+
+def parse_query(q: str) -> Tuple[List[str], List[List[str]], List[str]]:
+    """
+    Split a query into (terms, phrases, excluded terms). Bare words are
+    ranked (any may match), "quoted phrases" must match in order, and
+    -word excludes chunks containing it.
+    """
+    try:
+        parts = shlex.split(q)
+    except ValueError:  # unbalanced quote: treat as plain words
+        parts = q.replace('"', " ").split()
+    quoted = set(m.group(1) for m in re.finditer(r'"([^"]+)"', q))
+    terms: List[str] = []
+    phrases: List[List[str]] = []
+    excluded: List[str] = []
+    for part in parts:
+        toks = tokenize(part)
+        if not toks:
+            continue
+        if part.startswith("-") and part not in quoted:
+            excluded.extend(toks)
+        elif part in quoted and len(toks) > 1:
+            phrases.append(toks)
+        else:
+            terms.extend(toks)
+    return terms, phrases, excluded
+
+# ------------------------------------------------------------------
+# Index
+# ------------------------------------------------------------------
+class ChunkSearchIndex:
+    """
+    Positional inverted index over chunk text, stored as flat arrays.
+
+    Terms are a sorted string pool (binary search); per term, postings are
+    doc rows with term frequencies, and per posting, token positions (for
+    phrases). Chunk rows carry chunk_id, relpath, source_type, start/end
+    line and the chunk's lines, so hits point back to exact file lines.
+    save() writes one file; open() memory-maps it without re-tokenizing.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], tables: Dict[str, List[Any]], meta: Optional[Dict[str, Any]] = None):
+        self.arrays = arrays
+        self.tables = tables
+        self.meta = meta or {}
+        self._terms = _StringPool(arrays["term_blob"], arrays["term_offsets"])
+        self._relpaths = tables["relpaths"]
+        self._source_types = tables["source_types"]
+        self._entities = _StringPool(arrays["entity_blob"], arrays["entity_offsets"])
+        self._text = _StringPool(arrays["text_blob"], arrays["text_offsets"])
+        self.n_docs = len(arrays["chunk_id"])
+        self.avg_len = float(arrays["doc_len"].mean()) if self.n_docs else 0.0
+
+    # --- build ---
+    @classmethod
+    def build(
+        cls,
+        chunks: Iterable[Any],
+        entity_mentions: Optional[pd.DataFrame] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> "ChunkSearchIndex":
+        """
+        Index every chunk's lines (Chunk records or CHUNKS_V0 dicts).
+        entity_mentions (ENTITY_MENTIONS_V0: chunk_id, entity_id) enables
+        entity filters.
+        """
+        term_ids: Dict[str, int] = {}
+        p_term: List[int] = []
+        p_doc: List[int] = []
+        p_pos: List[int] = []
+        chunk_ids, st_codes, rel_codes, starts, ends, lens, texts = [], [], [], [], [], [], []
+        st_index: Dict[str, int] = {}
+        rel_index: Dict[str, int] = {}
+
+        for doc, c in enumerate(chunks):
+            lines = list(c.get("lines") or [])
+            toks = tokenize("\n".join(lines))
+            for pos, tok in enumerate(toks):
+                tid = term_ids.setdefault(tok, len(term_ids))
+                p_term.append(tid)
+                p_doc.append(doc)
+                p_pos.append(pos)
+            chunk_ids.append(int(c.get("chunk_id")))
+            st_codes.append(st_index.setdefault(str(c.get("source_type", "unknown")), len(st_index)))
+            rel_codes.append(rel_index.setdefault(str(c.get("relpath", c.get("path", ""))), len(rel_index)))
+            starts.append(int(c.get("start_line") or 1))
+            ends.append(int(c.get("end_line") or 0))
+            lens.append(len(toks))
+            texts.append("\n".join(str(x) for x in lines))
+
+        # renumber terms in sorted order so lookups can bisect the pool
+        vocab = sorted(term_ids)
+        remap = np.empty(len(vocab), dtype=np.int64)
+        remap[[term_ids[t] for t in vocab]] = np.arange(len(vocab))
+        t = remap[np.asarray(p_term, dtype=np.int64)] if p_term else np.zeros(0, dtype=np.int64)
+        d = np.asarray(p_doc, dtype=np.int64)
+        pos = np.asarray(p_pos, dtype=np.int32)
+        order = np.lexsort((pos, d, t))
+        t, d, pos = t[order], d[order], pos[order]
+
+        # one posting per (term, doc); positions grouped under it
+        new_post = np.ones(len(t), dtype=bool)
+        if len(t):
+            new_post[1:] = (t[1:] != t[:-1]) | (d[1:] != d[:-1])
+        post_start = np.flatnonzero(new_post)
+        post_term = t[post_start]
+        post_doc = d[post_start].astype(np.int32)
+        post_pos_offsets = np.append(post_start, len(t)).astype(np.int64)
+        post_tf = np.diff(post_pos_offsets).astype(np.int32)
+        term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(post_term, minlength=len(vocab)), out=term_offsets[1:])
+
+        # entity -> doc postings
+        ent_ids: List[str] = []
+        ent_offsets = np.zeros(1, dtype=np.int64)
+        ent_docs = np.zeros(0, dtype=np.int32)
+        if entity_mentions is not None and not entity_mentions.empty:
+            row_of = {cid: i for i, cid in enumerate(chunk_ids)}
+            pairs = (
+                entity_mentions[["entity_id", "chunk_id"]]
+                .assign(doc=lambda df: df["chunk_id"].map(row_of), entity_id=lambda df: df["entity_id"].astype(str))
+                .dropna(subset=["doc"])
+                .drop_duplicates(["entity_id", "doc"])
+                .sort_values(["entity_id", "doc"])
+            )
+            ent_ids = sorted(pairs["entity_id"].unique().tolist())
+            counts = pairs.groupby("entity_id", sort=True).size().reindex(ent_ids).to_numpy()
+            ent_offsets = np.zeros(len(ent_ids) + 1, dtype=np.int64)
+            np.cumsum(counts, out=ent_offsets[1:])
+            ent_docs = pairs["doc"].to_numpy(dtype=np.int32)
+
+        term_blob, term_off = _pack_strings(vocab)
+        ent_blob, ent_off = _pack_strings(ent_ids)
+        text_blob, text_off = _pack_strings(texts)
+        arrays = {
+            "chunk_id": np.asarray(chunk_ids, dtype=np.int64),
+            "source_type": np.asarray(st_codes, dtype=np.int32),
+            "relpath": np.asarray(rel_codes, dtype=np.int32),
+            "start_line": np.asarray(starts, dtype=np.int32),
+            "end_line": np.asarray(ends, dtype=np.int32),
+            "doc_len": np.asarray(lens, dtype=np.int32),
+            "term_blob": term_blob,
+            "term_offsets": term_off,
+            "term_post_offsets": term_offsets,
+            "post_doc": post_doc,
+            "post_tf": post_tf,
+            "post_pos_offsets": post_pos_offsets,
+            "positions": pos,
+            "entity_blob": ent_blob,
+            "entity_offsets": ent_off,
+            "entity_post_offsets": ent_offsets,
+            "entity_docs": ent_docs,
+            "text_blob": text_blob,
+            "text_offsets": text_off,
+        }
+        tables = {"source_types": list(st_index), "relpaths": list(rel_index)}
+        return cls(arrays, tables, meta)
+
+    def save(self, path: Path) -> Path:
+        return save_arrays(path, SEARCH_MAGIC, self.arrays, {"version": SEARCH_VERSION, "tables": self.tables, "meta": self.meta})
+
+    @classmethod
+    def open(cls, path: Path) -> "ChunkSearchIndex":
+        """Memory-map an index written by save()."""
+        if not Path(path).exists():
+            raise FileNotFoundError(f"Missing search index: {path}")
+        arrays, header = open_arrays(path, SEARCH_MAGIC, "chunk search index")
+        if header.get("version") != SEARCH_VERSION:
+            raise ValueError(f"Unsupported search index version {header.get('version')}: {path}")
+        return cls(arrays, header["tables"], header.get("meta"))
+
+    # --- lookups ---
+    def _term(self, tok: str) -> Optional[int]:
+        i = bisect_left(self._terms, tok)
+        return i if i < len(self._terms) and self._terms[i] == tok else None
+
+    def _postings(self, tok: str) -> Tuple[np.ndarray, np.ndarray, int]:
+        """(doc rows, tf, first posting index) for one term."""
+        tid = self._term(tok)
+        if tid is None:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), 0
+        a, b = self.arrays["term_post_offsets"][tid], self.arrays["term_post_offsets"][tid + 1]
+        return self.arrays["post_doc"][a:b], self.arrays["post_tf"][a:b], int(a)
+
+    def _positions(self, posting: int) -> np.ndarray:
+        off = self.arrays["post_pos_offsets"]
+        return self.arrays["positions"][off[posting]:off[posting + 1]]
+
+    def _phrase_tf(self, toks: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Docs containing the phrase and how often it occurs in each."""
+        plists = [self._postings(t) for t in toks]
+        if any(not len(d) for d, _, _ in plists):
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+        docs = plists[0][0]
+        for d, _, _ in plists[1:]:
+            docs = np.intersect1d(docs, d, assume_unique=True)
+        hit_docs, hit_tf = [], []
+        for doc in docs:
+            starts = None
+            for i, (d, _, first) in enumerate(plists):
+                k = first + int(np.searchsorted(d, doc))
+                p = self._positions(k) - i
+                starts = p if starts is None else np.intersect1d(starts, p, assume_unique=True)
+                if not len(starts):
+                    break
+            if starts is not None and len(starts):
+                hit_docs.append(doc)
+                hit_tf.append(len(starts))
+        return np.asarray(hit_docs, dtype=np.int32), np.asarray(hit_tf, dtype=np.int32)
+
+    def _entity_docs(self, entity_id: str) -> np.ndarray:
+        i = bisect_left(self._entities, entity_id)
+        if i >= len(self._entities) or self._entities[i] != entity_id:
+            return np.zeros(0, dtype=np.int32)
+        off = self.arrays["entity_post_offsets"]
+        return self.arrays["entity_docs"][off[i]:off[i + 1]]
+
+    def _bm25(self, docs: np.ndarray, tf: np.ndarray) -> np.ndarray:
+        n, df = self.n_docs, len(docs)
+        idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+        dl = self.arrays["doc_len"][docs]
+        tf = tf.astype(np.float64)
+        return idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / (self.avg_len or 1.0)))
+
+    def chunk_text(self, row: int) -> List[str]:
+        return self._text[row].split("\n")
+
+    # --- search ---
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        source_types: Optional[Iterable[str]] = None,
+        entities: Optional[Iterable[str]] = None,
+        relpath_prefix: Optional[str] = None,
+        snippets: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        BM25-ranked chunks for a query (see parse_query). Filters: source_types
+        (any of), entities (entity_ids, all of), relpath_prefix. Each hit has
+        chunk_id, relpath, source_type, start/end line, score and, with
+        snippets=True, highlighted lines addressed by absolute file line.
+        """
+        terms, phrases, excluded = parse_query(query)
+        if not terms and not phrases and source_types is None and not entities and not relpath_prefix:
+            return []  # nothing to rank or filter by
+        scores = np.zeros(self.n_docs, dtype=np.float64)
+        matched = np.zeros(self.n_docs, dtype=bool)
+        required: Optional[np.ndarray] = None
+
+        for tok in dict.fromkeys(terms):
+            docs, tf, _ = self._postings(tok)
+            if len(docs):
+                scores[docs] += self._bm25(docs, tf)
+                matched[docs] = True
+        for toks in phrases:
+            docs, tf = self._phrase_tf(toks)
+            mask = np.zeros(self.n_docs, dtype=bool)
+            if len(docs):
+                scores[docs] += self._bm25(docs, tf)
+                mask[docs] = True
+            required = mask if required is None else required & mask
+        if required is not None:
+            matched = required  # phrases must all match; bare terms only add score
+        if not terms and not phrases:
+            matched[:] = True  # filter-only query
+
+        for tok in excluded:
+            matched[self._postings(tok)[0]] = False
+        if source_types is not None:
+            codes = [i for i, st in enumerate(self._source_types) if st in set(source_types)]
+            matched &= np.isin(self.arrays["source_type"], codes)
+        for eid in entities or ():
+            mask = np.zeros(self.n_docs, dtype=bool)
+            mask[self._entity_docs(str(eid))] = True
+            matched &= mask
+        if relpath_prefix:
+            codes = [i for i, rel in enumerate(self._relpaths) if rel.startswith(relpath_prefix)]
+            matched &= np.isin(self.arrays["relpath"], codes)
+
+        rows = np.flatnonzero(matched)
+        if not len(rows):
+            return []
+        # best score first, then chunk order
+        top = rows[np.lexsort((self.arrays["chunk_id"][rows], -scores[rows]))][:limit]
+        highlight_terms = set(terms) | {t for p in phrases for t in p}
+        out = []
+        for row in top:
+            hit = {
+                "chunk_id": int(self.arrays["chunk_id"][row]),
+                "relpath": self._relpaths[self.arrays["relpath"][row]],
+                "source_type": self._source_types[self.arrays["source_type"][row]],
+                "start_line": int(self.arrays["start_line"][row]),
+                "end_line": int(self.arrays["end_line"][row]),
+                "score": round(float(scores[row]), 4),
+            }
+            if snippets:
+                hit["snippet"] = self.snippet(int(row), highlight_terms, phrases)
+            out.append(hit)
+        return out
+
+    def snippet(
+        self,
+        row: int,
+        terms: Set[str],
+        phrases: Sequence[Sequence[str]] = (),
+        context: int = SNIPPET_CONTEXT_LINES,
+        max_lines: int = SNIPPET_MAX_LINES,
+        marks: Tuple[str, str] = HIGHLIGHT,
+    ) -> List[Dict[str, Any]]:
+        """
+        Lines around the best-matching line of one chunk, matched tokens
+        wrapped in marks. Each entry: {"line": absolute file line, "text", "match"}.
+        """
+        lines = self.chunk_text(row)
+        first = int(self.arrays["start_line"][row])
+        spans = [_token_spans(line) for line in lines]
+        phrase_sets = [set(p) for p in phrases]
+
+        # phrases are indexed over the whole chunk, so they can wrap onto the next line
+        scored = [sum(1 for w in {t for t, _, _ in toks} if w in terms) for toks in spans]
+        flat_line = [i for i, toks in enumerate(spans) for _ in toks]
+        words = [t for toks in spans for t, _, _ in toks]
+        phrase_end: Dict[int, int] = {}
+        for p in phrases:
+            n = len(p)
+            for k in range(len(words) - n + 1):
+                if words[k:k + n] == list(p):
+                    a, b = flat_line[k], flat_line[k + n - 1]
+                    scored[a] += 3
+                    phrase_end[a] = max(phrase_end.get(a, a), b)
+
+        best = int(np.argmax(scored)) if scored and max(scored) > 0 else 0
+        lo = max(0, best - context)
+        hi = min(len(lines), lo + max_lines, best + context + 1)
+        end = phrase_end.get(best, best)
+        if end >= hi:  # keep every line of the best phrase match in view
+            hi = min(len(lines), end + 1)
+            lo = min(best, max(lo, hi - max_lines))
+
+        out = []
+        for i in range(lo, hi):
+            text = lines[i]
+            marked = sorted({(a, b) for tok, a, b in spans[i] if tok in terms or any(tok in ps for ps in phrase_sets)})
+            for a, b in reversed(marked):
+                text = text[:a] + marks[0] + text[a:b] + marks[1] + text[b:]
+            out.append({"line": first + i, "text": text, "match": bool(marked)})
+        return out
+
+def search_index_path(working_drafts_path: Path) -> Path:
+    return Path(working_drafts_path) / SEARCH_FILENAME
+
+def build_search_index(
+    chunks: Iterable[Any],
+    entity_mentions: Optional[pd.DataFrame] = None,
+    out_path: Optional[Path] = None,
+) -> ChunkSearchIndex:
+    """Build (and, with out_path, save) the chunk search index."""
+    index = ChunkSearchIndex.build(chunks, entity_mentions)
+    if out_path is not None:
+        index.save(out_path)
+    return index
+
+def format_hits(hits: Sequence[Dict[str, Any]]) -> List[str]:
+    """Printable hits: relpath:line range, score, then the snippet lines."""
+    lines = []
+    for i, h in enumerate(hits, start=1):
+        lines.append(f"{i}. {h['relpath']}:{h['start_line']}-{h['end_line']}  (chunk {h['chunk_id']}, {h['source_type']}, score {h['score']:.2f})")
+        for s in h.get("snippet", []):
+            lines.append(f"   {s['line']:>6}{'*' if s['match'] else ' '} {s['text']}")
+    return lines
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Search the IWTC chunk full-text index.")
+    parser.add_argument("index", type=Path, help=f"path to {SEARCH_FILENAME} (or the directory holding it)")
+    parser.add_argument("query", help='words, "quoted phrases" and -excluded words')
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--source-type", action="append", default=None, help="restrict to a source type (repeatable)")
+    parser.add_argument("--entity", action="append", default=None, help="require an entity_id (repeatable)")
+    args = parser.parse_args(argv)
+
+    path = search_index_path(args.index) if args.index.is_dir() else args.index
+    hits = ChunkSearchIndex.open(path).search(args.query, args.limit, args.source_type, args.entity)
+    print("\n".join(format_hits(hits)) if hits else "No matches.")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
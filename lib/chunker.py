@@ -0,0 +1,183 @@
+# lib/chunker.py
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import re
+
+# Phase 5 header grammar (kept in sync with IWTC_Raw_Source_Indexing.ipynb)
+TIME_LIKE_REGEX = r"\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AP]M)?"
+
+# Evaluated in order; first match wins.
+HEADER_REGEXES: List[Tuple[str, "re.Pattern[str]"]] = [
+    ("auto_ts", re.compile(r"^\s*\d{1,2}:\d{2}(?::\d{2})?\s*$")),
+    ("pbp_hash", re.compile(rf"^\s*(?:\d+\.\s*)?(?:[*-]\s*)?###\s+.*{TIME_LIKE_REGEX}.*$")),
+    ("pbp_forum", re.compile(rf"^\s*>?\s*\*\*.*{TIME_LIKE_REGEX}.*\*\*\s*$")),
+    ("session", re.compile(r"^\s*(?:\d+\.\s*)?(?:[>#*_\-\s]+)?session\s+(?!notes\b)\S.*$", re.IGNORECASE)),
+    ("md_heading", re.compile(r"^\s*(?:[*\-]\s*)?#{1,6}\s+\S.*$")),
+]
+
+# Header lines of these kinds are metadata; content text starts on the next line
+HEADER_KINDS_WITH_METADATA = {"pbp_hash", "pbp_forum", "session"}
+
+def _combine(regexes: List[Tuple[str, "re.Pattern[str]"]]) -> "re.Pattern[str]":
+    """One alternation of named groups; alternation order keeps first-match-wins."""
+    parts = []
+    for kind, rx in regexes:
+        body = f"(?i:{rx.pattern})" if rx.flags & re.IGNORECASE else rx.pattern
+        parts.append(f"(?P<{kind}>{body})")
+    return re.compile("|".join(parts))
+
+HEADER_MATCHER = _combine(HEADER_REGEXES)
+
+def header_kind(line: str) -> Optional[str]:
+    """Return the header kind for a line, or None for body text."""
+    m = HEADER_MATCHER.match(line)
+    return m.lastgroup if m else None
+
+def normalize_text(lines: Iterable[str]) -> str:
+    """Collapse chunk lines to single-space text (the Phase 6b/7b concat_text)."""
+    return " ".join(" ".join(lines).split())
+
+class Chunk:
+    """
+    One CHUNKS_V0 record as a view into its source's line buffer.
+
+    Lines are not copied: `lines` slices src["lines"] on access, and the
+    normalized text / content text are computed once on demand. Supports
+    chunk["key"] / chunk.get("key") with the CHUNKS_V0 dict keys so existing
+    consumers keep working; to_dict() gives the notebook's dict form.
+    """
+
+    __slots__ = ("chunk_id", "src", "start_line", "end_line", "header_kind", "_text", "_content_text")
+
+    KEYS = (
+        "chunk_id", "source_id", "source_type", "file_type", "path", "relpath",
+        "start_line", "end_line", "header_kind", "lines",
+    )
+
+    def __init__(self, chunk_id: int, src: Dict[str, Any], start_line: int, end_line: int, header_kind: str):
+        self.chunk_id = chunk_id
+        self.src = src
+        self.start_line = start_line
+        self.end_line = end_line
+        self.header_kind = header_kind
+        self._text: Optional[str] = None
+        self._content_text: Optional[str] = None
+
+    @property
+    def source_id(self) -> Any:
+        return self.src["source_id"]
+
+    @property
+    def source_type(self) -> str:
+        return self.src.get("source_type", "unknown")
+
+    @property
+    def file_type(self) -> str:
+        return self.src.get("file_type", "unknown")
+
+    @property
+    def path(self) -> Any:
+        return self.src["path"]
+
+    @property
+    def relpath(self) -> str:
+        return self.src.get("relpath", str(self.src["path"]))
+
+    @property
+    def lines(self) -> List[str]:
+        return self.src["lines"][self.start_line - 1:self.end_line]
+
+    @property
+    def has_metadata_header(self) -> bool:
+        return self.header_kind in HEADER_KINDS_WITH_METADATA
+
+    @property
+    def content_start_line(self) -> int:
+        return self.start_line + 1 if self.has_metadata_header else self.start_line
+
+    @property
+    def text(self) -> str:
+        """Whitespace-collapsed text of every line in the chunk (memoized)."""
+        if self._text is None:
+            self._text = normalize_text(self.lines)
+        return self._text
+
+    @property
+    def content_text(self) -> str:
+        """Like text, minus a pbp/session header line (memoized)."""
+        if self._content_text is None:
+            if self.has_metadata_header:
+                self._content_text = normalize_text(self.src["lines"][self.start_line:self.end_line])
+            else:
+                self._content_text = self.text
+        return self._content_text
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.KEYS else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.KEYS}
+
+    def __repr__(self) -> str:
+        return f"Chunk({self.chunk_id}, {self.relpath!r}, {self.start_line}-{self.end_line}, {self.header_kind})"
+
+def chunk_content_text(chunk: Any) -> str:
+    """Content text for a Chunk or a CHUNKS_V0 dict (header line dropped for pbp/session)."""
+    if isinstance(chunk, Chunk):
+        return chunk.content_text
+    lines = chunk.get("lines", [])
+    if chunk.get("header_kind") in HEADER_KINDS_WITH_METADATA and lines:
+        lines = lines[1:]
+    return normalize_text(lines)
+
+def chunk_content_start_line(chunk: Any) -> int:
+    """First content line for a Chunk or a CHUNKS_V0 dict (Phase 7b content_start_line)."""
+    if isinstance(chunk, Chunk):
+        return chunk.content_start_line
+    start = chunk.get("start_line") or 1
+    return start + 1 if chunk.get("header_kind") in HEADER_KINDS_WITH_METADATA and chunk.get("lines") else start
+
+def iter_chunks(src: Dict[str, Any], start_id: int = 1) -> Iterator[Chunk]:
+    """
+    Lazily split one LOADED_SOURCES record into chunks.
+    chunk_id numbering starts at start_id (global across files).
+    """
+    lines = src["lines"]
+    chunk_id = start_id
+    current_kind = "preamble"
+    chunk_start_line = 1
+
+    for idx, line in enumerate(lines, start=1):
+        matched_kind = header_kind(line)
+        if matched_kind:
+            # Flush what we have so far (preamble content is kept too)
+            if idx > chunk_start_line:
+                yield Chunk(chunk_id, src, chunk_start_line, idx - 1, current_kind)
+                chunk_id += 1
+            # Header line starts (and belongs to) the new chunk
+            current_kind = matched_kind
+            chunk_start_line = idx
+
+    if len(lines) >= chunk_start_line:
+        yield Chunk(chunk_id, src, chunk_start_line, len(lines), current_kind)
+
+def chunk_source(src: Dict[str, Any], start_id: int = 1) -> List[Chunk]:
+    """Split one LOADED_SOURCES record into CHUNKS_V0 records."""
+    return list(iter_chunks(src, start_id=start_id))
+
+def iter_chunk_sources(loaded_sources: Iterable[Dict[str, Any]], start_id: int = 1) -> Iterator[Chunk]:
+    """Phase 5 over all sources, one source at a time, with global chunk_ids."""
+    next_id = start_id
+    for src in loaded_sources:
+        for chunk in iter_chunks(src, start_id=next_id):
+            yield chunk
+            next_id = chunk.chunk_id + 1
+
+def chunk_sources(loaded_sources: Iterable[Dict[str, Any]], start_id: int = 1) -> List[Chunk]:
+    """Phase 5 over all sources: returns CHUNKS_V0 with global chunk_ids."""
+    return list(iter_chunk_sources(loaded_sources, start_id=start_id))
@@ -0,0 +1,140 @@
+# lib/columnar.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa  # optional: columnar artifacts
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+COLUMNAR_SUFFIX = ".parquet"
+
+# Pipe-joined list columns in the index tables -> native list columns
+LIST_COLUMNS: Dict[str, str] = {
+    "chunk_ids": "int64",
+    "file_relpaths": "string",
+    "entity_ids": "string",
+    "canonicals": "string",
+    "matched_vocabs": "string",
+    "match_kinds": "string",
+}
+
+# Repeated ids / predicates stored dictionary-encoded (pandas Categorical on load)
+DICTIONARY_COLUMNS = {
+    "entity_id", "player_entity_id", "source_type", "relpath",
+    "subject", "predicate", "object", "subject_id", "object_id",
+    "subject_type", "object_type", "pair_type", "relationship_class", "node_type",
+}
+
+# Parquet schema metadata tying a columnar file to the CSV it was written with
+_META_CSV_SIZE = b"iwtc.csv_size"
+_META_CSV_DIGEST = b"iwtc.csv_digest"
+
+def available() -> bool:
+    return pa is not None
+
+def columnar_path(csv_path: Path) -> Path:
+    """index_entity_to_chunks_v0.csv -> index_entity_to_chunks_v0.parquet (same directory)."""
+    return Path(csv_path).with_suffix(COLUMNAR_SUFFIX)
+
+def _digest(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _split(value: Any) -> List[str]:
+    """One pipe-joined cell as written by Phase 8 ("" / NaN -> [])."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return []
+    return [p for p in (x.strip() for x in str(value).split("|")) if p]
+
+def _blank_to_null(values: pd.Series) -> pd.Series:
+    """CSV round-trips "" as missing; store it that way so both loaders agree."""
+    return values.astype(object).where(values.notna() & (values.astype(str) != ""), None)
+
+def to_arrow(df: pd.DataFrame) -> "pa.Table":
+    """Typed Arrow table for one artifact frame (list, integer and dictionary columns)."""
+    if pa is None:
+        raise ImportError("pyarrow is required for columnar artifacts (pip install pyarrow)")
+    columns, fields = [], []
+    for col in df.columns:
+        s = df[col]
+        if col in LIST_COLUMNS:
+            lists = [_split(v) for v in s.tolist()]
+            if LIST_COLUMNS[col] == "int64":
+                arr = pa.array([[int(x) for x in v] for v in lists], type=pa.list_(pa.int64()))
+            else:
+                arr = pa.array(lists, type=pa.list_(pa.string()))
+        elif s.dtype.kind in "biuf":
+            arr = pa.array(s.to_numpy(), from_pandas=True)
+        elif col in DICTIONARY_COLUMNS:
+            arr = pa.array(_blank_to_null(s).map(lambda x: x if x is None else str(x)), type=pa.string()).dictionary_encode()
+        else:
+            arr = pa.array(_blank_to_null(s).map(lambda x: x if x is None else str(x)), type=pa.string())
+        columns.append(arr)
+        fields.append(pa.field(str(col), arr.type))
+    return pa.Table.from_arrays(columns, schema=pa.schema(fields))
+
+def write_columnar(df: pd.DataFrame, csv_path: Path) -> Path:
+    """
+    Write the Parquet twin of an artifact CSV that has just been written.
+    The CSV's size and digest are recorded so a later, edited CSV wins.
+    """
+    csv_path = Path(csv_path)
+    table = to_arrow(df)
+    meta = dict(table.schema.metadata or {})
+    meta[_META_CSV_SIZE] = str(csv_path.stat().st_size).encode()
+    meta[_META_CSV_DIGEST] = _digest(csv_path).encode()
+    out = columnar_path(csv_path)
+    tmp = out.with_name(out.name + ".tmp")
+    pq.write_table(table.replace_schema_metadata(meta), tmp, compression="zstd")
+    tmp.replace(out)
+    return out
+
+def columnar_is_current(csv_path: Path) -> bool:
+    """True when the Parquet twin exists, pyarrow is importable and it matches the CSV."""
+    csv_path = Path(csv_path)
+    col = columnar_path(csv_path)
+    if pa is None or not col.exists():
+        return False
+    if not csv_path.exists():
+        return True  # columnar-only directory
+    meta = pq.read_schema(col).metadata or {}
+    if meta.get(_META_CSV_SIZE) != str(csv_path.stat().st_size).encode():
+        return False
+    return meta.get(_META_CSV_DIGEST) == _digest(csv_path).encode()
+
+def artifact_exists(csv_path: Path) -> bool:
+    return Path(csv_path).exists() or (pa is not None and columnar_path(csv_path).exists())
+
+def read_artifact(csv_path: Path, prefer_columnar: bool = True) -> pd.DataFrame:
+    """
+    Load an artifact table: the current Parquet twin when there is one
+    (list columns as arrays, dictionary columns as Categorical), else the CSV.
+    """
+    csv_path = Path(csv_path)
+    if prefer_columnar and columnar_is_current(csv_path):
+        return pq.read_table(columnar_path(csv_path), memory_map=True).to_pandas()
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Missing artifact: {csv_path}")
+    return pd.read_csv(csv_path)
+
+def csv_form(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows as the CSV shows them: list cells pipe-joined, categoricals as plain values."""
+    out = df.copy()
+    for col in out.columns:
+        s = out[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            out[col] = s.astype(object)
+        elif col in LIST_COLUMNS and s.dtype == object:
+            out[col] = [v if not isinstance(v, (list, np.ndarray)) else "|".join(str(x) for x in v) for v in s.tolist()]
+    return out
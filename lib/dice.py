@@ -3,7 +3,10 @@ from __future__ import annotations
 import random
 import re
 from dataclasses import dataclass
-from typing import List, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
 
 _DICE_RE = re.compile(
     r"""
@@ -84,7 +87,7 @@ def roll(expr: str) -> Result:
       '1d20+5', '2d8+1d4+3', '4d6kh3', '1d20-1', 'd20+2'
     Returns Result(total, detail).
     """
-    terms = _parse_terms(expr)
+    terms = compile_expr(expr).terms
     pieces = []
     running_total = 0
 
@@ -135,3 +138,194 @@ def roll_dis(expr: str) -> Result:
     loser = r1 if r1.total <= r2.total else r2
     detail = f"dis({expr}): [{r1.detail}] vs [{r2.detail}] -> {loser.total}"
     return Result(total=loser.total, detail=detail)
+
+# ---------------------------------------------------------------------------
+# Compiled expressions: batch sampling and exact distributions
+# ---------------------------------------------------------------------------
+
+RngLike = Union[None, int, np.random.Generator]
+
+def _keep_spec(keep: str, count: int) -> Tuple[str, int]:
+    """('h'|'l', n kept) with n clamped to [0, count]; no spec keeps every die."""
+    m = re.match(r"k([hl])(\d+)", keep.lower()) if keep else None
+    if not m:
+        return "h", count
+    return m.group(1), max(0, min(int(m.group(2)), count))
+
+@dataclass(frozen=True)
+class Distribution:
+    """Exact distribution of a dice total: support[i] occurs with probability probs[i]."""
+    support: np.ndarray
+    probs: np.ndarray
+
+    def mean(self) -> float:
+        return float(np.dot(self.support, self.probs))
+
+    def variance(self) -> float:
+        mu = self.mean()
+        return float(np.dot((self.support - mu) ** 2, self.probs))
+
+    def prob(self, total: int) -> float:
+        i = int(total) - int(self.support[0])
+        return float(self.probs[i]) if 0 <= i < len(self.probs) else 0.0
+
+    def cdf(self, total: int) -> float:
+        """P(X <= total)."""
+        return float(self.probs[self.support <= total].sum())
+
+    def percentile(self, q: float) -> int:
+        """Smallest total whose CDF reaches q percent."""
+        if not 0 <= q <= 100:
+            raise ValueError(f"Percentile must be in [0, 100]. Received: {q}")
+        cum = np.cumsum(self.probs)
+        i = int(np.searchsorted(cum, q / 100.0 - 1e-12, side="left"))
+        return int(self.support[min(i, len(self.support) - 1)])
+
+    def adv(self) -> "Distribution":
+        """Higher of two independent totals."""
+        cum = np.cumsum(self.probs)
+        return Distribution(self.support, np.diff(cum ** 2, prepend=0.0))
+
+    def dis(self) -> "Distribution":
+        """Lower of two independent totals."""
+        surv = 1.0 - np.cumsum(self.probs)
+        return Distribution(self.support, np.diff(1.0 - surv ** 2, prepend=0.0))
+
+    def to_dict(self) -> Dict[int, float]:
+        return {int(t): float(p) for t, p in zip(self.support, self.probs) if p > 0}
+
+def _dice_counts(count: int, sides: int, which: str, n: int) -> Tuple[int, List[int]]:
+    """
+    Outcome counts for the sum of the n highest (or lowest) of count dice:
+    (minimum sum, counts) over sides**count equally likely rolls.
+
+    Faces are assigned best-first; choosing j of the remaining dice to show
+    face v contributes C(remaining, j) orderings, and v is counted for as
+    many of them as there are kept slots left.
+    """
+    faces = range(sides, 0, -1) if which == "h" else range(1, sides + 1)
+    # state: (dice assigned, kept sum) -> number of orderings
+    states: Dict[Tuple[int, int], int] = {(0, 0): 1}
+    binom = [[1]]
+    for r in range(1, count + 1):
+        prev = binom[-1]
+        binom.append([1] + [prev[i - 1] + prev[i] for i in range(1, r)] + [1])
+    for v in faces:
+        nxt: Dict[Tuple[int, int], int] = {}
+        for (m, s), ways in states.items():
+            left = count - m
+            for j in range(left + 1):
+                kept = min(j, max(0, n - m))
+                key = (m + j, s + kept * v)
+                nxt[key] = nxt.get(key, 0) + ways * binom[left][j]
+        states = nxt
+    sums = {s: w for (m, s), w in states.items() if m == count}
+    lo, hi = min(sums), max(sums)
+    return lo, [sums.get(s, 0) for s in range(lo, hi + 1)]
+
+def _term_distribution(sign: int, count: int, sides: int, keep: str) -> Tuple[int, np.ndarray]:
+    which, n = _keep_spec(keep, count)
+    if count == 0 or n == 0:
+        return 0, np.ones(1)
+    if n == count:
+        probs = np.ones(1)
+        face = np.full(sides, 1.0 / sides)
+        for _ in range(count):
+            probs = np.convolve(probs, face)
+        lo = count
+    else:
+        lo, counts = _dice_counts(count, sides, which, n)
+        probs = np.asarray(counts, dtype=float) / float(sides) ** count
+    if sign < 0:
+        return -(lo + len(probs) - 1), probs[::-1]
+    return lo, probs
+
+@dataclass(frozen=True)
+class DiceExpr:
+    """A parsed dice expression; parse once via compile_expr() and reuse."""
+    expr: str
+    terms: Tuple[tuple, ...]
+
+    def roll(self) -> Result:
+        return roll(self.expr)
+
+    def roll_many(self, n: int, rng: RngLike = None) -> np.ndarray:
+        """n independent totals as an int64 array (rng: seed or numpy Generator)."""
+        if n < 0:
+            raise ValueError(f"n must be >= 0. Received: {n}")
+        rng = np.random.default_rng(rng)
+        totals = np.zeros(n, dtype=np.int64)
+        for kind, sign, a, b, keep in self.terms:
+            if kind == "const":
+                totals += sign * a
+                continue
+            count, sides = a, b
+            which, k = _keep_spec(keep, count)
+            if count == 0 or k == 0:
+                continue
+            rolls = rng.integers(1, sides + 1, size=(n, count), dtype=np.int64)
+            if k < count:
+                # partial sort along each row; only the kept block is ordered
+                if which == "h":
+                    rolls = np.partition(rolls, count - k, axis=1)[:, count - k:]
+                else:
+                    rolls = np.partition(rolls, k - 1, axis=1)[:, :k]
+            totals += sign * rolls.sum(axis=1)
+        return totals
+
+    def roll_adv_many(self, n: int, rng: RngLike = None) -> np.ndarray:
+        """Advantage: higher of two totals, n times."""
+        rng = np.random.default_rng(rng)
+        return np.maximum(self.roll_many(n, rng), self.roll_many(n, rng))
+
+    def roll_dis_many(self, n: int, rng: RngLike = None) -> np.ndarray:
+        """Disadvantage: lower of two totals, n times."""
+        rng = np.random.default_rng(rng)
+        return np.minimum(self.roll_many(n, rng), self.roll_many(n, rng))
+
+    def distribution(self) -> Distribution:
+        """Exact distribution of the total, by convolving per-term PMFs."""
+        lo, probs = 0, np.ones(1)
+        for kind, sign, a, b, keep in self.terms:
+            if kind == "const":
+                lo += sign * a
+                continue
+            t_lo, t_probs = _term_distribution(sign, a, b, keep)
+            lo += t_lo
+            probs = np.convolve(probs, t_probs)
+        return Distribution(np.arange(lo, lo + len(probs), dtype=np.int64), probs)
+
+    def mean(self) -> float:
+        return self.distribution().mean()
+
+@lru_cache(maxsize=1024)
+def compile_expr(expr: str) -> DiceExpr:
+    """Parse and validate a dice expression once; results are cached by text."""
+    terms = tuple(_parse_terms(expr))
+    for kind, _, a, b, _ in terms:
+        if kind == "dice" and a > 0 and b <= 0:
+            raise ValueError(f"Bad dice expression: die with {b} sides")
+    return DiceExpr(expr=expr, terms=terms)
+
+def roll_many(expr: str, n: int, rng: RngLike = None) -> np.ndarray:
+    """n totals of expr drawn as arrays, e.g. roll_many('4d6kh3', 100_000)."""
+    return compile_expr(expr).roll_many(n, rng)
+
+def roll_adv_many(expr: str, n: int, rng: RngLike = None) -> np.ndarray:
+    """n advantage totals of expr."""
+    return compile_expr(expr).roll_adv_many(n, rng)
+
+def roll_dis_many(expr: str, n: int, rng: RngLike = None) -> np.ndarray:
+    """n disadvantage totals of expr."""
+    return compile_expr(expr).roll_dis_many(n, rng)
+
+def distribution(expr: str, mode: Optional[str] = None) -> Distribution:
+    """Exact distribution of expr; mode 'adv' / 'dis' for two rolls keeping the higher / lower."""
+    dist = compile_expr(expr).distribution()
+    if mode is None:
+        return dist
+    if mode == "adv":
+        return dist.adv()
+    if mode == "dis":
+        return dist.dis()
+    raise ValueError(f"mode must be None, 'adv' or 'dis'. Received: {mode}")
@@ -0,0 +1,294 @@
+# lib/encounter_sim.py
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from lib.dice import DiceExpr, compile_expr
+from lib.roll_adapter import pick_attack
+
+# d20 attack rules used by the simulator
+NATURAL_CRIT = 20
+NATURAL_MISS = 1
+DEFAULT_MAX_ROUNDS = 20
+
+Hp = Union[int, str]
+
+@dataclass(frozen=True)
+class Attacker:
+    """One creature's attack, precompiled for batch rolling."""
+    name: str
+    attack_name: str
+    to_hit: int
+    damage: DiceExpr
+    crit_damage: DiceExpr
+    attacks_per_round: int = 1
+    mode: Optional[str] = None  # None, "adv" or "dis" on the d20
+
+def _join_exprs(parts: Sequence[str]) -> str:
+    parts = [p.strip().replace(" ", "") for p in parts if p and p.strip()]
+    if not parts:
+        return "0"
+    out = parts[0]
+    for p in parts[1:]:
+        out += p if p[0] in "+-" else f"+{p}"
+    return out
+
+def _crit_expr(dmg: DiceExpr) -> str:
+    """Damage expression with every dice term rolled twice (constants once)."""
+    extra = [
+        f"{'-' if sign < 0 else '+'}{count}d{sides}{keep}"
+        for kind, sign, count, sides, keep in dmg.terms
+        if kind == "dice"
+    ]
+    return _join_exprs([dmg.expr] + extra)
+
+def _v1_attack(doc: Dict[str, Any], attack_name: Optional[str]) -> Dict[str, Any]:
+    """statblock.v1 actions -> the pick_attack() input shape."""
+    for a in doc.get("actions") or []:
+        if a.get("type") != "attack" or not isinstance(a.get("attack"), dict):
+            continue
+        if attack_name and (a.get("name") or "").casefold() != attack_name.casefold():
+            continue
+        atk = a["attack"]
+        return {
+            "name": a.get("name", "Attack"),
+            "to_hit": atk.get("to_hit"),
+            "damage": [
+                {"expr": d.get("formula") or d.get("expr") or "", "type": d.get("type", "")}
+                for d in atk.get("damage") or []
+                if isinstance(d, dict)
+            ],
+        }
+    where = f" named '{attack_name}'" if attack_name else ""
+    raise ValueError(f"No attack action{where} in statblock '{doc.get('name')}'")
+
+def compile_attacker(
+    mon: Dict[str, Any],
+    attack_name: Optional[str] = None,
+    attacks_per_round: int = 1,
+    mode: Optional[str] = None,
+) -> Attacker:
+    """
+    Precompile a creature's to-hit and damage for simulation.
+
+    Accepts srd_reader.normalize_minimal() output (its single attack) or a
+    statblock.v1 doc from statblock_loader.load_statblock() (the first attack
+    action, or the one named attack_name). Missing to-hit falls back as in
+    roll_adapter.pick_attack().
+    """
+    if mode not in (None, "adv", "dis"):
+        raise ValueError(f"mode must be None, 'adv' or 'dis'. Received: {mode}")
+    if attacks_per_round < 0:
+        raise ValueError(f"attacks_per_round must be >= 0. Received: {attacks_per_round}")
+
+    if "actions" in mon and "attack" not in mon:
+        mon = {**mon, "attack": _v1_attack(mon, attack_name)}
+    atk = pick_attack(mon)
+
+    damage = compile_expr(_join_exprs([d["expr"] for d in atk["damage"]]))
+    return Attacker(
+        name=mon.get("name", "Unknown"),
+        attack_name=atk["name"],
+        to_hit=atk["to_hit"],
+        damage=damage,
+        crit_damage=compile_expr(_crit_expr(damage)),
+        attacks_per_round=attacks_per_round,
+        mode=mode,
+    )
+
+def target_from_statblock(doc: Dict[str, Any], use_average_hp: bool = True) -> Tuple[int, Hp]:
+    """(AC, HP) from a statblock.v1 doc; HP is the average or the hit-dice formula."""
+    if "ac" not in doc or not isinstance(doc.get("hp"), dict):
+        raise ValueError(f"Statblock '{doc.get('name')}' has no ac/hp (normalize_minimal output has neither)")
+    hp = doc["hp"].get("average") if use_average_hp else None
+    if hp is None:
+        hp = doc["hp"].get("formula") or "1d8"
+    return int(doc["ac"]), int(hp) if not isinstance(hp, str) else hp
+
+# ---------------------------------------------------------------------------
+# Hit chances and expected damage (exact, no sampling)
+# ---------------------------------------------------------------------------
+
+def _d20_probs(mode: Optional[str]) -> np.ndarray:
+    """P(d20 = face) for faces 1..20 under normal/adv/dis."""
+    cum = np.arange(1, 21) / 20.0
+    if mode == "adv":
+        cum = cum ** 2
+    elif mode == "dis":
+        cum = 1.0 - (1.0 - cum) ** 2
+    return np.diff(cum, prepend=0.0)
+
+def hit_chances(attacker: Attacker, ac: int) -> Tuple[float, float]:
+    """(P(hit incl. crits), P(crit)) for one attack against ac."""
+    p = _d20_probs(attacker.mode)
+    faces = np.arange(1, 21)
+    hit = (faces == NATURAL_CRIT) | ((faces != NATURAL_MISS) & (faces + attacker.to_hit >= ac))
+    return float(p[hit].sum()), float(p[faces == NATURAL_CRIT].sum())
+
+def _clipped_mean(expr: DiceExpr) -> float:
+    d = expr.distribution()
+    return float(np.dot(np.maximum(d.support, 0), d.probs))
+
+def expected_damage_per_round(attackers: Sequence[Attacker], ac: int) -> float:
+    """Exact expected damage per round against ac (damage floors at 0 per hit)."""
+    total = 0.0
+    for a in attackers:
+        p_hit, p_crit = hit_chances(a, ac)
+        per_attack = (p_hit - p_crit) * _clipped_mean(a.damage) + p_crit * _clipped_mean(a.crit_damage)
+        total += a.attacks_per_round * per_attack
+    return total
+
+# ---------------------------------------------------------------------------
+# Batched simulation
+# ---------------------------------------------------------------------------
+
+def _d20(rng: np.random.Generator, shape: Tuple[int, ...], mode: Optional[str]) -> np.ndarray:
+    d = rng.integers(1, 21, size=shape)
+    if mode == "adv":
+        return np.maximum(d, rng.integers(1, 21, size=shape))
+    if mode == "dis":
+        return np.minimum(d, rng.integers(1, 21, size=shape))
+    return d
+
+def _simulate_rounds(
+    attackers: Sequence[Attacker], ac: int, n: int, rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Damage per round (n,), plus attacks, hits and crits per attacker over the n rounds."""
+    damage = np.zeros(n, dtype=np.int64)
+    k = len(attackers)
+    attacks, hits, crits = np.zeros(k, np.int64), np.zeros(k, np.int64), np.zeros(k, np.int64)
+    for i, a in enumerate(attackers):
+        m = n * a.attacks_per_round
+        if m == 0:
+            continue
+        d20 = _d20(rng, (m,), a.mode)
+        crit = d20 == NATURAL_CRIT
+        hit = crit | ((d20 != NATURAL_MISS) & (d20 + a.to_hit >= ac))
+        dmg = np.where(crit, a.crit_damage.roll_many(m, rng), a.damage.roll_many(m, rng))
+        dmg = np.where(hit, np.maximum(dmg, 0), 0)
+        damage += dmg.reshape(n, a.attacks_per_round).sum(axis=1)
+        attacks[i], hits[i], crits[i] = m, int(hit.sum()), int(crit.sum())
+    return damage, attacks, hits, crits
+
+def _combat_batch(args: Tuple[Sequence[Attacker], int, Hp, int, int, Any]) -> Dict[str, Any]:
+    """Worker: n_trials combats of max_rounds each (top-level so it pickles)."""
+    attackers, ac, hp, n_trials, max_rounds, seed = args
+    rng = np.random.default_rng(seed)
+    damage, attacks, hits, crits = _simulate_rounds(attackers, ac, n_trials * max_rounds, rng)
+    per_round = damage.reshape(n_trials, max_rounds)
+
+    hp_arr = compile_expr(hp).roll_many(n_trials, rng) if isinstance(hp, str) else np.full(n_trials, int(hp))
+    hp_arr = np.maximum(hp_arr, 1)
+    dead = np.cumsum(per_round, axis=1) >= hp_arr[:, None]
+    killed = dead.any(axis=1)
+    # round of the kill (1-based); 0 if the target survived max_rounds
+    kill_round = np.where(killed, dead.argmax(axis=1) + 1, 0)
+
+    return {
+        "kill_round": kill_round,
+        "damage_sum": float(damage.sum()),
+        "damage_sqsum": float(np.square(damage, dtype=np.float64).sum()),
+        "rounds": int(damage.size),
+        "attacks": attacks,
+        "hits": hits,
+        "crits": crits,
+    }
+
+def simulate_encounter(
+    attackers: Sequence[Attacker],
+    target_ac: int,
+    target_hp: Hp,
+    n_trials: int = 10_000,
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+    seed: Any = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Monte Carlo combats: the attackers hit a target (target_ac, target_hp)
+    every round until it drops or max_rounds pass.
+
+    target_hp may be a dice formula, rolled per trial. With workers > 1 the
+    trials are split across a process pool, one independent seed per batch
+    (results are reproducible for a given seed and worker count).
+
+    Returns dpr (mean/std per round), expected_dpr (exact), per-attacker
+    hit and crit rates, kill_rate and the rounds-to-kill distribution over
+    killed trials.
+    """
+    if n_trials <= 0 or max_rounds <= 0:
+        raise ValueError(f"n_trials and max_rounds must be > 0. Received: {n_trials}, {max_rounds}")
+    attackers = list(attackers)
+
+    n_batches = max(1, min(workers or 1, n_trials))
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    sizes = [n_trials // n_batches + (1 if i < n_trials % n_batches else 0) for i in range(n_batches)]
+    jobs = [(attackers, target_ac, target_hp, size, max_rounds, s) for size, s in zip(sizes, seeds)]
+
+    if n_batches == 1:
+        parts = [_combat_batch(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=n_batches) as pool:
+            parts = list(pool.map(_combat_batch, jobs))
+
+    kill_round = np.concatenate([p["kill_round"] for p in parts])
+    rounds = sum(p["rounds"] for p in parts)
+    dmg_mean = sum(p["damage_sum"] for p in parts) / rounds
+    dmg_var = max(0.0, sum(p["damage_sqsum"] for p in parts) / rounds - dmg_mean ** 2)
+    attacks = sum(p["attacks"] for p in parts)
+    hits = sum(p["hits"] for p in parts)
+    crits = sum(p["crits"] for p in parts)
+
+    killed = kill_round[kill_round > 0]
+    ttk = np.bincount(killed, minlength=max_rounds + 1)[1:] / n_trials
+    return {
+        "trials": n_trials,
+        "max_rounds": max_rounds,
+        "target_ac": target_ac,
+        "target_hp": target_hp,
+        "dpr_mean": dmg_mean,
+        "dpr_std": dmg_var ** 0.5,
+        "expected_dpr": expected_damage_per_round(attackers, target_ac),
+        "attackers": [
+            {
+                "name": a.name,
+                "attack": a.attack_name,
+                "to_hit": a.to_hit,
+                "damage": a.damage.expr,
+                "attacks": int(attacks[i]),
+                "hit_rate": float(hits[i] / attacks[i]) if attacks[i] else 0.0,
+                "crit_rate": float(crits[i] / attacks[i]) if attacks[i] else 0.0,
+                "expected_hit_rate": hit_chances(a, target_ac)[0],
+            }
+            for i, a in enumerate(attackers)
+        ],
+        "kill_rate": float(len(killed) / n_trials),
+        "rounds_to_kill_mean": float(killed.mean()) if len(killed) else None,
+        "rounds_to_kill_median": float(np.median(killed)) if len(killed) else None,
+        "rounds_to_kill_p90": float(np.percentile(killed, 90)) if len(killed) else None,
+        # P(target drops in round r), r = 1..max_rounds (sums to kill_rate)
+        "rounds_to_kill": {r + 1: float(p) for r, p in enumerate(ttk) if p > 0},
+    }
+
+def format_report(report: Dict[str, Any]) -> List[str]:
+    """Printable summary lines for a simulate_encounter() report."""
+    lines = [
+        f"Target AC {report['target_ac']}, HP {report['target_hp']} — {report['trials']} trials, up to {report['max_rounds']} rounds",
+        f"Damage per round: {report['dpr_mean']:.2f} ± {report['dpr_std']:.2f} (expected {report['expected_dpr']:.2f})",
+    ]
+    for a in report["attackers"]:
+        lines.append(
+            f"  - {a['name']} / {a['attack']} ({a['to_hit']:+d}, {a['damage']}): "
+            f"hit {a['hit_rate']:.1%} (expected {a['expected_hit_rate']:.1%}), crit {a['crit_rate']:.1%}"
+        )
+    lines.append(f"Kill rate: {report['kill_rate']:.1%}")
+    if report["rounds_to_kill_mean"] is not None:
+        lines.append(
+            f"Rounds to kill: mean {report['rounds_to_kill_mean']:.2f}, "
+            f"median {report['rounds_to_kill_median']:.0f}, p90 {report['rounds_to_kill_p90']:.0f}"
+        )
+        for r, p in report["rounds_to_kill"].items():
+            lines.append(f"  round {r:>2}: {p:.1%}")
+    return lines
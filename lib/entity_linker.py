@@ -0,0 +1,225 @@
+# lib/entity_linker.py
+from __future__ import annotations
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import re
+
+from lib.chunker import chunk_content_start_line, chunk_content_text
+
+# Phase 7b defaults (kept in sync with IWTC_Raw_Source_Indexing.ipynb)
+EXCLUDE_SOURCE_TYPES = {"auto_transcripts"}
+MAX_SNIPPET_CHARS = 220
+
+def _vocab_pattern(vocab: str, flags: int) -> "re.Pattern[str]":
+    """Same boundary-aware, whitespace-flexible pattern Phase 7a compiles."""
+    esc = re.escape(vocab)
+    esc_ws = esc.replace(r"\ ", r"\s+")
+    return re.compile(rf"(?<!\w){esc_ws}(?!\w)", flags)
+
+def _fold_char(ch: str) -> str:
+    """
+    Fold one character without changing string length.
+    Deliberately generous (upper-then-lower catches 'ſ', Kelvin sign, etc.);
+    every candidate is confirmed against the real regex afterwards.
+    """
+    up = ch.upper()
+    if len(up) == 1:
+        lo = up.lower()
+        if len(lo) == 1:
+            return lo
+    lo = ch.lower()
+    return lo if len(lo) == 1 else ch
+
+def _is_word(ch: str) -> bool:
+    # Mirrors re's \w for str patterns
+    return ch.isalnum() or ch == "_"
+
+class EntityLinker:
+    """
+    Multi-pattern matcher over a vocab list, compiled once.
+
+    Vocab order is priority order (Phase 7a sorts longest-first, then
+    alphabetically). find() scans the text once with an Aho-Corasick
+    automaton, then resolves overlaps exactly like the per-vocab
+    finditer + span masking loop it replaces.
+    """
+
+    def __init__(self, vocabs: Sequence[str], case_insensitive: bool = True):
+        self.vocabs: List[str] = [str(v) for v in vocabs]
+        self.case_insensitive = case_insensitive
+        flags = re.IGNORECASE if case_insensitive else 0
+        self._patterns = [_vocab_pattern(v, flags) for v in self.vocabs]
+
+        # goto / fail / output tables, node 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]  # (vocab_index, key_len)
+
+        for idx, vocab in enumerate(self.vocabs):
+            key = self._fold(vocab)
+            if not key:
+                continue
+            node = 0
+            for ch in key:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((idx, len(key)))
+
+        # Breadth-first fail links; outputs are merged along the fail chain
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _fold(self, text: str) -> str:
+        if not self.case_insensitive:
+            return text
+        return "".join(_fold_char(ch) for ch in text)
+
+    def __len__(self) -> int:
+        return len(self.vocabs)
+
+    def _candidates(self, text: str) -> Dict[int, List[int]]:
+        """vocab_index -> sorted start offsets of boundary-respecting hits."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Dict[int, List[int]] = {}
+        n = len(text)
+        node = 0
+        for i, ch in enumerate(self._fold(text)):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            for idx, length in out[node]:
+                a = i + 1 - length
+                if a > 0 and _is_word(text[a - 1]):
+                    continue
+                if i + 1 < n and _is_word(text[i + 1]):
+                    continue
+                found.setdefault(idx, []).append(a)
+        return found
+
+    def find(self, text: str) -> List[Tuple[int, List[Tuple[int, int]]]]:
+        """
+        Return [(vocab_index, [(start, end), ...]), ...] in priority order.
+
+        Expects whitespace-collapsed text (see normalize_text). Earlier vocabs
+        consume their spans; later vocabs keep only non-overlapping hits.
+        """
+        if not text:
+            return []
+
+        consumed = bytearray(len(text))
+        results: List[Tuple[int, List[Tuple[int, int]]]] = []
+
+        for idx, starts in sorted(self._candidates(text).items()):
+            pat = self._patterns[idx]
+            # finditer semantics: leftmost, non-overlapping among this vocab's own hits
+            hits = []
+            last_end = 0
+            for a in starts:
+                if a < last_end:
+                    continue
+                m = pat.match(text, a)
+                if m is None or m.end() <= a:
+                    continue
+                hits.append((a, m.end()))
+                last_end = m.end()
+
+            kept = [(a, b) for a, b in hits if consumed.find(1, a, b) == -1]
+            if not kept:
+                continue
+            for a, b in kept:
+                consumed[a:b] = b"\x01" * (b - a)
+            results.append((idx, kept))
+
+        return results
+
+def build_linker(vocab_df: Any, case_insensitive: bool = True) -> EntityLinker:
+    """Compile a linker from a Phase 7a VOCAB_DF (row order = priority order)."""
+    return EntityLinker(vocab_df["vocab"].tolist(), case_insensitive=case_insensitive)
+
+def link_entity_mentions(
+    chunks: Iterable[Dict[str, Any]],
+    vocab_df: Any,
+    linker: Optional[EntityLinker] = None,
+    exclude_source_types: Optional[set] = None,
+    max_snippet_chars: int = MAX_SNIPPET_CHARS,
+    case_insensitive: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Phase 7b in one pass per chunk. Returns the ENTITY_MENTIONS_V0 rows
+    (same columns, order and mention_id numbering as the notebook loop).
+    """
+    if linker is None:
+        linker = build_linker(vocab_df, case_insensitive=case_insensitive)
+    if exclude_source_types is None:
+        exclude_source_types = EXCLUDE_SOURCE_TYPES
+
+    vocabs = vocab_df["vocab"].tolist()
+    entity_ids = vocab_df["entity_id"].tolist()
+    canonicals = vocab_df["canonical"].tolist()
+    match_kinds = vocab_df["match_kind"].tolist()
+
+    rows: List[Dict[str, Any]] = []
+    mention_id = 1
+
+    for chunk in chunks:
+        source_type = chunk.get("source_type", "unknown")
+        if source_type in exclude_source_types:
+            continue
+
+        header_kind = chunk.get("header_kind")
+
+        # Drop pbp/session header line (metadata, not narrative)
+        content_start_line = chunk_content_start_line(chunk)
+        concat_text = chunk_content_text(chunk)
+        if not concat_text:
+            continue
+
+        if len(concat_text) > max_snippet_chars:
+            snippet = concat_text[: max_snippet_chars - 3] + "..."
+        else:
+            snippet = concat_text
+
+        for idx, kept in linker.find(concat_text):
+            rows.append(
+                {
+                    "mention_id": mention_id,
+                    "entity_id": entity_ids[idx],
+                    "canonical": canonicals[idx],
+                    "matched_vocab": vocabs[idx],
+                    "match_kind": match_kinds[idx],
+                    "match_count_in_chunk": len(kept),
+
+                    "chunk_id": chunk.get("chunk_id"),
+                    "source_id": chunk.get("source_id"),
+                    "source_type": source_type,
+                    "path": str(chunk.get("path")),
+                    "relpath": chunk.get("relpath", ""),
+                    "chunk_start_line": chunk.get("start_line") or 1,
+                    "chunk_end_line": chunk.get("end_line"),
+                    "header_kind": header_kind,
+
+                    "content_start_line": content_start_line,
+                    "snippet": snippet,
+                }
+            )
+            mention_id += 1
+
+    return rows
@@ -0,0 +1,231 @@
+# lib/evidence_graph.py
+from __future__ import annotations
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from lib.columnar import write_columnar
+
+EVIDENCE_FILENAMES = {
+    "nodes": "graph_evidence_nodes_v0.csv",
+    "edges": "graph_evidence_edges_v0.csv",
+}
+
+EdgeRow = Tuple[str, str, str, Any]  # (subject, predicate, object, weight or pd.NA)
+
+def build_evidence_nodes(
+    vocab_entities: pd.DataFrame,
+    chunk_to_entities: pd.DataFrame,
+    source_files: pd.DataFrame,
+    vocab_lookup: pd.DataFrame,
+) -> pd.DataFrame:
+    """Graph Indexing Phase N: DF_GRAPH_NODES (node_id, node_type, label)."""
+    nodes = [
+        # entities: node_type = entity_id prefix before the first "_"
+        vocab_entities.assign(
+            node_id=lambda d: d["entity_id"].astype(str),
+            node_type=lambda d: d["entity_id"].astype(str).str.split("_", n=1).str[0],
+            label=lambda d: d["canonical"].astype(str),
+        ).loc[:, ["node_id", "node_type", "label"]],
+        chunk_to_entities.assign(
+            node_id=lambda d: "chunk_" + d["chunk_id"].astype(int).astype(str),
+            node_type="chunk",
+            label=lambda d: "chunk_" + d["chunk_id"].astype(int).astype(str),
+        ).loc[:, ["node_id", "node_type", "label"]],
+        # files: node_type = source_type
+        source_files.assign(
+            node_id=lambda d: "file:" + d["relpath"].astype(str),
+            node_type=lambda d: d["source_type"].astype(str),
+            label=lambda d: d["relpath"].astype(str),
+        ).loc[:, ["node_id", "node_type", "label"]],
+        vocab_lookup.assign(
+            node_id=lambda d: "vocab:" + d["vocab_norm"].astype(str),
+            node_type="vocab",
+            label=lambda d: d["vocab"].astype(str),
+        ).loc[:, ["node_id", "node_type", "label"]],
+    ]
+    return (
+        pd.concat(nodes, ignore_index=True)
+          .drop_duplicates(subset=["node_id"])
+          .sort_values(["node_type", "node_id"])
+          .reset_index(drop=True)
+    )
+
+def _split_ids(value: Any) -> List[str]:
+    return sorted({e.strip() for e in str(value).split("|") if e.strip()})
+
+def chunk_edge_rows(chunk_id: Any, relpath: Any, matched_vocabs: Any, entity_ids: Any) -> List[EdgeRow]:
+    """
+    Raw Phase E rows contributed by one DF_CHUNK_TO_ENTITIES row.
+
+    Note: the notebook emits cooccurs_with votes in two separate loops, so each
+    shared chunk counts twice. Kept as-is so weights match published artifacts.
+    """
+    chunk_node = f"chunk_{int(chunk_id)}"
+    rows: List[EdgeRow] = [(f"file:{relpath}", "contains", chunk_node, pd.NA)]
+
+    for v in (x.strip() for x in str(matched_vocabs).split("|")):
+        if v:
+            rows.append((chunk_node, "mentions", f"vocab:{v.lower()}", pd.NA))
+
+    # first pass over the distinct ids, second over the (sorted) list as written
+    for ids in (_split_ids(entity_ids), sorted(e.strip() for e in str(entity_ids).split("|") if e.strip())):
+        for i in range(len(ids)):
+            for j in range(i + 1, len(ids)):
+                rows.append((ids[i], "cooccurs_with", ids[j], 1))
+    return rows
+
+def vocab_edge_rows(vocab_lookup: pd.DataFrame) -> List[EdgeRow]:
+    """Raw Phase E refers_to rows: vocab:<vocab_norm> -> vocab_id."""
+    return [
+        (f"vocab:{str(norm).strip()}", "refers_to", str(vid).strip(), pd.NA)
+        for norm, vid in zip(vocab_lookup["vocab_norm"], vocab_lookup["vocab_id"])
+    ]
+
+class EdgeCounts:
+    """
+    Multiset of raw Phase E rows that can be added to and subtracted from.
+    to_frame() reproduces the notebook's groupby(...).sum(min_count=1).
+    """
+
+    def __init__(self, rows: Optional[Iterable[EdgeRow]] = None):
+        self.multiplicity: Counter = Counter()
+        self.weights: Counter = Counter()   # summed non-NA weights
+        self.weighted: Counter = Counter()  # number of non-NA rows per key
+        if rows is not None:
+            self.add(rows)
+
+    def add(self, rows: Iterable[EdgeRow], sign: int = 1) -> None:
+        for s, p, o, w in rows:
+            key = (s, p, o)
+            self.multiplicity[key] += sign
+            if not pd.isna(w):
+                self.weights[key] += sign * w
+                self.weighted[key] += sign
+            if self.multiplicity[key] <= 0:
+                del self.multiplicity[key]
+                self.weights.pop(key, None)
+                self.weighted.pop(key, None)
+
+    def remove(self, rows: Iterable[EdgeRow]) -> None:
+        self.add(rows, sign=-1)
+
+    def __len__(self) -> int:
+        return len(self.multiplicity)
+
+    def to_frame(self) -> pd.DataFrame:
+        keys = list(self.multiplicity)
+        df = pd.DataFrame(keys, columns=["subject", "predicate", "object"])
+        df["weight"] = pd.array(
+            [float(self.weights[k]) if self.weighted.get(k, 0) > 0 else float("nan") for k in keys],
+            dtype="float64",
+        )
+        return df.sort_values(["predicate", "subject", "object"], ascending=[True, True, True]).reset_index(drop=True)
+
+def evidence_edge_counts(chunk_to_entities: pd.DataFrame, vocab_lookup: pd.DataFrame) -> EdgeCounts:
+    counts = EdgeCounts()
+    cols = chunk_to_entities.loc[:, ["chunk_id", "relpath", "matched_vocabs", "entity_ids"]]
+    for chunk_id, relpath, matched_vocabs, entity_ids in cols.itertuples(index=False, name=None):
+        counts.add(chunk_edge_rows(chunk_id, relpath, matched_vocabs, entity_ids))
+    counts.add(vocab_edge_rows(vocab_lookup))
+    return counts
+
+def _cooccurrence_edges(entity_ids: pd.Series) -> pd.DataFrame:
+    """
+    cooccurs_with weights from one sparse product over the chunk x entity
+    incidence matrix. Matches both notebook loops: the set-based pass plus
+    the list-based pass (which would also count duplicate ids within a chunk).
+    """
+    cols = ["subject", "predicate", "object", "weight"]
+    tokens = (
+        entity_ids.reset_index(drop=True).astype(str).str.split("|").explode().str.strip()
+        .rename_axis("row").reset_index(name="entity_id")
+    )
+    tokens = tokens[tokens["entity_id"].notna() & (tokens["entity_id"] != "")]
+    if tokens.empty:
+        return pd.DataFrame(columns=cols)
+
+    codes, uniques = pd.factorize(tokens["entity_id"], sort=True)
+    rows = pd.factorize(tokens["row"])[0]
+    shape = (int(rows.max()) + 1, len(uniques))
+
+    # multiplicity matrix (list semantics) and binary incidence (set semantics)
+    m = sparse.csr_matrix((np.ones(len(codes), dtype=np.int64), (rows, codes)), shape=shape)
+    m.sum_duplicates()
+    b = m.copy()
+    b.data[:] = 1
+
+    if m.data.max() == 1:
+        pairs = sparse.triu(2 * (b.T @ b), k=1).tocoo()
+    else:
+        mm = (m.T @ m).tocsr()
+        diag = mm.diagonal()
+        self_pairs = sparse.diags((diag - np.asarray(m.sum(axis=0)).ravel()) // 2, dtype=np.int64)
+        pairs = (sparse.triu(b.T @ b, k=1) + sparse.triu(mm, k=1) + self_pairs).tocoo()
+        pairs.eliminate_zeros()
+
+    uniques = np.asarray(uniques, dtype=object)
+    return pd.DataFrame(
+        {
+            "subject": uniques[pairs.row],
+            "predicate": "cooccurs_with",
+            "object": uniques[pairs.col],
+            "weight": pairs.data.astype("float64"),
+        },
+        columns=cols,
+    )
+
+def build_evidence_edges(chunk_to_entities: pd.DataFrame, vocab_lookup: pd.DataFrame) -> pd.DataFrame:
+    """
+    Graph Indexing Phase E: DF_GRAPH_EDGES (subject, predicate, object, weight).
+    Vectorized; output is identical to the notebook's iterrows + groupby build.
+    """
+    c2e = chunk_to_entities.reset_index(drop=True)
+    chunk_nodes = "chunk_" + c2e["chunk_id"].astype(int).astype(str)
+
+    contains = pd.DataFrame(
+        {"subject": "file:" + c2e["relpath"].astype(str), "predicate": "contains", "object": chunk_nodes}
+    )
+
+    vocabs = c2e["matched_vocabs"].astype(str).str.split("|").explode().str.strip()
+    keep = (vocabs.notna() & (vocabs != "")).to_numpy()
+    mentions = pd.DataFrame(
+        {"subject": chunk_nodes.loc[vocabs.index].to_numpy(), "predicate": "mentions", "object": ("vocab:" + vocabs.str.lower()).to_numpy()}
+    )[keep]
+
+    refers_to = pd.DataFrame(
+        {
+            "subject": "vocab:" + vocab_lookup["vocab_norm"].astype(str).str.strip(),
+            "predicate": "refers_to",
+            "object": vocab_lookup["vocab_id"].astype(str).str.strip(),
+        }
+    )
+
+    # unweighted predicates: one row per distinct triple, weight NaN
+    unweighted = (
+        pd.concat([contains, mentions, refers_to], ignore_index=True)
+          .drop_duplicates(subset=["subject", "predicate", "object"])
+          .assign(weight=np.nan)
+    )
+
+    return (
+        pd.concat([unweighted, _cooccurrence_edges(c2e["entity_ids"])], ignore_index=True)
+          .astype({"weight": "float64"})
+          .sort_values(["predicate", "subject", "object"], ascending=[True, True, True])
+          .reset_index(drop=True)
+    )
+
+def write_evidence_artifacts(out_dir: Path, nodes: pd.DataFrame, edges: pd.DataFrame, columnar: bool = False) -> List[Path]:
+    """Phase W1: write graph_evidence_nodes_v0.csv / graph_evidence_edges_v0.csv (plus Parquet twins with columnar)."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = [out_dir / EVIDENCE_FILENAMES["nodes"], out_dir / EVIDENCE_FILENAMES["edges"]]
+    nodes.to_csv(paths[0], index=False, encoding="utf-8")
+    edges.to_csv(paths[1], index=False, encoding="utf-8")
+    if columnar:
+        paths += [write_columnar(nodes, paths[0]), write_columnar(edges, paths[1])]
+    return paths
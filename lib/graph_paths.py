@@ -0,0 +1,237 @@
+# lib/graph_paths.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import heapq
+import itertools
+import math
+
+import networkx as nx
+import pandas as pd
+
+# Q4 defaults (kept in sync with IWTC_Graph_Query.ipynb)
+Q4_DEFAULT_COST = 4.0
+
+# path penalties: kinship hops in multi-hop paths, "former" hops in 3+ hop paths
+KINSHIP_PREDICATES = {"sibling_with", "parent_of", "child_of", "married_with"}
+FORMER_PREDICATES = {"former_member_of", "had_member", "former_holder_of", "formerly_held_by"}
+KINSHIP_PENALTY = 3.0
+FORMER_PENALTY = 2.0
+
+# Phase P3 column mappings (kept in sync with IWTC_Graph_Query.ipynb)
+PREDICATE_COLS = {
+    "predicate": ["predicate"],
+    "reverse_predicate": ["reverse_predicate", "reverse"],
+    "include": ["include"],
+    "relationship_class": ["relationship_class", "class"],
+    "priority": ["priority", "weight", "score"],
+    "cost": ["cost"],
+}
+
+Hop = Dict[str, Any]
+
+def _min_cost(edges: List[Tuple[str, Any]], default: float) -> float:
+    return min([c for _, c in edges if pd.notna(c)], default=default)
+
+def path_penalty(edge_count: int, predicates_used: Iterable[str]) -> float:
+    """Q4 path penalty for a path of edge_count hops."""
+    preds = set(predicates_used)
+    penalty = 0.0
+    if edge_count > 1 and preds & KINSHIP_PREDICATES:
+        penalty += KINSHIP_PENALTY
+    if edge_count > 2 and preds & FORMER_PREDICATES:
+        penalty += FORMER_PENALTY
+    return penalty
+
+class SemanticPathFinder:
+    """
+    Cheapest-first path explanations between two semantic graph nodes (Q4).
+
+    Every traversable (a, b) step is resolved once into a hop record
+    (display predicate, predicate_used, cost) and cached per mode; the
+    undirected mode is the bidirectional view, each arc costed from its own
+    direction. Queries run a best-first k-shortest simple path search bounded
+    by max_length, so only paths that can still reach the top k are expanded.
+    """
+
+    def __init__(
+        self,
+        graph: nx.MultiDiGraph,
+        predicate_cost: Optional[Dict[str, Any]] = None,
+        predicate_reverse: Optional[Dict[str, str]] = None,
+        default_cost: float = Q4_DEFAULT_COST,
+    ):
+        self.graph = graph
+        self.predicate_cost = predicate_cost or {}
+        self.predicate_reverse = predicate_reverse or {}
+        self.default_cost = default_cost
+        self._views: Dict[str, Dict[str, Dict[str, Hop]]] = {}
+
+    def _bundle(self, a: str, b: str, reverse: bool) -> List[Tuple[str, Any]]:
+        data = (self.graph.get_edge_data(b, a) if reverse else self.graph.get_edge_data(a, b)) or {}
+        out = set()
+        for d in data.values():
+            pred = d.get("predicate", "<missing>")
+            name = self.predicate_reverse.get(pred, f"<reverse:{pred}>") if reverse else pred
+            out.add((name, self.predicate_cost.get(pred, self.default_cost)))
+        return sorted(out)
+
+    def hop(self, a: str, b: str) -> Hop:
+        """One step a -> b, explained as Q4 does: forward edges win, else reversed ones."""
+        edges = self._bundle(a, b, reverse=False) or self._bundle(a, b, reverse=True)
+        if not edges:
+            return {"a": a, "b": b, "display": "<no predicate found>", "predicate_used": "<missing>", "cost": self.default_cost}
+        return {
+            "a": a,
+            "b": b,
+            "display": " | ".join(p for p, _ in edges),
+            "predicate_used": edges[0][0],
+            "cost": _min_cost(edges, self.default_cost),
+        }
+
+    def view(self, mode: str = "undirected") -> Dict[str, Dict[str, Hop]]:
+        """Cached adjacency {a: {b: hop}} for the given traversal mode."""
+        if mode not in ("directed", "undirected"):
+            raise ValueError(f"mode must be 'directed' or 'undirected'. Received: {mode}")
+        if mode not in self._views:
+            pairs = {(a, b) for a, b in self.graph.edges() if a != b}
+            if mode == "undirected":
+                pairs |= {(b, a) for a, b in pairs}
+
+            succ: Dict[str, Dict[str, Hop]] = {n: {} for n in self.graph.nodes}
+            for a, b in sorted(pairs):
+                h = self.hop(a, b)
+                if h["cost"] < 0:
+                    raise ValueError(f"Negative predicate cost on {a} -> {b}: {h['cost']}")
+                succ[a][b] = h
+            self._views[mode] = succ
+        return self._views[mode]
+
+    def invalidate(self) -> None:
+        """Drop cached views (call after mutating the graph or cost tables)."""
+        self._views.clear()
+
+    def _score(self, succ: Dict[str, Dict[str, Hop]], path: List[str]) -> Dict[str, Any]:
+        hops = [succ[a][b] for a, b in zip(path, path[1:])]
+        edge_count = len(hops)
+        cost = 0.0
+        for h in hops:
+            cost += h["cost"]
+        preds = [h["predicate_used"] for h in hops]
+        penalty = path_penalty(edge_count, preds)
+        total = cost + penalty
+        return {
+            "path": path,
+            "edge_count": edge_count,
+            "cost": cost,
+            "penalty": penalty,
+            "total_cost": total,
+            "display_rows": [f"  - {h['a']} --{h['display']}--> {h['b']}" for h in hops],
+            "predicates_used": preds,
+            "hops": hops,
+            "sort_key": (0 if edge_count == 1 else 1, total, edge_count, tuple(path)),
+        }
+
+    @staticmethod
+    def _cost_to_end(succ: Dict[str, Dict[str, Hop]], end: str, max_length: int) -> List[Dict[str, float]]:
+        """dist[k][v]: cheapest v -> end walk with at most k hops (lower bound for simple paths)."""
+        dist = [{end: 0.0}]
+        for _ in range(max_length):
+            prev = dist[-1]
+            cur = dict(prev)
+            for a, nbrs in succ.items():
+                for b, h in nbrs.items():
+                    if b in prev:
+                        c = h["cost"] + prev[b]
+                        if c < cur.get(a, math.inf):
+                            cur[a] = c
+            dist.append(cur)
+        return dist
+
+    def iter_paths(self, start: str, end: str, max_length: int = 5, mode: str = "undirected") -> Iterator[Tuple[float, List[str]]]:
+        """Simple paths of at most max_length hops as (hop cost, path), cheapest first."""
+        succ = self.view(mode)
+        if start not in succ or end not in succ or start == end or max_length < 1:
+            return
+        dist = self._cost_to_end(succ, end, max_length)
+        if start not in dist[max_length]:
+            return
+
+        tie = itertools.count()
+        heap = [(dist[max_length][start], next(tie), 0.0, (start,))]
+        while heap:
+            _, _, g, path = heapq.heappop(heap)
+            node = path[-1]
+            if node == end:
+                yield g, list(path)
+                continue
+            remaining = dist[max_length - len(path)]
+            for b, h in succ[node].items():
+                if b in remaining and b not in path:
+                    gb = g + h["cost"]
+                    heapq.heappush(heap, (gb + remaining[b], next(tie), gb, path + (b,)))
+
+    def paths(
+        self,
+        start: str,
+        end: str,
+        max_paths: int = 10,
+        max_length: int = 5,
+        mode: str = "undirected",
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        The max_paths best paths (same ranking as Q4: direct edge first, then
+        total cost incl. penalty, edge count, path) and whether more exist.
+
+        Paths arrive in order of hop cost; since penalties are non-negative,
+        search stops once the next path's hop cost exceeds the k-th total.
+        """
+        succ = self.view(mode)
+        found: List[Dict[str, Any]] = []
+        if max_paths <= 0:
+            return found, False
+
+        # a direct edge always ranks first, however expensive
+        if start != end and end in succ.get(start, {}):
+            found.append(self._score(succ, [start, end]))
+
+        for base, path in self.iter_paths(start, end, max_length, mode):
+            if len(path) == 2:
+                continue
+            if len(found) >= max_paths:
+                kth = found[max_paths - 1]
+                if kth["edge_count"] == 1 or base > kth["total_cost"]:
+                    return found[:max_paths], True
+            found.append(self._score(succ, path))
+            found.sort(key=lambda d: d["sort_key"])
+
+        return found[:max_paths], len(found) > max_paths
+
+def format_paths(scored: List[Dict[str, Any]]) -> List[str]:
+    """Q4 printout lines for scored paths."""
+    lines = []
+    for i, p in enumerate(scored, start=1):
+        lines.append(
+            f"Path {i} ({p['edge_count']} edges, cost={p['cost']:.1f}, "
+            f"penalty={p['penalty']:.1f}, total={p['total_cost']:.1f}):"
+        )
+        lines.extend(p["display_rows"])
+        lines.append("")
+    return lines
+
+def load_predicate_vocab(path: Optional[Path]) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """Phase P3: (PREDICATE_REVERSE, PREDICATE_COST) from the optional predicates CSV; empty when absent."""
+    if not path or not Path(path).exists():
+        return {}, {}
+    raw = pd.read_csv(path, dtype=str).fillna("")
+    rename = {}
+    for semantic, options in PREDICATE_COLS.items():
+        found = next((c for c in options if c in raw.columns), None)
+        if found:
+            rename[found] = semantic
+    df = raw.rename(columns=rename)
+    if df.empty or "predicate" not in df.columns:
+        return {}, {}
+    reverse = dict(zip(df["predicate"], df["reverse_predicate"])) if "reverse_predicate" in df.columns else {}
+    cost = dict(zip(df["predicate"], pd.to_numeric(df["cost"], errors="coerce"))) if "cost" in df.columns else {}
+    return reverse, cost
@@ -0,0 +1,424 @@
+# lib/graph_store.py
+from __future__ import annotations
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from lib.columnar import read_artifact
+
+SNAPSHOT_MAGIC = b"IWTCGRF1"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot"
+_ALIGN = 64
+
+# edge columns per graph layer (Graph Query Phase G1 grammar)
+EVIDENCE_EDGE_ENDPOINTS = ("subject", "object")
+SEMANTIC_EDGE_ENDPOINTS = ("subject_id", "object_id")
+SEMANTIC_EDGE_ATTRS = ["subject_type", "object_type", "pair_type", "symmetric", "relationship_class"]
+
+def _as_str(values: pd.Series) -> List[str]:
+    """str() per value, as Phase G1 does (NaN -> "nan")."""
+    return [str(x) for x in values.tolist()]
+
+def _pack_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _csr(keys: np.ndarray, first: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """indptr + edge order grouped by key, neighbours in first-seen order (as networkx iterates)."""
+    order = np.lexsort((np.arange(len(keys)), first, keys)).astype(np.int64)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n), out=indptr[1:])
+    return indptr, order
+
+def save_arrays(path: Path, magic: bytes, arrays: Dict[str, np.ndarray], header: Dict[str, Any]) -> Path:
+    """Atomically write magic, a JSON header (plus array layout) and 64-byte aligned raw arrays."""
+    path = Path(path)
+    layout: Dict[str, Any] = {}
+    offset = 0
+    for name, arr in arrays.items():
+        offset = -(-offset // _ALIGN) * _ALIGN
+        layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += arr.nbytes
+    head = json.dumps({**header, "arrays": layout}, ensure_ascii=False).encode("utf-8")
+    data_start = -(-(len(magic) + 8 + len(head)) // _ALIGN) * _ALIGN
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(magic)
+        f.write(len(head).to_bytes(8, "little"))
+        f.write(head)
+        for name, arr in arrays.items():
+            f.write(b"\0" * (data_start + layout[name]["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(arr).tobytes())
+    os.replace(tmp, path)
+    return path
+
+def open_arrays(path: Path, magic: bytes, kind: str = "array file") -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Memory-map a file written by save_arrays(): (read-only array views, header)."""
+    path = Path(path)
+    with open(path, "rb") as f:
+        if f.read(len(magic)) != magic:
+            raise ValueError(f"Not a {kind}: {path}")
+        header_len = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+
+    data_start = -(-(len(magic) + 8 + header_len) // _ALIGN) * _ALIGN
+    raw = np.memmap(path, dtype=np.uint8, mode="r") if path.stat().st_size else np.zeros(0, dtype=np.uint8)
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        start = data_start + spec["offset"]
+        arrays[name] = raw[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+    return arrays, header
+
+class _StringPool:
+    """Read-only list of str over a utf-8 blob + offsets (works on memmaps)."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+class _NodeView:
+    """Subset of networkx's G.nodes: iteration, G.nodes[n], G.nodes(data=True)."""
+
+    def __init__(self, store: "GraphStore"):
+        self._store = store
+
+    def __len__(self) -> int:
+        return self._store.number_of_nodes()
+
+    def __iter__(self) -> Iterator[str]:
+        ids = self._store._ids
+        return (ids[i] for i in range(len(ids)))
+
+    def __contains__(self, node: Any) -> bool:
+        return node in self._store
+
+    def __getitem__(self, node: str) -> Dict[str, Any]:
+        return self._store.node_data(node)
+
+    def __call__(self, data: bool = False):
+        if not data:
+            return iter(self)
+        return ((n, self._store._node_data(i)) for i, n in enumerate(self))
+
+class GraphStore:
+    """
+    Array-backed directed multigraph for the graph_*_vN.csv layers.
+
+    Node ids, node types, labels, predicates and categorical edge attributes
+    are interned; edges are parallel int32/float64 arrays with CSR forward and
+    reverse adjacency. Iteration primitives (out_edges / in_edges / nodes /
+    get_edge_data) mirror the MultiDiGraph calls used by the Q1-Q4 recipes,
+    including networkx's neighbour order and edge keys.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], tables: Dict[str, List[Any]], meta: Optional[Dict[str, Any]] = None):
+        self.arrays = arrays
+        self.tables = tables
+        self.meta = meta or {}
+        self._ids = _StringPool(arrays["node_id_blob"], arrays["node_id_offsets"])
+        self._labels = _StringPool(arrays["label_blob"], arrays["label_offsets"])
+        self.edge_attrs = [k[len("attr_"):] for k in tables if k.startswith("attr_")]
+        self.nodes = _NodeView(self)
+
+    # ------------------------------------------------------------------
+    # Build
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_frames(
+        cls,
+        nodes: pd.DataFrame,
+        edges: pd.DataFrame,
+        endpoints: Tuple[str, str] = EVIDENCE_EDGE_ENDPOINTS,
+        edge_attrs: Optional[List[str]] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> "GraphStore":
+        """
+        Build from node / edge tables the way Phase G1 does: ids, types and
+        labels as str; nodes first seen on an edge are added without attributes.
+        """
+        subj_col, obj_col = endpoints
+        edge_attrs = list(edge_attrs or [])
+
+        # nodes: table order (last row wins on duplicates), then implicit edge endpoints
+        node_ids = _as_str(nodes["node_id"])
+        index: Dict[str, int] = {}
+        for n in node_ids:
+            index.setdefault(n, len(index))
+        node_type = np.full(len(index), -1, dtype=np.int32)
+        labels = [""] * len(index)
+        type_codes, type_table = pd.factorize(pd.Series(_as_str(nodes["node_type"]), dtype=object))
+        for n, t, lab in zip(node_ids, type_codes, _as_str(nodes["label"])):
+            node_type[index[n]] = t
+            labels[index[n]] = lab
+
+        subj = _as_str(edges[subj_col])
+        obj = _as_str(edges[obj_col])
+        src = np.empty(len(subj), dtype=np.int32)
+        dst = np.empty(len(obj), dtype=np.int32)
+        for i, (u, v) in enumerate(zip(subj, obj)):
+            src[i] = index.setdefault(u, len(index))
+            dst[i] = index.setdefault(v, len(index))
+        n = len(index)
+        node_type = np.concatenate([node_type, np.full(n - len(node_type), -1, dtype=np.int32)])
+        labels += [""] * (n - len(labels))
+
+        pred_codes, pred_table = pd.factorize(pd.Series(_as_str(edges["predicate"]), dtype=object))
+        weight = (
+            pd.to_numeric(edges["weight"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            if "weight" in edges.columns
+            else np.full(len(edges), np.nan)
+        )
+
+        # networkx per-(u, v) edge keys, and first-seen rank of each neighbour
+        pair = pd.DataFrame({"src": src, "dst": dst})
+        key = pair.groupby(["src", "dst"], sort=False).cumcount().to_numpy(dtype=np.int32)
+        first = pair.reset_index().groupby(["src", "dst"], sort=False)["index"].transform("min").to_numpy()
+        out_indptr, out_order = _csr(src, first, n)
+        in_indptr, in_order = _csr(dst, first, n)
+
+        id_blob, id_offsets = _pack_strings(list(index))
+        label_blob, label_offsets = _pack_strings(labels)
+        arrays = {
+            "node_id_blob": id_blob,
+            "node_id_offsets": id_offsets,
+            "node_id_sorted": np.asarray(sorted(range(n), key=list(index).__getitem__), dtype=np.int32),
+            "label_blob": label_blob,
+            "label_offsets": label_offsets,
+            "node_type": node_type,
+            "src": src,
+            "dst": dst,
+            "predicate": pred_codes.astype(np.int32),
+            "weight": weight,
+            "key": key,
+            "out_indptr": out_indptr,
+            "out_order": out_order,
+            "in_indptr": in_indptr,
+            "in_order": in_order,
+        }
+        tables: Dict[str, List[Any]] = {
+            "node_type": [str(x) for x in type_table],
+            "predicate": [str(x) for x in pred_table],
+        }
+        for col in edge_attrs:
+            values = [bool(x) for x in edges[col].tolist()] if col == "symmetric" else _as_str(edges[col])
+            codes, table = pd.factorize(pd.Series(values, dtype=object))
+            arrays[f"attr_{col}"] = codes.astype(np.int32)
+            tables[f"attr_{col}"] = [x.item() if hasattr(x, "item") else x for x in table]
+        return cls(arrays, tables, meta)
+
+    @classmethod
+    def from_evidence_frames(cls, nodes: pd.DataFrame, edges: pd.DataFrame, meta: Optional[Dict[str, Any]] = None) -> "GraphStore":
+        return cls.from_frames(nodes, edges, EVIDENCE_EDGE_ENDPOINTS, meta=meta)
+
+    @classmethod
+    def from_semantic_frames(cls, nodes: pd.DataFrame, edges: pd.DataFrame, meta: Optional[Dict[str, Any]] = None) -> "GraphStore":
+        return cls.from_frames(nodes, edges, SEMANTIC_EDGE_ENDPOINTS, SEMANTIC_EDGE_ATTRS, meta=meta)
+
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+    def save(self, path: Path) -> Path:
+        """Write a single-file snapshot: magic, JSON header, 64-byte aligned raw arrays."""
+        return save_arrays(path, SNAPSHOT_MAGIC, self.arrays, {"version": SNAPSHOT_VERSION, "tables": self.tables, "meta": self.meta})
+
+    @classmethod
+    def open(cls, path: Path) -> "GraphStore":
+        """Memory-map a snapshot written by save(); arrays are read-only views on the file."""
+        arrays, header = open_arrays(path, SNAPSHOT_MAGIC, "graph snapshot")
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported graph snapshot version {header.get('version')}: {path}")
+        return cls(arrays, header["tables"], header.get("meta"))
+
+    # ------------------------------------------------------------------
+    # Nodes
+    # ------------------------------------------------------------------
+    def number_of_nodes(self) -> int:
+        return len(self._ids)
+
+    def number_of_edges(self) -> int:
+        return len(self.arrays["src"])
+
+    def __len__(self) -> int:
+        return self.number_of_nodes()
+
+    def __contains__(self, node: Any) -> bool:
+        return self.index(node) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.nodes)
+
+    def index(self, node: Any) -> Optional[int]:
+        """Interned index of a node id (binary search over the sorted id permutation), or None."""
+        if not isinstance(node, str):
+            return None
+        order = self.arrays["node_id_sorted"]
+        ids = self._ids
+        pos = bisect_left(range(len(order)), node, key=lambda j: ids[int(order[j])])
+        if pos < len(order) and ids[int(order[pos])] == node:
+            return int(order[pos])
+        return None
+
+    def node_id(self, i: int) -> str:
+        return self._ids[i]
+
+    def _require(self, node: Any) -> int:
+        i = self.index(node)
+        if i is None:
+            raise KeyError(node)
+        return i
+
+    def _node_data(self, i: int) -> Dict[str, Any]:
+        t = int(self.arrays["node_type"][i])
+        if t < 0:
+            return {}
+        return {"node_type": self.tables["node_type"][t], "label": self._labels[i]}
+
+    def node_data(self, node: str) -> Dict[str, Any]:
+        return self._node_data(self._require(node))
+
+    # ------------------------------------------------------------------
+    # Edges
+    # ------------------------------------------------------------------
+    def predicate_id(self, predicate: str) -> Optional[int]:
+        try:
+            return self.tables["predicate"].index(predicate)
+        except ValueError:
+            return None
+
+    def edge_data(self, e: int) -> Dict[str, Any]:
+        d: Dict[str, Any] = {"predicate": self.tables["predicate"][int(self.arrays["predicate"][e])]}
+        if self.edge_attrs:
+            for col in self.edge_attrs:
+                d[col] = self.tables[f"attr_{col}"][int(self.arrays[f"attr_{col}"][e])]
+        else:
+            d["weight"] = float(self.arrays["weight"][e])
+        return d
+
+    def _edge_tuple(self, e: int, keys: bool, data: bool) -> tuple:
+        out: tuple = (self._ids[int(self.arrays["src"][e])], self._ids[int(self.arrays["dst"][e])])
+        if keys:
+            out += (int(self.arrays["key"][e]),)
+        if data:
+            out += (self.edge_data(e),)
+        return out
+
+    def out_edge_ids(self, node: str) -> np.ndarray:
+        i = self._require(node)
+        p = self.arrays["out_indptr"]
+        return self.arrays["out_order"][p[i]:p[i + 1]]
+
+    def in_edge_ids(self, node: str) -> np.ndarray:
+        i = self._require(node)
+        p = self.arrays["in_indptr"]
+        return self.arrays["in_order"][p[i]:p[i + 1]]
+
+    def out_edges(self, node: str, data: bool = False, keys: bool = False) -> Iterator[tuple]:
+        """(node, v[, key][, data]) per outgoing edge, like MultiDiGraph.out_edges(node)."""
+        return (self._edge_tuple(int(e), keys, data) for e in self.out_edge_ids(node))
+
+    def in_edges(self, node: str, data: bool = False, keys: bool = False) -> Iterator[tuple]:
+        """(u, node[, key][, data]) per incoming edge, like MultiDiGraph.in_edges(node)."""
+        return (self._edge_tuple(int(e), keys, data) for e in self.in_edge_ids(node))
+
+    def edges(self, data: bool = False, keys: bool = False) -> Iterator[tuple]:
+        order = self.arrays["out_order"]
+        return (self._edge_tuple(int(e), keys, data) for e in order)
+
+    def successors(self, node: str) -> List[str]:
+        return list(dict.fromkeys(v for _, v in self.out_edges(node)))
+
+    def predecessors(self, node: str) -> List[str]:
+        return list(dict.fromkeys(u for u, _ in self.in_edges(node)))
+
+    def get_edge_data(self, u: str, v: str) -> Optional[Dict[int, Dict[str, Any]]]:
+        """{key: data} for u -> v edges, or None (MultiDiGraph.get_edge_data)."""
+        if u not in self or v not in self:
+            return None
+        j = self.index(v)
+        dst = self.arrays["dst"]
+        out = {int(self.arrays["key"][e]): self.edge_data(int(e)) for e in self.out_edge_ids(u) if dst[e] == j}
+        return out or None
+
+    def edge_frame(self) -> pd.DataFrame:
+        """Integer edge table (src, dst, predicate codes, weight) in CSV row order."""
+        return pd.DataFrame(
+            {
+                "src": np.asarray(self.arrays["src"]),
+                "dst": np.asarray(self.arrays["dst"]),
+                "predicate": np.asarray(self.arrays["predicate"]),
+                "weight": np.asarray(self.arrays["weight"]),
+            }
+        )
+
+    def to_networkx(self):
+        """Equivalent networkx.MultiDiGraph (for recipes not yet ported)."""
+        import networkx as nx
+
+        G = nx.MultiDiGraph()
+        G.add_nodes_from(self.nodes(data=True))
+        src, dst = self.arrays["src"], self.arrays["dst"]
+        for e in range(self.number_of_edges()):
+            G.add_edge(self._ids[int(src[e])], self._ids[int(dst[e])], **self.edge_data(e))
+        return G
+
+def snapshot_path(nodes_csv: Path) -> Path:
+    """graph_<layer>_nodes_vN.csv -> graph_<layer>_vN.snapshot (same directory)."""
+    nodes_csv = Path(nodes_csv)
+    return nodes_csv.with_name(nodes_csv.stem.replace("_nodes_", "_") + SNAPSHOT_SUFFIX)
+
+def _csv_stamp(paths: List[Path]) -> List[Dict[str, Any]]:
+    out = []
+    for p in paths:
+        st = p.stat()
+        out.append({"name": p.name, "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+    return out
+
+def load_graph(nodes_csv: Path, edges_csv: Path, layer: str = "evidence", rebuild: bool = False) -> GraphStore:
+    """
+    Open the snapshot next to the CSVs when it matches their size/mtime;
+    otherwise parse the CSVs, build the store and (re)write the snapshot.
+    """
+    if layer not in ("evidence", "semantic"):
+        raise ValueError(f"layer must be 'evidence' or 'semantic'. Received: {layer}")
+    nodes_csv, edges_csv = Path(nodes_csv), Path(edges_csv)
+    for p in (nodes_csv, edges_csv):
+        if not p.exists():
+            raise FileNotFoundError(f"Missing graph artifact: {p}")
+
+    snap = snapshot_path(nodes_csv)
+    stamp = _csv_stamp([nodes_csv, edges_csv])
+    if snap.exists() and not rebuild:
+        try:
+            store = GraphStore.open(snap)
+            if store.meta.get("sources") == stamp and store.meta.get("layer") == layer:
+                return store
+        except ValueError:
+            pass
+
+    nodes = read_artifact(nodes_csv)
+    edges = read_artifact(edges_csv)
+    meta = {"layer": layer, "sources": stamp}
+    if layer == "evidence":
+        store = GraphStore.from_evidence_frames(nodes, edges, meta)
+    else:
+        store = GraphStore.from_semantic_frames(nodes, edges, meta)
+    store.save(snap)
+    return GraphStore.open(snap)
@@ -0,0 +1,199 @@
+# lib/index_builder.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import re
+
+import numpy as np
+import pandas as pd
+
+from lib.columnar import write_columnar
+
+# Phase 7c defaults (kept in sync with IWTC_Raw_Source_Indexing.ipynb)
+EXCLUDE_SOURCE_TYPES = {"auto_transcripts"}
+
+# Discord-style PbP header (as chunked in Phase 5): "* ### **Author** **timestamp**"
+PBP_HASH_HEADER_REGEX = re.compile(
+    r"^\s*(?:\d+\.\s*)?(?:[*-]\s*)?###\s+\*\*(?P<author>[^*]+?)\*\*\s+\*\*(?P<ts>[^*]+?)\*\*\s*$"
+)
+
+INDEX_FILENAMES = {
+    "entity_to_chunks": "index_entity_to_chunks_v0.csv",
+    "chunk_to_entities": "index_chunk_to_entities_v0.csv",
+    "player_to_chunks": "index_player_to_chunks_v0.csv",
+    "source_files": "index_source_files_v0.csv",
+}
+
+CHUNK_TO_ENTITIES_KEYS = ["chunk_id", "source_id", "source_type", "relpath", "chunk_start_line", "chunk_end_line"]
+
+def link_author_mentions(
+    chunks: Iterable[Dict[str, Any]],
+    entities_df: pd.DataFrame,
+    author_to_player: Optional[Dict[str, str]] = None,
+    exclude_source_types: Optional[set] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Phase 7c: one AUTHOR_MENTIONS_V0 row per pbp_hash chunk header.
+
+    author_to_player comes from vocabulary.author_aliases (load_author_aliases).
+    Notebook runs from before Phase 7a loaded author_aliases_df never mapped
+    authors: their index_player_to_chunks_v0 has a single row with an empty
+    player_entity_id, where this (and the current notebook) has one per player.
+    """
+    if exclude_source_types is None:
+        exclude_source_types = EXCLUDE_SOURCE_TYPES
+    author_to_player = author_to_player or {}
+    player_canon_by_id = dict(zip(entities_df["entity_id"], entities_df["canonical"]))
+
+    rows: List[Dict[str, Any]] = []
+    mention_id = 1
+
+    for chunk in chunks:
+        source_type = chunk.get("source_type", "unknown")
+        if source_type in exclude_source_types:
+            continue
+        if chunk.get("header_kind") != "pbp_hash":
+            continue
+
+        lines = chunk.get("lines") or []
+        if not lines:
+            continue
+        header_line = str(lines[0]).strip()
+        if not header_line:
+            continue
+
+        m = PBP_HASH_HEADER_REGEX.match(header_line)
+        if not m:
+            continue
+
+        author = " ".join(m.group("author").split())
+        player_entity_id = author_to_player.get(author, "")
+        canonical = player_canon_by_id.get(player_entity_id, "") if player_entity_id else ""
+
+        rows.append(
+            {
+                "mention_id": mention_id,
+                "player_entity_id": player_entity_id,
+                "canonical": canonical,
+                "matched_vocab": author,
+                "match_kind": "author_header" if player_entity_id else "author_header_unmapped",
+                "match_count_in_chunk": 1,
+                "chunk_id": chunk.get("chunk_id"),
+                "source_id": chunk.get("source_id"),
+                "source_type": source_type,
+                "path": str(chunk.get("path", "")),
+                "relpath": str(chunk.get("relpath", "")),
+                "chunk_start_line": chunk.get("start_line") or 1,
+                "chunk_end_line": chunk.get("end_line"),
+                "header_kind": chunk.get("header_kind"),
+                "snippet": header_line,
+            }
+        )
+        mention_id += 1
+
+    return rows
+
+# ------------------------------------------------------------------
+# Phase 8 group rollups
+#
+# Same output as the notebook's groupby().agg() lambdas (_uniq_sorted joins,
+# distinct counts) but computed on integer codes instead of once per group.
+# ------------------------------------------------------------------
+def _group_codes(df: pd.DataFrame, keys: List[str]) -> Tuple[np.ndarray, pd.DataFrame]:
+    """Group number per row (groupby's sorted key order, NaN keys kept) and one key row per group."""
+    codes = df.groupby(keys, dropna=False, sort=True).ngroup().to_numpy(dtype=np.int64)
+    first = np.unique(codes, return_index=True)[1]
+    return codes, df[keys].iloc[first].reset_index(drop=True)
+
+def _joined_uniques(codes: np.ndarray, n_groups: int, values: pd.Series) -> Tuple[List[str], np.ndarray]:
+    """
+    Per group: the distinct non-blank str(values), sorted and "|"-joined,
+    and how many there are.
+    Values are factorized once in sorted str order, so deduping and ordering
+    are integer operations on (group, value code) pairs.
+    """
+    keep = values.notna().to_numpy()
+    as_str = values[keep].astype(str)
+    nonblank = (as_str != "").to_numpy()
+    value_codes, uniques = pd.factorize(as_str[nonblank], sort=True)
+    if not len(uniques):
+        return [""] * n_groups, np.zeros(n_groups, dtype=np.int64)
+    pairs = np.unique(codes[keep][nonblank] * len(uniques) + value_codes)
+    groups, vals = np.divmod(pairs, len(uniques))
+    counts = np.bincount(groups, minlength=n_groups).astype(np.int64)
+    ends = np.cumsum(counts)
+    strs = np.asarray(uniques, dtype=object)[vals].tolist()
+    return ["|".join(strs[e - c:e]) for c, e in zip(counts.tolist(), ends.tolist())], counts
+
+def _distinct_count(codes: np.ndarray, n_groups: int, values: pd.Series) -> np.ndarray:
+    """Per group: number of distinct raw values (missing counts as one value)."""
+    value_codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    pairs = np.unique(codes * max(len(uniques), 1) + value_codes)
+    return np.bincount(pairs // max(len(uniques), 1), minlength=n_groups).astype(np.int64)
+
+def build_source_files(chunks_df: pd.DataFrame) -> pd.DataFrame:
+    """SOURCE_FILES_DF: distinct (source_id, relpath, source_type) in chunk order."""
+    return chunks_df[["source_id", "relpath", "source_type"]].drop_duplicates().reset_index(drop=True)
+
+def group_to_chunks(mentions_df: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Per-key chunk/file rollup behind the *_to_chunks tables (unsorted)."""
+    codes, out = _group_codes(mentions_df, [key, "canonical"])
+    n = len(out)
+    out["chunk_ids"] = _joined_uniques(codes, n, mentions_df["chunk_id"])[0]
+    out["chunk_count"] = _distinct_count(codes, n, mentions_df["chunk_id"])
+    out["file_relpaths"], out["file_count"] = _joined_uniques(codes, n, mentions_df["relpath"])
+    return out
+
+def sort_to_chunks(df: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Final ordering of the *_to_chunks tables (Phase 8a / 8c)."""
+    return df.sort_values(["chunk_count", "file_count", key], ascending=[False, False, True]).reset_index(drop=True)
+
+def build_entity_to_chunks(mentions_df: pd.DataFrame) -> pd.DataFrame:
+    """Phase 8a: INDEX_ENTITY_TO_CHUNKS_V0."""
+    return sort_to_chunks(group_to_chunks(mentions_df, "entity_id"), "entity_id")
+
+def build_player_to_chunks(author_mentions_df: pd.DataFrame) -> pd.DataFrame:
+    """Phase 8c: INDEX_PLAYER_TO_CHUNKS_V0 (empty frame when there are no author mentions)."""
+    if author_mentions_df is None or author_mentions_df.empty:
+        return pd.DataFrame()
+    return sort_to_chunks(group_to_chunks(author_mentions_df, "player_entity_id"), "player_entity_id")
+
+def build_chunk_to_entities(mentions_df: pd.DataFrame) -> pd.DataFrame:
+    """Phase 8b: INDEX_CHUNK_TO_ENTITIES_V0."""
+    codes, out = _group_codes(mentions_df, CHUNK_TO_ENTITIES_KEYS)
+    n = len(out)
+    out["entity_ids"], out["entity_count"] = _joined_uniques(codes, n, mentions_df["entity_id"])
+    out["canonicals"] = _joined_uniques(codes, n, mentions_df["canonical"])[0]
+    out["matched_vocabs"] = _joined_uniques(codes, n, mentions_df["matched_vocab"])[0]
+    out["match_kinds"] = _joined_uniques(codes, n, mentions_df["match_kind"])[0]
+    out = out[CHUNK_TO_ENTITIES_KEYS + ["entity_ids", "canonicals", "entity_count", "matched_vocabs", "match_kinds"]]
+    return out.sort_values(["chunk_id"], ascending=[True]).reset_index(drop=True)
+
+def write_index_artifacts(
+    out_dir: Path,
+    entity_to_chunks: pd.DataFrame,
+    chunk_to_entities: pd.DataFrame,
+    source_files: pd.DataFrame,
+    player_to_chunks: Optional[pd.DataFrame] = None,
+    columnar: bool = False,
+) -> List[Path]:
+    """Phase 8d: write index_*_v0.csv (plus Parquet twins with columnar); player index only when non-empty."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    tables = [
+        ("entity_to_chunks", entity_to_chunks),
+        ("chunk_to_entities", chunk_to_entities),
+        ("source_files", source_files),
+    ]
+    if player_to_chunks is not None and not player_to_chunks.empty:
+        tables.append(("player_to_chunks", player_to_chunks))
+
+    written = []
+    for key, df in tables:
+        p = out_dir / INDEX_FILENAMES[key]
+        df.to_csv(p, index=False, encoding="utf-8")
+        written.append(p)
+        if columnar:
+            written.append(write_columnar(df, p))
+    return written
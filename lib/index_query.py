@@ -0,0 +1,273 @@
+# lib/index_query.py
+from __future__ import annotations
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import ast
+import json
+
+import numpy as np
+import pandas as pd
+
+from lib.columnar import artifact_exists, csv_form, read_artifact
+from lib.index_builder import INDEX_FILENAMES
+from lib.vocab_tables import load_vocab_tables
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+def parse_list_field(raw: Any) -> List[str]:
+    """
+    Parse a list-like CSV field into list[str] (same rules as Index Query Phase 4):
+    ""/None/NaN -> [], JSON or Python list repr, "a|b" / "a;b" / "a,b", or one token.
+    Native list cells (columnar artifacts) are taken as they are.
+    """
+    if raw is None:
+        return []
+    if isinstance(raw, (list, tuple, np.ndarray)):
+        return [str(x).strip() for x in raw if str(x).strip()]
+    if isinstance(raw, float) and pd.isna(raw):
+        return []
+    s = str(raw).strip()
+    if not s:
+        return []
+
+    if s.startswith("[") and s.endswith("]"):
+        for parse in (json.loads, ast.literal_eval):
+            try:
+                v = parse(s)
+            except Exception:
+                continue
+            if isinstance(v, (list, tuple)):
+                return [str(x).strip() for x in v if str(x).strip()]
+
+    for delim in ["|", ";", ","]:
+        if delim in s:
+            return [x for x in (p.strip() for p in s.split(delim)) if x]
+    return [s]
+
+def _posting(ids: Iterable[Any]) -> np.ndarray:
+    if isinstance(ids, np.ndarray) and ids.dtype.kind in "iu":
+        return np.unique(ids.astype(np.int64))
+    vals = [int(x) for x in ids]
+    return np.unique(np.asarray(vals, dtype=np.int64)) if vals else _EMPTY
+
+def _name_index(keys: Sequence[Any], ids: Sequence[Any]) -> Dict[str, List[str]]:
+    """lowercased name -> ids in table order (blank ids dropped, de-duplicated)."""
+    out: Dict[str, List[str]] = {}
+    for k, eid in zip(keys, ids):
+        if not str(eid).strip():
+            continue
+        hits = out.setdefault(str(k).lower(), [])
+        if eid not in hits:
+            hits.append(eid)
+    return out
+
+class IndexQueryEngine:
+    """
+    Hash maps and integer posting lists over the v0 index tables, built once.
+
+    Name resolution follows the notebook helpers (exact id, then canonical,
+    then alias, case-insensitive). Posting lists are sorted int64 arrays,
+    so boolean queries are array intersections / differences.
+    """
+
+    def __init__(
+        self,
+        entity_to_chunks: pd.DataFrame,
+        chunk_to_entities: pd.DataFrame,
+        vocab_entities: pd.DataFrame,
+        vocab_aliases: Optional[pd.DataFrame] = None,
+        player_to_chunks: Optional[pd.DataFrame] = None,
+    ):
+        self.vocab_entities = vocab_entities
+        self.chunk_to_entities = chunk_to_entities.sort_values("chunk_id", kind="stable").reset_index(drop=True)
+
+        # --- name resolution ---
+        self._entity_ids = set(vocab_entities["entity_id"])
+        self._canonical = _name_index(vocab_entities["canonical"].tolist(), vocab_entities["entity_id"].tolist())
+        self._canonical_by_id: Dict[str, str] = {}
+        for eid, canon in zip(vocab_entities["entity_id"], vocab_entities["canonical"]):
+            self._canonical_by_id.setdefault(eid, canon)
+        self._alias: Dict[str, List[str]] = {}
+        if vocab_aliases is not None and not vocab_aliases.empty:
+            self._alias = _name_index(vocab_aliases["alias"].tolist(), vocab_aliases["entity_id"].tolist())
+
+        # --- posting lists ---
+        self._entity_postings = self._postings(entity_to_chunks, "entity_id")
+        self._player_postings: Dict[str, np.ndarray] = {}
+        if player_to_chunks is not None and "player_entity_id" in player_to_chunks.columns:
+            self._player_postings = self._postings(player_to_chunks, "player_entity_id")
+
+        # --- chunk table addressing ---
+        c2e = self.chunk_to_entities
+        self._chunk_ids = c2e["chunk_id"].astype(np.int64).to_numpy()
+        self._all_chunks = np.unique(self._chunk_ids)
+        self._chunk_entities = [parse_list_field(x) for x in c2e["entity_ids"].tolist()]
+        self._source_type_postings = {
+            str(st): _posting(g) for st, g in c2e.groupby("source_type", sort=False)["chunk_id"]
+        }
+        self._file_postings = {str(rel): _posting(g) for rel, g in c2e.groupby("relpath", sort=False)["chunk_id"]}
+
+    @staticmethod
+    def _postings(df: pd.DataFrame, key: str) -> Dict[str, np.ndarray]:
+        acc: Dict[str, List[Any]] = {}
+        for k, raw in zip(df[key].tolist(), df["chunk_ids"].tolist()):
+            if pd.isna(k):  # unmapped authors
+                continue
+            ids = raw if isinstance(raw, np.ndarray) else np.asarray([int(x) for x in parse_list_field(raw)], dtype=np.int64)
+            acc.setdefault(k, []).append(ids)
+        return {k: _posting(v[0] if len(v) == 1 else np.concatenate(v)) for k, v in acc.items()}
+
+    @classmethod
+    def from_paths(
+        cls,
+        indexes_path: Path,
+        vocab_entities_path: Path,
+        vocab_aliases_path: Optional[Path] = None,
+    ) -> "IndexQueryEngine":
+        """Load index_*_v0 (Parquet twins when current, else CSV) from indexes_path plus the vocab CSVs."""
+        indexes_path = Path(indexes_path)
+        entities, aliases = load_vocab_tables(vocab_entities_path, vocab_aliases_path)
+        p2c_path = indexes_path / INDEX_FILENAMES["player_to_chunks"]
+        return cls(
+            entity_to_chunks=read_artifact(indexes_path / INDEX_FILENAMES["entity_to_chunks"]),
+            chunk_to_entities=read_artifact(indexes_path / INDEX_FILENAMES["chunk_to_entities"]),
+            vocab_entities=entities,
+            vocab_aliases=aliases,
+            player_to_chunks=read_artifact(p2c_path) if artifact_exists(p2c_path) else None,
+        )
+
+    # ------------------------------------------------------------------
+    # Name resolution
+    # ------------------------------------------------------------------
+    def find_entity_ids(self, name_or_id: Any, include_aliases: bool = True) -> List[str]:
+        """entity_id(s) for an id, canonical name or alias (case-insensitive)."""
+        if name_or_id is None:
+            return []
+        q = str(name_or_id).strip()
+        if not q:
+            return []
+        if q in self._entity_ids:
+            return [q]
+
+        hits = list(self._canonical.get(q.lower(), []))
+        if include_aliases:
+            for eid in self._alias.get(q.lower(), []):
+                if eid and eid not in hits:
+                    hits.append(eid)
+        return hits
+
+    def find_player_ids(self, author_or_player_id: Any) -> List[str]:
+        """player_entity_id(s) for a player id or a player's canonical name."""
+        if author_or_player_id is None:
+            return []
+        q = str(author_or_player_id).strip()
+        if not q:
+            return []
+        if q in self._player_postings:
+            return [q]
+        hits = [str(x).strip() for x in self._canonical.get(q.lower(), [])]
+        return list(dict.fromkeys(x for x in hits if x in self._player_postings))
+
+    def canonical(self, entity_id: str) -> str:
+        return self._canonical_by_id.get(entity_id, "")
+
+    # ------------------------------------------------------------------
+    # Posting lists
+    # ------------------------------------------------------------------
+    def chunks_for_entity(self, name_or_id: Any, include_aliases: bool = True) -> np.ndarray:
+        """Sorted chunk ids where any resolved entity appears."""
+        return self._union(self._entity_postings.get(e, _EMPTY) for e in self.find_entity_ids(name_or_id, include_aliases))
+
+    def chunks_for_player(self, name_or_id: Any) -> np.ndarray:
+        """Sorted chunk ids authored by the resolved player(s)."""
+        return self._union(self._player_postings.get(p, _EMPTY) for p in self.find_player_ids(name_or_id))
+
+    def chunks_for_source_types(self, source_types: Iterable[str]) -> np.ndarray:
+        return self._union(self._source_type_postings.get(str(st), _EMPTY) for st in source_types)
+
+    def chunks_in_file(self, relpath: str) -> np.ndarray:
+        return self._file_postings.get(str(relpath), _EMPTY)
+
+    @staticmethod
+    def _union(arrays: Iterable[np.ndarray]) -> np.ndarray:
+        arrays = [a for a in arrays if len(a)]
+        if not arrays:
+            return _EMPTY
+        return arrays[0] if len(arrays) == 1 else np.unique(np.concatenate(arrays))
+
+    def query(
+        self,
+        all_of: Sequence[Any] = (),
+        any_of: Sequence[Any] = (),
+        none_of: Sequence[Any] = (),
+        player: Any = None,
+        source_types: Optional[Iterable[str]] = None,
+        include_aliases: bool = True,
+    ) -> np.ndarray:
+        """
+        Boolean chunk query, e.g. query(all_of=["Avarna", "Aren"], none_of=["Henry"],
+        player="Kalina", source_types=["pbp_transcripts"]). Returns sorted chunk ids.
+        With no positive terms the universe is every indexed chunk.
+        """
+        sets: List[np.ndarray] = [self.chunks_for_entity(t, include_aliases) for t in all_of]
+        if any_of:
+            sets.append(self._union(self.chunks_for_entity(t, include_aliases) for t in any_of))
+        if player is not None:
+            sets.append(self.chunks_for_player(player))
+        if source_types is not None:
+            sets.append(self.chunks_for_source_types(source_types))
+        if not sets:
+            sets.append(self._all_chunks)
+
+        # intersect smallest first; stop as soon as nothing is left
+        sets.sort(key=len)
+        out = sets[0]
+        for s in sets[1:]:
+            if not len(out):
+                break
+            out = np.intersect1d(out, s, assume_unique=True)
+
+        for t in none_of:
+            if not len(out):
+                break
+            out = np.setdiff1d(out, self.chunks_for_entity(t, include_aliases), assume_unique=True)
+        return out
+
+    # ------------------------------------------------------------------
+    # Chunk rows
+    # ------------------------------------------------------------------
+    def _positions(self, chunk_ids: Iterable[Any]) -> np.ndarray:
+        ids = np.asarray([int(x) for x in chunk_ids], dtype=np.int64)
+        if not len(ids):
+            return _EMPTY
+        lo = np.searchsorted(self._chunk_ids, ids, side="left")
+        hi = np.searchsorted(self._chunk_ids, ids, side="right")
+        return np.unique(np.concatenate([np.arange(a, b) for a, b in zip(lo, hi)] or [_EMPTY]))
+
+    def get_chunk_rows(self, chunk_ids: Optional[Iterable[Any]]) -> pd.DataFrame:
+        """DF_CHUNK_TO_ENTITIES rows for the given chunk ids (in chunk_id order, CSV form)."""
+        if chunk_ids is None:
+            return csv_form(self.chunk_to_entities.iloc[0:0])
+        return csv_form(self.chunk_to_entities.iloc[self._positions(chunk_ids)])
+
+    def get_chunk_row(self, chunk_id: Any) -> pd.DataFrame:
+        if chunk_id is None:
+            return csv_form(self.chunk_to_entities.iloc[0:0])
+        return self.get_chunk_rows([chunk_id])
+
+    def list_entity_ids_in_chunk(self, chunk_id: Any) -> List[str]:
+        pos = self._positions([chunk_id])
+        return list(self._chunk_entities[pos[0]]) if len(pos) else []
+
+    def cooccurring(self, name_or_id: Any, include_aliases: bool = True) -> pd.DataFrame:
+        """Entities sharing chunks with the target (Q3): entity_id, canonical, co_chunks."""
+        targets = set(self.find_entity_ids(name_or_id, include_aliases))
+        counts: Counter = Counter()
+        for pos in self._positions(self.chunks_for_entity(name_or_id, include_aliases)):
+            counts.update(e for e in self._chunk_entities[pos] if e not in targets)
+        df = pd.DataFrame(
+            [(self.canonical(e), e, n) for e, n in counts.items()],
+            columns=["canonical", "entity_id", "co_chunks"],
+        )
+        return df.sort_values(["co_chunks", "entity_id"], ascending=[False, True]).reset_index(drop=True)
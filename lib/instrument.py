@@ -0,0 +1,404 @@
+# lib/instrument.py
+from __future__ import annotations
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+import argparse
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import re
+import sys
+import time
+import tracemalloc
+
+try:
+    import psutil  # optional: current RSS per phase
+except ImportError:  # pragma: no cover
+    psutil = None
+
+try:
+    import resource  # optional (POSIX): process peak RSS
+except ImportError:  # pragma: no cover
+    resource = None
+
+REPORT_VERSION = 1
+REPORTS_DIRNAME = "_reports"
+PROFILE_TOP_N = 25
+
+def _rss_mb() -> Optional[float]:
+    if psutil is None:
+        return None
+    return psutil.Process(os.getpid()).memory_info().rss / 2**20
+
+def _maxrss_mb() -> Optional[float]:
+    """Process high-water RSS so far (ru_maxrss is bytes on macOS, KiB elsewhere)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_").lower() or "phase"
+
+def _r(x: Optional[float], nd: int = 4) -> Optional[float]:
+    return round(x, nd) if x is not None else None
+
+class PhaseRecord:
+    """Measurements for one phase; set items_out / meta while it runs."""
+
+    __slots__ = (
+        "name", "depth", "items_in", "items_out", "meta",
+        "_t0", "_c0", "_rss0", "_traced", "_peak_folded", "_profiler",
+        "wall_s", "cpu_s", "rss_start_mb", "rss_end_mb", "maxrss_mb", "traced_peak_mb", "profile_top", "error",
+    )
+
+    def __init__(self, name: str, depth: int, items_in: Optional[int], meta: Optional[Dict[str, Any]]):
+        self.name = name
+        self.depth = depth
+        self.items_in = items_in
+        self.items_out: Optional[int] = None
+        self.meta: Dict[str, Any] = dict(meta or {})
+        self.wall_s: Optional[float] = None
+        self.cpu_s: Optional[float] = None
+        self.rss_start_mb: Optional[float] = None
+        self.rss_end_mb: Optional[float] = None
+        self.maxrss_mb: Optional[float] = None
+        self.traced_peak_mb: Optional[float] = None
+        self.profile_top: Optional[List[str]] = None
+        self.error: Optional[str] = None
+        self._traced = False
+        self._peak_folded = 0.0
+        self._profiler: Optional[cProfile.Profile] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "depth": self.depth,
+            "wall_s": _r(self.wall_s, 6),
+            "cpu_s": _r(self.cpu_s, 6),
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "rss_start_mb": _r(self.rss_start_mb, 2),
+            "rss_end_mb": _r(self.rss_end_mb, 2),
+            "maxrss_mb": _r(self.maxrss_mb, 2),
+            "traced_peak_mb": _r(self.traced_peak_mb, 3),
+            "error": self.error,
+            "meta": self.meta,
+            "profile_top": self.profile_top,
+        }
+
+class RunRecorder:
+    """
+    Per-phase wall/CPU time, memory and item counts for one run.
+
+    Wrap a phase with `with rec.phase("7b entity_mentions", items_in=n) as ph:`
+    (set ph.items_out inside), or use begin()/end() where a with-block would
+    force re-indenting existing code. trace_memory=True adds a tracemalloc
+    peak per phase (slower); phases named in profile get a cProfile capture
+    written next to the report. enabled=False makes every call a no-op.
+    """
+
+    def __init__(
+        self,
+        label: str = "",
+        trace_memory: bool = False,
+        profile: Optional[Iterable[str]] = None,
+        enabled: bool = True,
+    ):
+        self.label = label
+        self.trace_memory = trace_memory
+        self.profile = set(profile or ())
+        self.enabled = enabled
+        self.phases: List[PhaseRecord] = []
+        self.meta: Dict[str, Any] = {}
+        self._stack: List[PhaseRecord] = []
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self._t0 = time.perf_counter()
+        self._c0 = time.process_time()
+
+    # --- phases ---
+    def begin(self, name: str, items_in: Optional[int] = None, **meta: Any) -> PhaseRecord:
+        ph = PhaseRecord(name, len(self._stack), items_in, meta)
+        if not self.enabled:
+            return ph
+        self.phases.append(ph)
+        self._stack.append(ph)
+        ph.rss_start_mb = _rss_mb()
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                ph._traced = True
+            else:
+                # reset_peak() below would erase the open phases' peak so far
+                peak = tracemalloc.get_traced_memory()[1] / 2**20
+                for outer in self._stack[:-1]:
+                    outer._peak_folded = max(outer._peak_folded, peak)
+            tracemalloc.reset_peak()
+        if name in self.profile and not any(p._profiler for p in self._stack[:-1]):
+            ph._profiler = cProfile.Profile()
+            ph._profiler.enable()
+        ph._c0 = time.process_time()
+        ph._t0 = time.perf_counter()
+        return ph
+
+    def end(self, ph: PhaseRecord, items_out: Optional[int] = None, error: Optional[BaseException] = None) -> PhaseRecord:
+        if not self.enabled or ph.wall_s is not None:
+            return ph
+        ph.wall_s = time.perf_counter() - ph._t0
+        ph.cpu_s = time.process_time() - ph._c0
+        if ph._profiler is not None:
+            ph._profiler.disable()
+            self._profiles[ph.name] = ph._profiler
+            buf = io.StringIO()
+            pstats.Stats(ph._profiler, stream=buf).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+            ph.profile_top = [ln for ln in buf.getvalue().splitlines() if ln.strip()]
+            ph._profiler = None
+        if tracemalloc.is_tracing() and self.trace_memory:
+            ph.traced_peak_mb = max(tracemalloc.get_traced_memory()[1] / 2**20, ph._peak_folded)
+            # an enclosing phase's peak must include this one
+            for outer in self._stack[:-1]:
+                outer.traced_peak_mb = max(outer.traced_peak_mb or 0.0, ph.traced_peak_mb)
+            if ph._traced:
+                tracemalloc.stop()
+        ph.rss_end_mb = _rss_mb()
+        ph.maxrss_mb = _maxrss_mb()
+        if items_out is not None:
+            ph.items_out = items_out
+        if error is not None:
+            ph.error = f"{type(error).__name__}: {error}"
+        if self._stack and self._stack[-1] is ph:
+            self._stack.pop()
+        elif ph in self._stack:
+            self._stack.remove(ph)
+        return ph
+
+    @property
+    def depth(self) -> int:
+        """Number of phases currently open."""
+        return len(self._stack)
+
+    def abort(self, error: BaseException, depth: int = 0) -> None:
+        """
+        Close the phases opened below depth (innermost first) with error
+        recorded; for begin()/end() code that raised.
+        """
+        if not self.enabled:
+            return
+        while len(self._stack) > depth:
+            self.end(self._stack[-1], error=error)
+
+    def record(
+        self,
+        name: str,
+        wall_s: float,
+        cpu_s: Optional[float] = None,
+        items_in: Optional[int] = None,
+        items_out: Optional[int] = None,
+        **meta: Any,
+    ) -> PhaseRecord:
+        """Add a phase measured elsewhere (e.g. on a worker thread, where begin/end would interleave)."""
+        ph = PhaseRecord(name, len(self._stack), items_in, meta)
+        if not self.enabled:
+            return ph
+        ph.wall_s, ph.cpu_s, ph.items_out = wall_s, cpu_s, items_out
+        ph.rss_end_mb = _rss_mb()
+        ph.maxrss_mb = _maxrss_mb()
+        self.phases.append(ph)
+        return ph
+
+    @contextmanager
+    def phase(self, name: str, items_in: Optional[int] = None, **meta: Any) -> Iterator[PhaseRecord]:
+        ph = self.begin(name, items_in, **meta)
+        try:
+            yield ph
+        except BaseException as e:
+            self.end(ph, error=e)
+            raise
+        self.end(ph)
+
+    def wrap(self, name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator form: @rec.wrap("8 index tables"); len() of the result becomes items_out when defined."""
+        def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+            def inner(*args: Any, **kwargs: Any) -> Any:
+                with self.phase(name or fn.__name__) as ph:
+                    out = fn(*args, **kwargs)
+                    try:
+                        ph.items_out = len(out)
+                    except TypeError:
+                        pass
+                    return out
+            inner.__name__ = getattr(fn, "__name__", "wrapped")
+            inner.__doc__ = fn.__doc__
+            return inner
+        return deco
+
+    # --- report ---
+    def report(self) -> Dict[str, Any]:
+        return {
+            "report_version": REPORT_VERSION,
+            "label": self.label,
+            "started_at": self.started_at,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "total_wall_s": round(time.perf_counter() - self._t0, 6),
+            "total_cpu_s": round(time.process_time() - self._c0, 6),
+            "maxrss_mb": _r(_maxrss_mb(), 2),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "trace_memory": self.trace_memory,
+            "meta": self.meta,
+            "phases": [p.to_dict() for p in self.phases],
+        }
+
+    def write(self, working_drafts_path: Optional[Path] = None, path: Optional[Path] = None) -> Path:
+        """
+        Write the JSON report (default: working_drafts/_reports/run_report_<timestamp>.json)
+        and any cProfile captures beside it as <report stem>.<phase>.prof.
+        """
+        if path is None:
+            if working_drafts_path is None:
+                raise ValueError("write() needs working_drafts_path or path")
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            stem = f"run_report_{_slug(self.label) + '_' if self.label else ''}{stamp}"
+            d = Path(working_drafts_path) / REPORTS_DIRNAME
+            path, n = d / f"{stem}.json", 1
+            while path.exists():
+                n += 1
+                path = d / f"{stem}_{n}.json"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        doc = self.report()
+        for phase_name, prof in self._profiles.items():
+            prof_path = path.with_name(f"{path.stem}.{_slug(phase_name)}.prof")
+            prof.dump_stats(str(prof_path))
+            for p in doc["phases"]:
+                if p["name"] == phase_name:
+                    p["profile_path"] = prof_path.name
+        path.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+        return path
+
+def load_report(path: Path) -> Dict[str, Any]:
+    doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    if doc.get("report_version") != REPORT_VERSION:
+        raise ValueError(f"Unsupported run report version in {path}: {doc.get('report_version')}")
+    return doc
+
+def list_reports(working_drafts_path: Path) -> List[Path]:
+    """Run reports under working_drafts, oldest first."""
+    d = Path(working_drafts_path) / REPORTS_DIRNAME
+    return sorted(d.glob("run_report_*.json"), key=lambda p: p.stat().st_mtime) if d.exists() else []
+
+def _ratio(new: Optional[float], old: Optional[float]) -> Optional[float]:
+    if new is None or old in (None, 0):
+        return None
+    return round(new / old, 3)
+
+def diff_reports(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Per-phase comparison of two reports (matched by name, in the new run's
+    order; phases only in the old run come last). ratio = new / old wall time.
+    """
+    def by_name(doc: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for p in doc.get("phases", []):
+            out.setdefault(p["name"], p)
+        return out
+
+    a, b = by_name(old), by_name(new)
+    names = list(b) + [n for n in a if n not in b]
+    rows = []
+    for n in names:
+        pa, pb = a.get(n, {}), b.get(n, {})
+        wa, wb = pa.get("wall_s"), pb.get("wall_s")
+        rows.append(
+            {
+                "phase": n,
+                "status": "added" if not pa else ("removed" if not pb else "both"),
+                "wall_old": wa,
+                "wall_new": wb,
+                "wall_delta": _r(wb - wa, 6) if wa is not None and wb is not None else None,
+                "wall_ratio": _ratio(wb, wa),
+                "cpu_old": pa.get("cpu_s"),
+                "cpu_new": pb.get("cpu_s"),
+                "peak_old": pa.get("traced_peak_mb"),
+                "peak_new": pb.get("traced_peak_mb"),
+                "items_out_old": pa.get("items_out"),
+                "items_out_new": pb.get("items_out"),
+            }
+        )
+    rows.append(
+        {
+            "phase": "TOTAL",
+            "status": "both",
+            "wall_old": old.get("total_wall_s"),
+            "wall_new": new.get("total_wall_s"),
+            "wall_delta": _r(new["total_wall_s"] - old["total_wall_s"], 6) if old.get("total_wall_s") is not None and new.get("total_wall_s") is not None else None,
+            "wall_ratio": _ratio(new.get("total_wall_s"), old.get("total_wall_s")),
+            "cpu_old": old.get("total_cpu_s"),
+            "cpu_new": new.get("total_cpu_s"),
+            "peak_old": old.get("maxrss_mb"),
+            "peak_new": new.get("maxrss_mb"),
+            "items_out_old": None,
+            "items_out_new": None,
+        }
+    )
+    return rows
+
+def _fmt(x: Optional[float], spec: str) -> str:
+    if x is not None:
+        return format(x, spec)
+    width = re.match(r"\D*(\d*)", spec).group(1)
+    return format("-", f">{width}")
+
+def format_report(doc: Dict[str, Any]) -> List[str]:
+    """Printable phase table for one report."""
+    lines = [
+        f"Run {doc.get('label') or '(unlabeled)'} @ {doc['started_at']}: "
+        f"{doc['total_wall_s']:.3f}s wall, {doc['total_cpu_s']:.3f}s CPU, max RSS {_fmt(doc.get('maxrss_mb'), '.1f')} MiB",
+        f"{'phase':<36} {'wall s':>9} {'cpu s':>9} {'in':>9} {'out':>9} {'RSS MiB':>9} {'traced':>8}",
+    ]
+    for p in doc["phases"]:
+        name = "  " * p.get("depth", 0) + p["name"]
+        lines.append(
+            f"{name:<36} {_fmt(p['wall_s'], '9.3f')} {_fmt(p['cpu_s'], '9.3f')} "
+            f"{_fmt(p['items_in'], '>9')} {_fmt(p['items_out'], '>9')} "
+            f"{_fmt(p['rss_end_mb'], '9.1f')} {_fmt(p['traced_peak_mb'], '8.1f')}"
+            + (f"  ERROR {p['error']}" if p.get("error") else "")
+        )
+    return lines
+
+def format_diff(rows: Sequence[Dict[str, Any]]) -> List[str]:
+    """Printable diff_reports() table."""
+    lines = [f"{'phase':<36} {'old s':>9} {'new s':>9} {'delta s':>9} {'ratio':>7} {'old out':>9} {'new out':>9}"]
+    for r in rows:
+        lines.append(
+            f"{r['phase']:<36} {_fmt(r['wall_old'], '9.3f')} {_fmt(r['wall_new'], '9.3f')} "
+            f"{_fmt(r['wall_delta'], '+9.3f')} {_fmt(r['wall_ratio'], '7.2f')} "
+            f"{_fmt(r['items_out_old'], '>9')} {_fmt(r['items_out_new'], '>9')}"
+            + (f"  ({r['status']})" if r["status"] != "both" else "")
+        )
+    return lines
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Show or diff IWTC run reports.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    show = sub.add_parser("show", help="print one run report")
+    show.add_argument("report", type=Path)
+    diff = sub.add_parser("diff", help="compare two run reports (old, new)")
+    diff.add_argument("old", type=Path)
+    diff.add_argument("new", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "show":
+        print("\n".join(format_report(load_report(args.report))))
+    else:
+        print("\n".join(format_diff(diff_reports(load_report(args.old), load_report(args.new)))))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,489 @@
+# lib/pipeline.py
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import os
+import time
+
+import pandas as pd
+import yaml
+
+from lib.chunk_search import build_search_index, search_index_path
+from lib.chunker import Chunk, chunk_source
+from lib.columnar import available as columnar_available
+from lib.entity_linker import build_linker, link_entity_mentions
+from lib.evidence_graph import build_evidence_edges, build_evidence_nodes, write_evidence_artifacts
+from lib.index_builder import (
+    build_chunk_to_entities,
+    build_entity_to_chunks,
+    build_player_to_chunks,
+    build_source_files,
+    link_author_mentions,
+    write_index_artifacts,
+)
+from lib.instrument import RunRecorder, format_report
+from lib.rebuild import CHUNK_META_COLS
+from lib.semantic_graph import (
+    PREDICATE_POLICY_FILENAME,
+    build_relationship_semantics,
+    build_semantic_edges,
+    build_semantic_nodes,
+    load_predicate_rules,
+    load_relationships,
+    write_semantic_artifacts,
+)
+from lib.source_loader import default_cache_dir, load_sources
+from lib.vocab_tables import build_vocab_df, build_vocab_lookup, load_author_aliases, load_vocab_tables
+
+# Phase 2 eligible extensions (kept in sync with IWTC_Raw_Source_Indexing.ipynb)
+ALLOWED_EXTS = {".md", ".txt", ".docx", ".pdf"}
+
+# Parallel work units
+SOURCES_PER_TASK = 8
+CHUNKS_PER_TASK = 500
+
+# ------------------------------------------------------------------
+# Phase 1: world descriptor
+# ------------------------------------------------------------------
+@dataclass
+class WorldDescriptor:
+    """Resolved world_repository.yml paths (Phase 1c contract variables)."""
+
+    descriptor_path: Path
+    world_root: Path
+    working_drafts: Path
+    read_paths: List[Path]
+    source_types: Dict[Path, str]
+    indexes: Optional[Path] = None
+    vocab_entities: Optional[Path] = None
+    vocab_aliases: Optional[Path] = None
+    author_aliases: Optional[Path] = None
+    relationships: Optional[Path] = None
+    predicate_policy: Optional[Path] = None
+    predicates: Optional[Path] = None
+
+def _resolve(world_root: Path, raw: Any, label: str, errors: List[str]) -> Optional[Path]:
+    if raw is None or str(raw).strip() == "":
+        return None
+    p = Path(str(raw))
+    if str(p).startswith("~"):
+        errors.append(f"{label}: '~' is not allowed: {raw}")
+        return None
+    if not p.is_absolute():
+        p = world_root / p
+    return p.resolve()
+
+def load_world_descriptor(
+    descriptor_path: Path,
+    override_paths: Optional[Sequence[Path]] = None,
+    require_sources: bool = True,
+) -> WorldDescriptor:
+    """
+    Phases 1a-1c: read world_repository.yml and resolve its paths.
+
+    override_paths replaces sources.read_paths for the run (types still come
+    from the descriptor). Missing optional vocab/relationship files resolve
+    to None. require_sources=False is the query notebooks' view (P1), which
+    never reads sources.
+    """
+    descriptor_path = Path(descriptor_path)
+    if not descriptor_path.exists():
+        raise FileNotFoundError(f"World repository descriptor file was not found: {descriptor_path}")
+    with descriptor_path.open("r", encoding="utf-8") as f:
+        world_repo = yaml.safe_load(f)
+    if not isinstance(world_repo, dict):
+        raise ValueError(f"World repository descriptor must be a YAML mapping: {descriptor_path}")
+
+    errors: List[str] = []
+    world_root_raw = world_repo.get("world_root")
+    sources = world_repo.get("sources")
+    read_paths = sources.get("read_paths") if isinstance(sources, dict) else None
+    drafts = world_repo.get("working_drafts")
+    drafts_raw = drafts.get("path") if isinstance(drafts, dict) else None
+    indexes = world_repo.get("indexes")
+    indexes_raw = indexes.get("path") if isinstance(indexes, dict) else None
+    vocab = world_repo.get("vocabulary") or {}
+    if not isinstance(vocab, dict):
+        errors.append("vocabulary must be a mapping")
+        vocab = {}
+
+    if not world_root_raw:
+        errors.append("Missing required entry: world_root")
+    if not drafts_raw:
+        errors.append("Missing required entry: working_drafts.path")
+    if require_sources and not override_paths:
+        if read_paths is None:
+            errors.append("Missing required entry: sources.read_paths")
+    if read_paths is not None and not isinstance(read_paths, list):
+        errors.append("sources.read_paths must be a YAML list")
+    if errors:
+        raise ValueError("World repository descriptor is missing required entries:\n- " + "\n- ".join(errors))
+
+    world_root = Path(str(world_root_raw))
+    if str(world_root).startswith("~"):
+        errors.append("world_root: '~' is not allowed. Use a full absolute path.")
+    elif not world_root.is_absolute():
+        errors.append("world_root must be an absolute path.")
+    elif not world_root.is_dir():
+        errors.append(f"world_root must be an existing directory: {world_root}")
+    if errors:
+        raise ValueError("Descriptor path validation failed:\n- " + "\n- ".join(errors))
+    world_root = world_root.resolve()
+
+    entries: List[Tuple[Any, Optional[str]]] = []
+    for entry in read_paths or []:
+        if isinstance(entry, str):
+            entries.append((entry, None))
+        elif isinstance(entry, dict) and entry.get("path"):
+            entries.append((entry["path"], entry.get("type") or "unknown"))
+        else:
+            errors.append("sources.read_paths entries must be a path string or a {path,type} mapping.")
+
+    source_types: Dict[Path, str] = {}
+    for raw, st in entries:
+        p = _resolve(world_root, raw, "src_type", errors)
+        if p is not None and st is not None and p.exists():
+            if p.is_file():
+                errors.append(f"src_type: {p} must be a directory")
+            else:
+                source_types[p] = st
+
+    run_paths: List[Path] = []
+    for raw in (override_paths if override_paths else [r for r, _ in entries]):
+        p = _resolve(world_root, raw, "src", errors)
+        if p is None:
+            continue
+        if not p.exists():
+            if require_sources:
+                errors.append(f"src: path does not exist: {p}")
+        else:
+            run_paths.append(p)
+
+    working_drafts = _resolve(world_root, drafts_raw, "drafts", errors)
+    if working_drafts is not None and not working_drafts.is_dir():
+        errors.append(f"drafts: working drafts directory does not exist: {working_drafts}")
+
+    indexes_path = _resolve(world_root, indexes_raw, "indexes", errors)
+    if indexes_path is not None and indexes_path.exists() and indexes_path.is_file():
+        errors.append(f"indexes: {indexes_path} must be a directory")
+
+    def vocab_file(key: str) -> Optional[Path]:
+        p = _resolve(world_root, vocab.get(key), f"vocabulary.{key}", errors)
+        if p is not None and p.is_dir():
+            errors.append(f"vocabulary.{key}: {p} must be a file")
+            return None
+        return p if p is not None and p.exists() else None
+
+    vocab_entities = vocab_file("entities")
+    vocab_aliases = vocab_file("aliases")
+    author_aliases = vocab_file("author_aliases")
+    relationships = vocab_file("relationships")
+    predicates = vocab_file("predicates")
+
+    if require_sources and not run_paths:
+        errors.append("src: no valid source paths were provided for this run.")
+    if errors:
+        raise ValueError(f"Descriptor path validation failed ({descriptor_path.name}):\n- " + "\n- ".join(errors))
+
+    policy = indexes_path / PREDICATE_POLICY_FILENAME if indexes_path is not None else None
+    return WorldDescriptor(
+        descriptor_path=descriptor_path,
+        world_root=world_root,
+        working_drafts=working_drafts,
+        read_paths=run_paths,
+        source_types=source_types,
+        indexes=indexes_path,
+        vocab_entities=vocab_entities,
+        vocab_aliases=vocab_aliases,
+        author_aliases=author_aliases,
+        relationships=relationships,
+        predicate_policy=policy if policy is not None and policy.exists() else None,
+        predicates=predicates,
+    )
+
+# ------------------------------------------------------------------
+# Phase 2: source discovery
+# ------------------------------------------------------------------
+def discover_source_files(world: WorldDescriptor) -> List[Dict[str, Any]]:
+    """Phase 2 with SOURCE_MODE = "ALL": SOURCE_FILES records in stable path order."""
+    candidates = []
+    for p in world.read_paths:
+        found = [p] if p.is_file() else [f for f in p.rglob("*") if f.is_file()] if p.is_dir() else []
+        candidates.extend(f for f in found if f.suffix.lower() in ALLOWED_EXTS and not f.name.startswith("."))
+    candidates = sorted(set(candidates), key=lambda x: x.as_posix().lower())
+    if not candidates:
+        raise ValueError("Phase 2: No eligible source files found under the run source paths.")
+
+    records = []
+    for i, f in enumerate(candidates, start=1):
+        st = next((world.source_types[p] for p in [f, *f.parents] if p in world.source_types), "unknown")
+        try:
+            rel = str(f.resolve().relative_to(world.world_root))
+        except ValueError:
+            rel = str(f)
+        records.append({"source_id": f"src_{i:06d}", "path": f, "relpath": rel, "source_type": st, "ext": f.suffix.lower()})
+    return records
+
+# ------------------------------------------------------------------
+# Stage executor
+# ------------------------------------------------------------------
+@dataclass
+class Stage:
+    """One pipeline step: reads `needs` from the context, returns a dict with `provides`."""
+
+    name: str
+    fn: Callable[[Dict[str, Any]], Dict[str, Any]]
+    needs: Tuple[str, ...] = ()
+    provides: Tuple[str, ...] = ()
+    count: Optional[Callable[[Dict[str, Any]], int]] = field(default=None, repr=False)
+
+def _run_stage(stage: Stage, ctx: Dict[str, Any]) -> Tuple[Dict[str, Any], float, float]:
+    t0, c0 = time.perf_counter(), time.thread_time()
+    out = stage.fn(ctx)
+    return out, time.perf_counter() - t0, time.thread_time() - c0
+
+def run_stages(
+    stages: Sequence[Stage],
+    ctx: Dict[str, Any],
+    max_parallel: Optional[int] = None,
+    recorder: Optional[RunRecorder] = None,
+) -> Dict[str, Any]:
+    """
+    Run stages as soon as everything they need is in ctx; independent stages
+    run concurrently on threads (max_parallel=1 runs them in list order).
+    Stage outputs are merged into ctx. Each stage is added to recorder with
+    its wall time and the CPU time of its own thread.
+    """
+    pending = list(stages)
+    produced = {p for s in stages for p in s.provides}
+    for s in stages:
+        missing = [n for n in s.needs if n not in ctx and n not in produced]
+        if missing:
+            raise ValueError(f"Stage {s.name!r} needs {missing}, which no stage provides")
+
+    def finish(stage: Stage, result: Tuple[Dict[str, Any], float, float]) -> None:
+        out, wall, cpu = result
+        missing = [p for p in stage.provides if p not in out]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} did not provide {missing}")
+        ctx.update(out)
+        if recorder is not None:
+            recorder.record(stage.name, wall, cpu, items_out=stage.count(ctx) if stage.count else None)
+
+    if max_parallel == 1:
+        for stage in pending:
+            finish(stage, _run_stage(stage, ctx))
+        return ctx
+
+    running: Dict[Future, Stage] = {}
+    with ThreadPoolExecutor(max_workers=max_parallel or len(stages) or 1, thread_name_prefix="iwtc-stage") as pool:
+        while pending or running:
+            for stage in [s for s in pending if all(n in ctx for n in s.needs)]:
+                pending.remove(stage)
+                running[pool.submit(_run_stage, stage, dict(ctx))] = stage
+            if not running:
+                raise ValueError(f"Pipeline is stuck; unmet inputs for {[s.name for s in pending]}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                finish(running.pop(fut), fut.result())
+    return ctx
+
+# ------------------------------------------------------------------
+# Parallel work units (top-level so they pickle)
+# ------------------------------------------------------------------
+def _load_and_chunk(job: Tuple[List[Dict[str, Any]], Optional[str]]) -> List[Tuple[Dict[str, Any], List[Tuple[int, int, str]]]]:
+    """Phases 3 + 5 for a few sources: (loaded source, chunk spans) per source."""
+    items, cache_dir = job
+    out = []
+    for src in load_sources(items, cache_dir=Path(cache_dir) if cache_dir else None, max_workers=1):
+        out.append((src, [(c.start_line, c.end_line, c.header_kind) for c in chunk_source(src)]))
+    return out
+
+def _link_batch(job: Tuple[List[Chunk], pd.DataFrame]) -> List[Dict[str, Any]]:
+    chunks, vocab_df = job
+    return link_entity_mentions(chunks, vocab_df, linker=_linker_for(vocab_df))
+
+_LINKER_CACHE: Dict[int, Any] = {}
+
+def _linker_for(vocab_df: pd.DataFrame) -> Any:
+    # one compiled linker per worker process and vocab
+    key = hash(tuple(vocab_df["vocab"].tolist()))
+    if key not in _LINKER_CACHE:
+        _LINKER_CACHE.clear()
+        _LINKER_CACHE[key] = build_linker(vocab_df)
+    return _LINKER_CACHE[key]
+
+def _split(seq: Sequence[Any], size: int) -> List[Sequence[Any]]:
+    return [seq[i:i + size] for i in range(0, len(seq), size)]
+
+def _map(pool: Optional[Executor], fn: Callable[[Any], Any], jobs: List[Any]) -> List[Any]:
+    if pool is None or len(jobs) <= 1:
+        return [fn(j) for j in jobs]
+    return list(pool.map(fn, jobs))
+
+# ------------------------------------------------------------------
+# Pipeline stages
+# ------------------------------------------------------------------
+def pipeline_stages(world: WorldDescriptor, write_mentions: bool = False, columnar: bool = False) -> List[Stage]:
+    """
+    Raw Source Indexing (2-8), Graph Indexing (N/E/W1) and the semantic graph
+    as stages. Context keys mirror the notebook globals in lower case.
+    """
+    out_dir = world.working_drafts
+
+    def discover(ctx):
+        return {"source_files": discover_source_files(world)}
+
+    def vocab(ctx):
+        if world.vocab_entities is None:
+            raise FileNotFoundError("vocabulary.entities is required for entity linking")
+        entities_df, aliases_df = load_vocab_tables(world.vocab_entities, world.vocab_aliases)
+        return {
+            "entities_df": entities_df,
+            "aliases_df": aliases_df,
+            "vocab_df": build_vocab_df(entities_df, aliases_df),
+            "vocab_lookup": build_vocab_lookup(entities_df, aliases_df),
+            "author_map": load_author_aliases(world.author_aliases),
+        }
+
+    def load_chunk(ctx):
+        cache_dir = str(default_cache_dir(world.working_drafts))
+        jobs = [(list(part), cache_dir) for part in _split(ctx["source_files"], SOURCES_PER_TASK)]
+        chunks: List[Chunk] = []
+        results = [src_spans for part in _map(ctx.get("pool"), _load_and_chunk, jobs) for src_spans in part]
+        next_id = 1
+        for source_id, (src, spans) in enumerate(results):
+            src["source_id"] = source_id  # load_sources numbers per task; make it global
+            for start, end, kind in spans:
+                chunks.append(Chunk(next_id, src, start, end, kind))
+                next_id += 1
+        return {"chunks": chunks}
+
+    def entity_mentions(ctx):
+        jobs = [(list(part), ctx["vocab_df"]) for part in _split(ctx["chunks"], CHUNKS_PER_TASK)]
+        df = pd.DataFrame([row for rows in _map(ctx.get("pool"), _link_batch, jobs) for row in rows])
+        if df.empty:
+            raise ValueError("ENTITY_MENTIONS_V0 is empty; check vocab and sources.")
+        df["mention_id"] = range(1, len(df) + 1)
+        return {"entity_mentions": df}
+
+    def author_mentions(ctx):
+        return {"author_mentions": pd.DataFrame(link_author_mentions(ctx["chunks"], ctx["entities_df"], ctx["author_map"]))}
+
+    def index_tables(ctx):
+        chunks_df = pd.DataFrame([{k: c[k] for k in CHUNK_META_COLS} for c in ctx["chunks"]], columns=CHUNK_META_COLS)
+        tables = {
+            "source_files_df": build_source_files(chunks_df),
+            "chunk_to_entities": build_chunk_to_entities(ctx["entity_mentions"]),
+            "entity_to_chunks": build_entity_to_chunks(ctx["entity_mentions"]),
+            "player_to_chunks": build_player_to_chunks(ctx["author_mentions"]),
+        }
+        written = write_index_artifacts(
+            out_dir, tables["entity_to_chunks"], tables["chunk_to_entities"], tables["source_files_df"], tables["player_to_chunks"], columnar
+        )
+        if write_mentions:
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            for key in ("entity_mentions", "author_mentions"):
+                p = out_dir / f"{key}_v0_{stamp}.csv"
+                ctx[key].to_csv(p, index=False, encoding="utf-8")
+                written.append(p)
+        return {**tables, "index_written": written}
+
+    def evidence_graph(ctx):
+        nodes = build_evidence_nodes(ctx["entities_df"], ctx["chunk_to_entities"], ctx["source_files_df"], ctx["vocab_lookup"])
+        edges = build_evidence_edges(ctx["chunk_to_entities"], ctx["vocab_lookup"])
+        return {"evidence_nodes": nodes, "evidence_edges": edges, "evidence_written": write_evidence_artifacts(out_dir, nodes, edges, columnar)}
+
+    def search_index(ctx):
+        path = search_index_path(out_dir)
+        build_search_index(ctx["chunks"], ctx["entity_mentions"], out_path=path)
+        return {"search_written": [path]}
+
+    def semantic_graph(ctx):
+        if world.relationships is None or world.predicate_policy is None or world.vocab_entities is None:
+            return {"semantic_edges": None, "semantic_written": []}
+        semantics = build_relationship_semantics(load_relationships(world.relationships), load_predicate_rules(world.predicate_policy))
+        edges = build_semantic_edges(semantics)
+        nodes = build_semantic_nodes(semantics, pd.read_csv(world.vocab_entities))
+        return {"semantic_edges": edges, "semantic_written": write_semantic_artifacts(out_dir, nodes, edges, columnar)}
+
+    return [
+        Stage("2 discover", discover, (), ("source_files",), lambda c: len(c["source_files"])),
+        Stage("7a vocab", vocab, (), ("entities_df", "aliases_df", "vocab_df", "vocab_lookup", "author_map"), lambda c: len(c["vocab_df"])),
+        Stage("3+5 load + chunk", load_chunk, ("source_files",), ("chunks",), lambda c: len(c["chunks"])),
+        Stage("7b entity_mentions", entity_mentions, ("chunks", "vocab_df"), ("entity_mentions",), lambda c: len(c["entity_mentions"])),
+        Stage("7c author_mentions", author_mentions, ("chunks", "entities_df", "author_map"), ("author_mentions",), lambda c: len(c["author_mentions"])),
+        Stage(
+            "8 index tables", index_tables, ("chunks", "entity_mentions", "author_mentions"),
+            ("source_files_df", "chunk_to_entities", "entity_to_chunks", "player_to_chunks", "index_written"),
+            lambda c: len(c["chunk_to_entities"]),
+        ),
+        Stage(
+            "E evidence graph", evidence_graph, ("entities_df", "chunk_to_entities", "source_files_df", "vocab_lookup"),
+            ("evidence_nodes", "evidence_edges", "evidence_written"), lambda c: len(c["evidence_edges"]),
+        ),
+        Stage("S search index", search_index, ("chunks", "entity_mentions"), ("search_written",), lambda c: len(c["chunks"])),
+        Stage("G semantic graph", semantic_graph, (), ("semantic_edges", "semantic_written"), lambda c: len(c["semantic_edges"]) if c["semantic_edges"] is not None else 0),
+    ]
+
+def run_pipeline(
+    descriptor_path: Path,
+    override_paths: Optional[Sequence[Path]] = None,
+    source_files: Optional[Sequence[Dict[str, Any]]] = None,
+    workers: Optional[int] = None,
+    write_mentions: bool = False,
+    recorder: Optional[RunRecorder] = None,
+    columnar: bool = False,
+) -> Dict[str, Any]:
+    """
+    Full, unattended rebuild of the index_*_v0 and graph_*_v0 artifacts into
+    working_drafts. workers sizes the process pool used for per-source
+    loading/chunking and entity linking (None = every core, 1 = in-process,
+    sequential). Pass source_files to skip discovery; columnar also writes
+    Parquet twins of the CSVs (lib.columnar). Returns the context.
+    """
+    world = load_world_descriptor(descriptor_path, override_paths=override_paths)
+    ctx: Dict[str, Any] = {"world": world}
+    if source_files is not None:
+        ctx["source_files"] = list(source_files)
+    stages = [s for s in pipeline_stages(world, write_mentions=write_mentions, columnar=columnar) if not (s.name == "2 discover" and source_files is not None)]
+
+    if workers == 1:
+        return run_stages(stages, ctx, max_parallel=1, recorder=recorder)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        ctx["pool"] = pool
+        run_stages(stages, ctx, recorder=recorder)
+    ctx.pop("pool", None)
+    return ctx
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild IWTC index and graph artifacts from a world descriptor.")
+    parser.add_argument("descriptor", type=Path, help="path to world_repository.yml")
+    parser.add_argument("--workers", type=int, default=None, help=f"process pool size (default: {os.cpu_count()}; 1 = sequential)")
+    parser.add_argument("--source", type=Path, action="append", default=None, help="override sources.read_paths (repeatable)")
+    parser.add_argument("--mentions", action="store_true", help="also write timestamped entity/author mention drafts")
+    parser.add_argument("--report", action="store_true", help="write a run report to working_drafts/_reports")
+    parser.add_argument("--columnar", action="store_true", help="also write Parquet twins of the artifact CSVs (needs pyarrow)")
+    args = parser.parse_args(argv)
+    if args.columnar and not columnar_available():
+        parser.error("--columnar needs pyarrow (pip install pyarrow)")
+
+    rec = RunRecorder("pipeline")
+    ctx = run_pipeline(args.descriptor, override_paths=args.source, workers=args.workers, write_mentions=args.mentions, recorder=rec, columnar=args.columnar)
+    world: WorldDescriptor = ctx["world"]
+    for p in ctx["index_written"] + ctx["evidence_written"] + ctx["search_written"] + ctx["semantic_written"]:
+        try:
+            print(f"Wrote: {Path(p).relative_to(world.world_root)}")
+        except ValueError:
+            print(f"Wrote: {p}")
+    print("\n".join(format_report(rec.report())))
+    if args.report:
+        print(f"Report: {rec.write(world.working_drafts)}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
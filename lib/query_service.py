@@ -0,0 +1,547 @@
+# lib/query_service.py
+from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+
+from lib.chunk_search import SEARCH_FILENAME, ChunkSearchIndex
+from lib.columnar import columnar_path
+from lib.evidence_graph import EVIDENCE_FILENAMES
+from lib.graph_paths import SemanticPathFinder, load_predicate_vocab
+from lib.graph_store import GraphStore, load_graph
+from lib.index_builder import INDEX_FILENAMES
+from lib.index_query import IndexQueryEngine, parse_list_field
+from lib.semantic_graph import SEMANTIC_FILENAMES
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+POLL_INTERVAL_S = 2.0
+MAX_BODY_BYTES = 1 << 20
+
+# Q2 display limit for evidence "_with" links (kept in sync with IWTC_Graph_Query.ipynb)
+Q2_WITH_LIMIT = 15
+
+# ------------------------------------------------------------------
+# Artifacts
+# ------------------------------------------------------------------
+@dataclass
+class ArtifactPaths:
+    """The files one warm state is built from (index/graph CSVs plus vocab)."""
+
+    indexes: Path
+    vocab_entities: Path
+    vocab_aliases: Optional[Path] = None
+    predicates: Optional[Path] = None
+
+    @classmethod
+    def from_descriptor(cls, descriptor_path: Path, artifacts_dir: Optional[Path] = None) -> "ArtifactPaths":
+        """Query-notebook view of world_repository.yml (artifacts default to indexes.path)."""
+        from lib.pipeline import load_world_descriptor
+
+        world = load_world_descriptor(descriptor_path, require_sources=False)
+        if world.vocab_entities is None:
+            raise FileNotFoundError("vocabulary.entities is required by the query service")
+        indexes = Path(artifacts_dir) if artifacts_dir else world.indexes
+        if indexes is None:
+            raise ValueError("indexes.path is missing from the descriptor; pass artifacts_dir")
+        return cls(indexes, world.vocab_entities, world.vocab_aliases, world.predicates)
+
+    def files(self) -> List[Path]:
+        names = [INDEX_FILENAMES[k] for k in ("entity_to_chunks", "chunk_to_entities", "player_to_chunks", "source_files")]
+        names += list(EVIDENCE_FILENAMES.values()) + list(SEMANTIC_FILENAMES.values()) + [SEARCH_FILENAME]
+        extra = [p for p in (self.vocab_entities, self.vocab_aliases, self.predicates) if p is not None]
+        tables = [self.indexes / n for n in names]
+        twins = [columnar_path(p) for p in tables if p.suffix == ".csv"]
+        return tables + twins + [Path(p) for p in extra]
+
+    def signature(self) -> Tuple[Tuple[str, int, int], ...]:
+        """(path, size, mtime_ns) per file; missing files count as (path, -1, -1)."""
+        out = []
+        for p in self.files():
+            try:
+                st = p.stat()
+                out.append((str(p), st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                out.append((str(p), -1, -1))
+        return tuple(out)
+
+@dataclass
+class QueryState:
+    """One immutable, fully loaded generation of indexes and graphs."""
+
+    engine: IndexQueryEngine
+    evidence: GraphStore
+    semantic: GraphStore
+    finder: SemanticPathFinder
+    signature: Tuple[Tuple[str, int, int], ...]
+    generation: int = 1
+    search: Optional[ChunkSearchIndex] = None
+    loaded_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    load_s: float = 0.0
+
+def load_state(paths: ArtifactPaths, generation: int = 1) -> QueryState:
+    """P1-P3 + G1 once: index engine, both graph stores and the Q4 path finder (views prebuilt)."""
+    t0 = time.perf_counter()
+    signature = paths.signature()
+    engine = IndexQueryEngine.from_paths(paths.indexes, paths.vocab_entities, paths.vocab_aliases)
+    evidence = load_graph(paths.indexes / EVIDENCE_FILENAMES["nodes"], paths.indexes / EVIDENCE_FILENAMES["edges"], "evidence")
+    semantic = load_graph(paths.indexes / SEMANTIC_FILENAMES["nodes"], paths.indexes / SEMANTIC_FILENAMES["edges"], "semantic")
+    reverse, cost = load_predicate_vocab(paths.predicates)
+    finder = SemanticPathFinder(semantic, cost, reverse)
+    finder.view("undirected")
+    finder.view("directed")
+    search_path = paths.indexes / SEARCH_FILENAME
+    search = ChunkSearchIndex.open(search_path) if search_path.exists() else None  # optional artifact
+    return QueryState(engine, evidence, semantic, finder, signature, generation, search, load_s=round(time.perf_counter() - t0, 3))
+
+# ------------------------------------------------------------------
+# Queries (pure functions over a state)
+# ------------------------------------------------------------------
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    return json.loads(df.to_json(orient="records"))
+
+def _bool(value: Any) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+def _text(value: Any, name: str) -> str:
+    """A scalar parameter as text (query strings are text already; JSON bodies may carry numbers)."""
+    if value is None or isinstance(value, (dict, list, tuple)):
+        raise ValueError(f"Parameter {name} must be a string")
+    return str(value)
+
+def _int(value: Any, name: str, default: int) -> int:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        raise ValueError(f"Parameter {name} must be an integer")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Parameter {name} must be an integer") from None
+
+def _list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value if str(v).strip()]
+    return parse_list_field(value) if "|" in str(value) else [v.strip() for v in str(value).split(",") if v.strip()]
+
+def resolve_entity(state: QueryState, name: str, include_aliases: bool = True) -> Dict[str, Any]:
+    """Entity resolution: ids for an id, canonical name or alias, plus player ids for an author."""
+    eng = state.engine
+    ids = eng.find_entity_ids(name, include_aliases)
+    return {
+        "query": name,
+        "entities": [{"entity_id": e, "canonical": eng.canonical(e), "chunk_count": int(len(eng.chunks_for_entity(e, False)))} for e in ids],
+        "players": eng.find_player_ids(name),
+    }
+
+def lookup_chunks(
+    state: QueryState,
+    all_of: Sequence[str] = (),
+    any_of: Sequence[str] = (),
+    none_of: Sequence[str] = (),
+    player: Optional[str] = None,
+    source_types: Optional[Sequence[str]] = None,
+    chunk_ids: Optional[Sequence[Any]] = None,
+    limit: int = 50,
+    include_aliases: bool = True,
+) -> Dict[str, Any]:
+    """Boolean chunk query (or explicit chunk_ids) with DF_CHUNK_TO_ENTITIES rows for the first `limit` hits."""
+    eng = state.engine
+    if chunk_ids:
+        ids = [int(c) for c in chunk_ids]
+    else:
+        ids = eng.query(all_of, any_of, none_of, player, source_types or None, include_aliases).tolist()
+    return {"total": len(ids), "chunk_ids": ids[:limit], "rows": _records(eng.get_chunk_rows(ids[:limit]))}
+
+def _layer(state: QueryState, layer: str) -> GraphStore:
+    if layer not in ("evidence", "semantic"):
+        raise ValueError(f"layer must be 'evidence' or 'semantic'. Received: {layer}")
+    return state.evidence if layer == "evidence" else state.semantic
+
+def node_orientation(G: Any, node: str) -> Dict[str, Any]:
+    """Q1 for one layer: presence, type/label and predicate counts by role."""
+    if node not in G:
+        return {"present": False}
+    data = G.nodes[node]
+    roles: Dict[str, Counter] = {"subject": Counter(), "object": Counter(), "with": Counter()}
+    for _, _, d in G.out_edges(node, data=True):
+        p = d.get("predicate", "<missing>")
+        roles["with" if str(p).endswith("_with") else "subject"][p] += 1
+    for _, _, d in G.in_edges(node, data=True):
+        p = d.get("predicate", "<missing>")
+        roles["with" if str(p).endswith("_with") else "object"][p] += 1
+    return {
+        "present": True,
+        "node_type": data.get("node_type", "<missing>"),
+        "label": data.get("label", "<missing>"),
+        **{f"as_{k}": dict(sorted(c.items(), key=lambda kv: (-kv[1], kv[0]))) for k, c in roles.items()},
+    }
+
+def direct_connections(G: Any, node: str, layer: str, with_limit: Optional[int] = Q2_WITH_LIMIT) -> Dict[str, Any]:
+    """Q2 for one layer: subject/object statements and '_with' links (evidence: top by weight)."""
+    if node not in G:
+        return {"present": False}
+    as_subject, as_object, with_links = [], [], []
+    for _, other, d in G.out_edges(node, data=True):
+        p = d.get("predicate", "<missing>")
+        if str(p).endswith("_with"):
+            with_links.append((p, other, d.get("weight")))
+        else:
+            as_subject.append([node, p, other])
+    for other, _, d in G.in_edges(node, data=True):
+        p = d.get("predicate", "<missing>")
+        if str(p).endswith("_with"):
+            with_links.append((p, other, d.get("weight")))
+        else:
+            as_object.append([other, p, node])
+
+    if layer == "evidence":
+        with_links.sort(key=lambda r: (r[0] != "cooccurs_with", -(r[2] if r[2] == r[2] and r[2] is not None else -1), r[1]))
+    else:
+        with_links.sort(key=lambda r: (r[0], r[1]))
+    shown = with_links if with_limit is None or layer != "evidence" else with_links[:with_limit]
+    data = G.nodes[node]
+    return {
+        "present": True,
+        "node_type": data.get("node_type", "<missing>"),
+        "label": data.get("label", "<missing>"),
+        "as_subject": sorted(as_subject),
+        "as_object": sorted(as_object),
+        "with": [{"predicate": p, "node_id": o, "weight": None if w is None or w != w else float(w)} for p, o, w in shown],
+        "with_total": len(with_links),
+    }
+
+def neighbourhood(state: QueryState, node: str, layers: Sequence[str] = ("evidence", "semantic"), with_limit: Optional[int] = Q2_WITH_LIMIT) -> Dict[str, Any]:
+    """Q1 + Q2 around a node in each requested layer."""
+    out: Dict[str, Any] = {"node": node}
+    for layer in layers:
+        G = _layer(state, layer)
+        out[layer] = {"orientation": node_orientation(G, node), "connections": direct_connections(G, node, layer, with_limit)}
+    return out
+
+def semantic_paths(state: QueryState, start: str, end: str, max_paths: int = 10, max_length: int = 5, mode: str = "undirected") -> Dict[str, Any]:
+    """Q4 ranked paths between two semantic nodes."""
+    for n in (start, end):
+        if n not in state.semantic:
+            return {"start": start, "end": end, "present": False, "missing": n, "paths": [], "more": False}
+    found, more = state.finder.paths(start, end, max_paths=max_paths, max_length=max_length, mode=mode)
+    keep = ("path", "edge_count", "cost", "penalty", "total_cost", "hops", "display_rows")
+    return {"start": start, "end": end, "present": True, "paths": [{k: p[k] for k in keep if k in p} for p in found], "more": more}
+
+def search_chunks(
+    state: QueryState,
+    query: str,
+    source_types: Optional[Sequence[str]] = None,
+    entities: Optional[Sequence[str]] = None,
+    limit: int = 10,
+    snippets: bool = True,
+) -> Dict[str, Any]:
+    """BM25 full-text chunk search (entities as ids or names, all of)."""
+    if state.search is None:
+        raise ValueError(f"No chunk search index ({SEARCH_FILENAME}) among the loaded artifacts")
+    entity_ids = []
+    for name in entities or ():
+        ids = state.engine.find_entity_ids(name)
+        if not ids:
+            return {"query": query, "hits": []}
+        entity_ids.append(ids[0])
+    return {"query": query, "hits": state.search.search(query, limit, source_types, entity_ids, snippets=snippets)}
+
+# ------------------------------------------------------------------
+# Service
+# ------------------------------------------------------------------
+class QueryService:
+    """
+    Long-running asyncio HTTP/1.1 server (TCP on localhost or a Unix socket)
+    over one warm QueryState. Requests run on worker threads against the
+    state current at dispatch; a background task polls the artifact files
+    and swaps in a fully loaded new state, so readers never see a half-built
+    one. A failed reload keeps the old state and is reported by /health.
+    """
+
+    def __init__(self, paths: ArtifactPaths, poll_interval: Optional[float] = POLL_INTERVAL_S):
+        self.paths = paths
+        self.poll_interval = poll_interval
+        self.state: Optional[QueryState] = None
+        self.last_error: Optional[str] = None
+        self.requests = 0
+        self._reload_lock = asyncio.Lock()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self.routes: Dict[str, Callable[[QueryState, Dict[str, Any]], Any]] = {
+            "/resolve": lambda s, q: resolve_entity(s, _text(q["name"], "name"), _bool(q.get("aliases", True))),
+            "/chunks": lambda s, q: lookup_chunks(
+                s, _list(q.get("all")), _list(q.get("any")), _list(q.get("none")),
+                _text(q["player"], "player") if q.get("player") else None,
+                _list(q.get("source_types")) or None, _list(q.get("ids")) or None, _int(q.get("limit"), "limit", 50),
+                _bool(q.get("aliases", True)),
+            ),
+            "/cooccurring": lambda s, q: {
+                "query": _text(q["name"], "name"),
+                "rows": _records(s.engine.cooccurring(_text(q["name"], "name"), _bool(q.get("aliases", True)))),
+            },
+            "/neighbourhood": lambda s, q: neighbourhood(
+                s, _text(q["node"], "node"), _list(q.get("layers")) or ("evidence", "semantic"),
+                None if str(q.get("with_limit", "")).lower() in ("all", "none") else _int(q.get("with_limit"), "with_limit", Q2_WITH_LIMIT),
+            ),
+            "/paths": lambda s, q: semantic_paths(
+                s, _text(q["start"], "start"), _text(q["end"], "end"), _int(q.get("max_paths"), "max_paths", 10),
+                _int(q.get("max_length"), "max_length", 5), _text(q.get("mode") or "undirected", "mode"),
+            ),
+            "/search": lambda s, q: search_chunks(
+                s, _text(q["q"], "q"), _list(q.get("source_types")) or None, _list(q.get("entities")),
+                _int(q.get("limit"), "limit", 10), _bool(q.get("snippets", True)),
+            ),
+        }
+
+    # --- lifecycle ---
+    async def reload(self, force: bool = False) -> bool:
+        """Rebuild the state if the artifacts changed (or force); True when a new state was installed."""
+        async with self._reload_lock:
+            sig = await asyncio.to_thread(self.paths.signature)
+            if not force and self.state is not None and sig == self.state.signature:
+                return False
+            generation = self.state.generation + 1 if self.state else 1
+            try:
+                new = await asyncio.to_thread(load_state, self.paths, generation)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                if self.state is None:
+                    raise
+                return False
+            self.state, self.last_error = new, None
+            return True
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.reload()
+            except Exception as e:  # keep watching; reported via /health
+                self.last_error = f"{type(e).__name__}: {e}"
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: Optional[Path] = None) -> None:
+        await self.reload(force=True)
+        if unix_path is not None:
+            Path(unix_path).unlink(missing_ok=True)
+            self._server = await asyncio.start_unix_server(self._handle, path=str(unix_path))
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        if self.poll_interval:
+            self._watcher = asyncio.create_task(self._watch())
+
+    @property
+    def address(self) -> Any:
+        return self._server.sockets[0].getsockname() if self._server else None
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    # --- HTTP ---
+    def health(self) -> Dict[str, Any]:
+        s = self.state
+        return {
+            "ok": s is not None and self.last_error is None,
+            "generation": s.generation if s else None,
+            "loaded_at": s.loaded_at if s else None,
+            "load_s": s.load_s if s else None,
+            "indexes": str(self.paths.indexes),
+            "chunks": int(len(s.engine.chunk_to_entities)) if s else None,
+            "evidence": {"nodes": s.evidence.number_of_nodes(), "edges": s.evidence.number_of_edges()} if s else None,
+            "semantic": {"nodes": s.semantic.number_of_nodes(), "edges": s.semantic.number_of_edges()} if s else None,
+            "requests": self.requests,
+            "last_error": self.last_error,
+        }
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        url = urlsplit(target)
+        params: Dict[str, Any] = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if body:
+            try:
+                payload = json.loads(body)
+            except json.JSONDecodeError as e:
+                return 400, {"error": f"Body is not JSON: {e}"}
+            if not isinstance(payload, dict):
+                return 400, {"error": "JSON body must be an object"}
+            params.update(payload)
+
+        if url.path == "/health":
+            return 200, self.health()
+        if url.path == "/reload":
+            if method != "POST":
+                return 405, {"error": "Use POST /reload"}
+            changed = await self.reload(force=_bool(params.get("force", False)))
+            return 200, {"reloaded": changed, **self.health()}
+        route = self.routes.get(url.path)
+        if route is None:
+            return 404, {"error": f"Unknown endpoint: {url.path}", "endpoints": sorted(["/health", "/reload", *self.routes])}
+
+        state = self.state
+        try:
+            result = await asyncio.to_thread(route, state, params)
+        except KeyError as e:
+            return 400, {"error": f"Missing parameter: {e.args[0]}"}
+        except (ValueError, TypeError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:  # every request gets a status line
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+        return 200, {"generation": state.generation, **result}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except ValueError:  # over the StreamReader limit
+                    await self._respond(writer, 400, {"error": "Request line too long"}, close=True)
+                    break
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, close=True)
+                    break
+                headers: Dict[str, str] = {}
+                try:
+                    while True:
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                        k, _, v = line.decode("latin-1").partition(":")
+                        headers[k.strip().lower()] = v.strip()
+                except ValueError:  # line over the StreamReader limit
+                    await self._respond(writer, 431, {"error": "Request header line too long"}, close=True)
+                    break
+                if "transfer-encoding" in headers:
+                    await self._respond(writer, 411, {"error": "Chunked request bodies are not supported; send Content-Length"}, close=True)
+                    break
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {"error": "Bad Content-Length"}, close=True)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Request body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+
+                self.requests += 1
+                status, payload = await self.dispatch(method.upper(), target, body)
+                await self._respond(writer, status, payload, close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], close: bool) -> None:
+        reason = {
+            200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+            413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error",
+        }.get(status, "Error")
+        data = json.dumps(payload, default=str).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+# ------------------------------------------------------------------
+# Client helper (notebooks / table-side tools)
+# ------------------------------------------------------------------
+def query(
+    endpoint: str,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    unix_path: Optional[Path] = None,
+    timeout: float = 30.0,
+    **params: Any,
+) -> Dict[str, Any]:
+    """
+    Call a running service, e.g. query("/paths", start="pers_emily", end="pers_evaine").
+    List parameters are sent as JSON. Raises ValueError with the server's message on errors.
+    """
+    body = json.dumps(params).encode("utf-8") if params else b""
+    if unix_path is None:
+        req = urllib.request.Request(f"http://{host}:{port}{endpoint}", data=body or None, method="POST" if endpoint == "/reload" or body else "GET")
+        req.add_header("Content-Type", "application/json")
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                return json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            raise ValueError(json.loads(e.read()).get("error", str(e))) from None
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(unix_path))
+        method = "POST" if endpoint == "/reload" or body else "GET"
+        sock.sendall(
+            f"{method} {endpoint} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+        )
+        raw = b""
+        while chunk := sock.recv(65536):
+            raw += chunk
+    head, _, data = raw.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    payload = json.loads(data)
+    if status != 200:
+        raise ValueError(payload.get("error", f"HTTP {status}"))
+    return payload
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve IWTC index and graph queries from one warm copy.")
+    parser.add_argument("descriptor", type=Path, help="path to world_repository.yml")
+    parser.add_argument("--artifacts", type=Path, default=None, help="artifact directory (default: indexes.path)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", type=Path, default=None, help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--poll", type=float, default=POLL_INTERVAL_S, help="seconds between artifact checks (0 = no hot reload)")
+    args = parser.parse_args(argv)
+
+    async def run() -> None:
+        service = QueryService(ArtifactPaths.from_descriptor(args.descriptor, args.artifacts), poll_interval=args.poll or None)
+        await service.start(args.host, args.port, args.unix)
+        h = service.health()
+        print(f"Serving {h['indexes']} on {service.address} (generation {h['generation']}, loaded in {h['load_s']}s)", file=sys.stderr)
+        await service.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
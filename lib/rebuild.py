@@ -0,0 +1,624 @@
+# lib/rebuild.py
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import hashlib
+import json
+import pickle
+import time
+
+import pandas as pd
+
+from lib.chunk_search import SEARCH_FILENAME, ChunkSearchIndex
+from lib.chunker import chunk_source
+from lib.columnar import columnar_is_current, write_columnar
+from lib.entity_linker import build_linker, link_entity_mentions
+from lib.evidence_graph import (
+    EVIDENCE_FILENAMES,
+    EdgeCounts,
+    build_evidence_nodes,
+    chunk_edge_rows,
+    vocab_edge_rows,
+)
+from lib.instrument import RunRecorder
+from lib.index_builder import (
+    INDEX_FILENAMES,
+    build_chunk_to_entities,
+    build_player_to_chunks,
+    build_source_files,
+    group_to_chunks,
+    link_author_mentions,
+    sort_to_chunks,
+)
+from lib.semantic_graph import SEMANTIC_FILENAMES
+from lib.source_loader import default_cache_dir, load_sources
+from lib.vocab_tables import build_vocab_df, build_vocab_lookup, load_author_aliases, load_vocab_tables
+
+# Bump when any phase logic changes; forces a full rebuild on the next run
+ENGINE_VERSION = 1
+
+STATE_DIRNAME = "_rebuild"
+MANIFEST_FILENAME = "manifest.json"
+STATE_FILENAME = "state.pkl"
+LOG_FILENAME = "rebuild_log.jsonl"
+
+# Declared dependency graph: artifact -> what it is derived from.
+# Keys are in topological order; plain inputs (files on disk) have no entry.
+ARTIFACT_DEPS: Dict[str, List[str]] = {
+    "chunks_v0": ["sources"],
+    "entity_mentions_v0": ["chunks_v0", "vocab_entities", "vocab_aliases"],
+    "author_mentions_v0": ["chunks_v0", "vocab_entities", "vocab_author_aliases"],
+    "index_source_files_v0": ["chunks_v0"],
+    "index_chunk_to_entities_v0": ["entity_mentions_v0"],
+    "index_entity_to_chunks_v0": ["entity_mentions_v0"],
+    "index_player_to_chunks_v0": ["author_mentions_v0"],
+    "graph_evidence_nodes_v0": ["index_chunk_to_entities_v0", "index_source_files_v0", "vocab_entities", "vocab_aliases"],
+    "graph_evidence_edges_v0": ["index_chunk_to_entities_v0", "vocab_entities", "vocab_aliases"],
+    "graph_semantic_edges_v0": ["relationships", "predicate_policy"],
+    "graph_semantic_nodes_v0": ["relationships", "predicate_policy", "vocab_entities"],
+}
+
+INPUT_NAMES = ["sources", "vocab_entities", "vocab_aliases", "vocab_author_aliases", "relationships", "predicate_policy"]
+
+CHUNK_META_COLS = ["chunk_id", "source_id", "source_type", "file_type", "path", "relpath", "start_line", "end_line", "header_kind"]
+
+# ------------------------------------------------------------------
+# Dependency graph
+# ------------------------------------------------------------------
+def stale_artifacts(changed_inputs: Dict[str, str]) -> Dict[str, str]:
+    """
+    Propagate input changes through ARTIFACT_DEPS.
+    Returns {artifact: reason} in topological order.
+    """
+    reasons: Dict[str, str] = dict(changed_inputs)
+    stale: Dict[str, str] = {}
+    for artifact, deps in ARTIFACT_DEPS.items():
+        hit = [d for d in deps if d in reasons]
+        if hit:
+            why = "; ".join(f"{d}: {reasons[d]}" if d in INPUT_NAMES else f"{d} stale" for d in hit)
+            stale[artifact] = why
+            reasons[artifact] = why
+    return stale
+
+# ------------------------------------------------------------------
+# Manifest (input content hashes)
+# ------------------------------------------------------------------
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _hash_optional(path: Optional[Path]) -> Optional[str]:
+    if not path or not Path(path).exists():
+        return None
+    return _sha256_file(Path(path))
+
+def build_manifest(
+    source_files: Sequence[Dict[str, Any]],
+    inputs: Dict[str, Optional[Path]],
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Hash every input. Source files whose size and mtime are unchanged since
+    the previous manifest reuse the stored hash instead of being re-read.
+    """
+    prev_sources = (previous or {}).get("sources", {})
+    sources: Dict[str, Dict[str, Any]] = {}
+    for item in source_files:
+        path = Path(item["path"])
+        rel = item.get("relpath", str(path))
+        st = path.stat()
+        prev = prev_sources.get(rel)
+        if prev and prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns and prev.get("path") == str(path):
+            digest = prev["sha256"]
+        else:
+            digest = _sha256_file(path)
+        sources[rel] = {
+            "path": str(path),
+            "source_type": item.get("source_type", "unknown"),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": digest,
+        }
+
+    return {
+        "engine_version": ENGINE_VERSION,
+        "source_order": list(sources.keys()),
+        "sources": sources,
+        "inputs": {name: _hash_optional(p) for name, p in inputs.items()},
+    }
+
+def diff_manifests(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+    """Return ({input: reason}, {"added"|"modified"|"removed": [relpaths]})."""
+    if old is None:
+        return {name: "no previous build state" for name in INPUT_NAMES}, {"added": list(new["sources"]), "modified": [], "removed": []}
+    if old.get("engine_version") != new["engine_version"]:
+        return {name: "engine version changed" for name in INPUT_NAMES}, {"added": [], "modified": list(new["sources"]), "removed": []}
+
+    changed: Dict[str, str] = {}
+    old_src, new_src = old.get("sources", {}), new["sources"]
+    sources = {
+        "added": [r for r in new_src if r not in old_src],
+        "modified": [
+            r for r in new_src
+            if r in old_src and any(old_src[r].get(k) != new_src[r][k] for k in ("sha256", "source_type", "path"))
+        ],
+        "removed": [r for r in old_src if r not in new_src],
+    }
+    if any(sources.values()) or old.get("source_order") != new["source_order"]:
+        parts = [f"{len(v)} {k}" for k, v in sources.items() if v] or ["order changed"]
+        changed["sources"] = ", ".join(parts)
+
+    for name, digest in new["inputs"].items():
+        before = old.get("inputs", {}).get(name)
+        if before != digest:
+            changed[name] = "added" if before is None else ("removed" if digest is None else "content changed")
+    return changed, sources
+
+# ------------------------------------------------------------------
+# Persisted state
+# ------------------------------------------------------------------
+def _state_dir(working_drafts_path: Path) -> Path:
+    return Path(working_drafts_path) / STATE_DIRNAME
+
+def _load_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+def _load_state(state_dir: Path) -> Optional[Dict[str, Any]]:
+    p = state_dir / STATE_FILENAME
+    if not p.exists():
+        return None
+    try:
+        with open(p, "rb") as f:
+            state = pickle.load(f)
+    except Exception:
+        return None
+    return state if state.get("engine_version") == ENGINE_VERSION else None
+
+def _save_state(state_dir: Path, manifest: Dict[str, Any], state: Dict[str, Any]) -> None:
+    state_dir.mkdir(parents=True, exist_ok=True)
+    tmp = state_dir / (STATE_FILENAME + ".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(state_dir / STATE_FILENAME)
+    (state_dir / MANIFEST_FILENAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+def read_rebuild_log(working_drafts_path: Path, last: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Entries from the rebuild log, oldest first."""
+    p = _state_dir(working_drafts_path) / LOG_FILENAME
+    if not p.exists():
+        return []
+    entries = [json.loads(line) for line in p.read_text(encoding="utf-8").splitlines() if line.strip()]
+    return entries[-last:] if last else entries
+
+def _empty_state() -> Dict[str, Any]:
+    return {
+        "engine_version": ENGINE_VERSION,
+        "chunks": pd.DataFrame(columns=CHUNK_META_COLS),
+        "entity_mentions": pd.DataFrame(),
+        "author_mentions": pd.DataFrame(),
+        "chunk_to_entities": pd.DataFrame(),
+        "entity_to_chunks": pd.DataFrame(),
+        "edge_counts": EdgeCounts(),
+        "vocab_lookup": None,
+    }
+
+# ------------------------------------------------------------------
+# Patch helpers
+# ------------------------------------------------------------------
+def _renumber_mentions(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concat mention rows, order by chunk (stable within chunk), renumber mention_id."""
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    df = df.sort_values("chunk_id", kind="stable").reset_index(drop=True)
+    df["mention_id"] = range(1, len(df) + 1)
+    return df
+
+def _remap_chunk_rows(df: pd.DataFrame, id_map: Dict[int, int], source_by_chunk: Dict[int, int]) -> pd.DataFrame:
+    """Keep rows of reused chunks, moving them to their new chunk_id/source_id."""
+    if df is None or df.empty:
+        return pd.DataFrame()
+    kept = df[df["chunk_id"].isin(id_map.keys())].copy()
+    kept["chunk_id"] = kept["chunk_id"].map(id_map)
+    kept["source_id"] = kept["chunk_id"].map(source_by_chunk)
+    return kept
+
+def _patch_to_chunks(old: pd.DataFrame, mentions: pd.DataFrame, key: str, affected: Set[str]) -> pd.DataFrame:
+    """Recompute *_to_chunks rows for affected keys only, keep the rest."""
+    if mentions is None or mentions.empty:
+        return pd.DataFrame()
+    if old is None or old.empty:
+        affected = set(mentions[key].astype(str))
+    kept = old[~old[key].astype(str).isin(affected)] if old is not None and not old.empty else None
+    redo = group_to_chunks(mentions[mentions[key].astype(str).isin(affected)], key)
+    merged = pd.concat([f for f in (kept, redo) if f is not None and not f.empty], ignore_index=True)
+    if merged.empty:
+        return merged
+    # groupby order first, then the Phase 8 sort (stable on ties)
+    merged = merged.sort_values([key, "canonical"], kind="stable", na_position="last")
+    return sort_to_chunks(merged, key)
+
+# ------------------------------------------------------------------
+# Engine
+# ------------------------------------------------------------------
+def rebuild(
+    source_files: Sequence[Dict[str, Any]],
+    working_drafts_path: Path,
+    vocab_entities_path: Path,
+    vocab_aliases_path: Optional[Path] = None,
+    author_aliases_path: Optional[Path] = None,
+    relationships_path: Optional[Path] = None,
+    predicate_policy_path: Optional[Path] = None,
+    out_dir: Optional[Path] = None,
+    force: bool = False,
+    max_workers: Optional[int] = None,
+    recorder: Optional[RunRecorder] = None,
+    columnar: bool = False,
+) -> Dict[str, Any]:
+    """
+    Incrementally refresh the v0 index and graph artifacts.
+
+    source_files is the Phase 2 SOURCE_FILES list. Outputs go to out_dir
+    (default: working_drafts). Build state, the input manifest and the
+    rebuild log live in working_drafts/_rebuild. Returns the log entry.
+    Pass a lib.instrument.RunRecorder to get per-phase timings (write its
+    report with recorder.write(working_drafts_path)). With columnar, every
+    artifact CSV also gets a current Parquet twin (lib.columnar). An existing
+    search_chunks_v0.idx in out_dir is rebuilt over the renumbered chunks.
+    """
+    rec = recorder if recorder is not None else RunRecorder(enabled=False)
+    depth = rec.depth
+    try:
+        return _rebuild(
+            source_files, working_drafts_path, vocab_entities_path, vocab_aliases_path,
+            author_aliases_path, relationships_path, predicate_policy_path,
+            out_dir, force, max_workers, rec, columnar,
+        )
+    except BaseException as e:
+        # close phases left open by the raise, so a reused recorder stays balanced
+        rec.abort(e, depth)
+        raise
+
+def _rebuild(
+    source_files: Sequence[Dict[str, Any]],
+    working_drafts_path: Path,
+    vocab_entities_path: Path,
+    vocab_aliases_path: Optional[Path],
+    author_aliases_path: Optional[Path],
+    relationships_path: Optional[Path],
+    predicate_policy_path: Optional[Path],
+    out_dir: Optional[Path],
+    force: bool,
+    max_workers: Optional[int],
+    rec: RunRecorder,
+    columnar: bool,
+) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    working_drafts_path = Path(working_drafts_path)
+    out_dir = Path(out_dir) if out_dir else working_drafts_path
+    state_dir = _state_dir(working_drafts_path)
+
+    inputs = {
+        "vocab_entities": vocab_entities_path,
+        "vocab_aliases": vocab_aliases_path,
+        "vocab_author_aliases": author_aliases_path,
+        "relationships": relationships_path,
+        "predicate_policy": predicate_policy_path,
+    }
+
+    old_manifest = None if force else _load_json(state_dir / MANIFEST_FILENAME)
+    state = None if force else _load_state(state_dir)
+    expected_outputs = [out_dir / INDEX_FILENAMES[k] for k in ("entity_to_chunks", "chunk_to_entities", "source_files")]
+    expected_outputs += [out_dir / f for f in EVIDENCE_FILENAMES.values()]
+    if state is None or any(not p.exists() for p in expected_outputs):
+        old_manifest, state = None, None
+
+    ph = rec.begin("2 manifest", items_in=len(source_files))
+    manifest = build_manifest(source_files, inputs, previous=old_manifest)
+    changed, src_changes = diff_manifests(old_manifest, manifest)
+    rec.end(ph, items_out=len(manifest["sources"]))
+    if force:
+        changed = {name: "forced" for name in INPUT_NAMES}
+    stale = stale_artifacts(changed)
+
+    entry: Dict[str, Any] = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "mode": "full" if state is None else ("noop" if not stale else "incremental"),
+        "changed_inputs": changed,
+        "changed_sources": src_changes,
+        "artifacts": {},
+    }
+
+    if not stale:
+        if columnar:
+            entry["columnar"] = _write_columnar_twins(out_dir, {})
+        entry["duration_s"] = round(time.perf_counter() - t0, 3)
+        _append_log(state_dir, entry)
+        return entry
+
+    old = state or _empty_state()
+    new = dict(old)
+    artifacts = entry["artifacts"]
+
+    entities_df, aliases_df = load_vocab_tables(vocab_entities_path, vocab_aliases_path)
+    vocab_changed = "vocab_entities" in changed or "vocab_aliases" in changed
+    authors_changed = "vocab_author_aliases" in changed or "vocab_entities" in changed
+
+    # --------------------------------------------------------------
+    # chunks_v0: re-chunk only sources that need fresh lines
+    # --------------------------------------------------------------
+    dirty = set(src_changes["added"]) | set(src_changes["modified"])
+    need_lines = set(manifest["sources"]) if vocab_changed else dirty
+
+    to_load = [item for item in source_files if item.get("relpath", str(item["path"])) in need_lines]
+    ph = rec.begin("3 load_sources", items_in=len(to_load))
+    loaded = {
+        s["relpath"]: s
+        for s in load_sources(to_load, cache_dir=default_cache_dir(working_drafts_path), max_workers=max_workers)
+    }
+    rec.end(ph, items_out=sum(len(s["lines"]) for s in loaded.values()))
+
+    ph = rec.begin("5 chunks_v0", items_in=len(source_files))
+    old_chunks = old["chunks"]
+    old_by_rel = {rel: g for rel, g in old_chunks.groupby("relpath", sort=False)} if not old_chunks.empty else {}
+
+    fresh_chunks: List[Dict[str, Any]] = []
+    meta_frames: List[pd.DataFrame] = []
+    id_map: Dict[int, int] = {}
+    next_id = 1
+
+    for source_id, item in enumerate(source_files):
+        rel = item.get("relpath", str(item["path"]))
+        if rel in need_lines:
+            src = dict(loaded[rel], source_id=source_id)
+            part = chunk_source(src, start_id=next_id)
+            fresh_chunks.extend(part)
+            meta_frames.append(pd.DataFrame([{k: c[k] for k in CHUNK_META_COLS} for c in part], columns=CHUNK_META_COLS))
+            next_id += len(part)
+        else:
+            prev = old_by_rel.get(rel, old_chunks.iloc[0:0]).copy()
+            new_ids = list(range(next_id, next_id + len(prev)))
+            id_map.update(zip(prev["chunk_id"].tolist(), new_ids))
+            prev["chunk_id"] = new_ids
+            prev["source_id"] = source_id
+            meta_frames.append(prev)
+            next_id += len(prev)
+
+    chunks_df = pd.concat(meta_frames, ignore_index=True) if meta_frames else pd.DataFrame(columns=CHUNK_META_COLS)
+    new["chunks"] = chunks_df
+    source_by_chunk = dict(zip(chunks_df["chunk_id"], chunks_df["source_id"]))
+    fresh_ids = {c["chunk_id"] for c in fresh_chunks}
+    moved = {o for o, n in id_map.items() if o != n}
+    rec.end(ph, items_out=len(chunks_df))
+
+    if "chunks_v0" in stale:
+        artifacts["chunks_v0"] = {
+            "action": "patched" if state is not None else "recomputed",
+            "reason": stale["chunks_v0"],
+            "chunks_rechunked": len(fresh_chunks),
+            "chunks_renumbered": len(moved),
+        }
+
+    # --------------------------------------------------------------
+    # entity_mentions_v0: relink fresh chunks, move reused ones
+    # --------------------------------------------------------------
+    ph = rec.begin("7b entity_mentions_v0", items_in=len(fresh_chunks))
+    if fresh_chunks:
+        vocab_df = build_vocab_df(entities_df, aliases_df)
+        linked = pd.DataFrame(link_entity_mentions(fresh_chunks, vocab_df, linker=build_linker(vocab_df)))
+    else:
+        linked = pd.DataFrame()
+
+    old_em = old["entity_mentions"]
+    new_em = _renumber_mentions([_remap_chunk_rows(old_em, id_map, source_by_chunk), linked])
+    if new_em.empty:
+        raise ValueError("ENTITY_MENTIONS_V0 is empty after rebuild; check vocab and sources.")
+    new["entity_mentions"] = new_em
+    rec.end(ph, items_out=len(new_em))
+    if "entity_mentions_v0" in stale:
+        artifacts["entity_mentions_v0"] = {"action": "patched" if state is not None else "recomputed", "reason": stale["entity_mentions_v0"], "chunks_relinked": len(fresh_chunks), "rows": len(new_em)}
+
+    # --------------------------------------------------------------
+    # author_mentions_v0
+    # --------------------------------------------------------------
+    ph = rec.begin("7c author_mentions_v0", items_in=len(fresh_chunks))
+    author_map = load_author_aliases(author_aliases_path)
+    kept_am = _remap_chunk_rows(old["author_mentions"], id_map, source_by_chunk)
+    if authors_changed and not kept_am.empty:
+        canon = dict(zip(entities_df["entity_id"], entities_df["canonical"]))
+        kept_am["player_entity_id"] = kept_am["matched_vocab"].map(lambda a: author_map.get(a, ""))
+        kept_am["canonical"] = kept_am["player_entity_id"].map(lambda p: canon.get(p, "") if p else "")
+        kept_am["match_kind"] = kept_am["player_entity_id"].map(lambda p: "author_header" if p else "author_header_unmapped")
+    new_am = _renumber_mentions([kept_am, pd.DataFrame(link_author_mentions(fresh_chunks, entities_df, author_map))])
+    new["author_mentions"] = new_am
+    rec.end(ph, items_out=len(new_am))
+    if "author_mentions_v0" in stale:
+        artifacts["author_mentions_v0"] = {"action": "patched" if state is not None else "recomputed", "reason": stale["author_mentions_v0"], "rows": len(new_am)}
+
+    # --------------------------------------------------------------
+    # Phase 8 index tables
+    # --------------------------------------------------------------
+    ph = rec.begin("8 index tables", items_in=len(new_em))
+    writes: Dict[str, pd.DataFrame] = {}
+
+    if "index_source_files_v0" in stale:
+        writes[INDEX_FILENAMES["source_files"]] = build_source_files(chunks_df)
+        artifacts["index_source_files_v0"] = {"action": "recomputed", "reason": stale["index_source_files_v0"]}
+
+    old_c2e = old["chunk_to_entities"]
+    new_c2e = pd.concat(
+        [f for f in (_remap_chunk_rows(old_c2e, id_map, source_by_chunk), build_chunk_to_entities(new_em[new_em["chunk_id"].isin(fresh_ids)])) if not f.empty],
+        ignore_index=True,
+    ).sort_values(["chunk_id"], ascending=[True]).reset_index(drop=True)
+    new["chunk_to_entities"] = new_c2e
+    if "index_chunk_to_entities_v0" in stale:
+        writes[INDEX_FILENAMES["chunk_to_entities"]] = new_c2e
+        artifacts["index_chunk_to_entities_v0"] = {"action": "patched" if state is not None else "recomputed", "reason": stale["index_chunk_to_entities_v0"], "rows_recomputed": int(new_c2e["chunk_id"].isin(fresh_ids).sum())}
+
+    if "index_entity_to_chunks_v0" in stale:
+        touched_old = old_em[~old_em["chunk_id"].isin(id_map.keys()) | old_em["chunk_id"].isin(moved)] if not old_em.empty else old_em
+        affected = set(touched_old["entity_id"].astype(str)) if not touched_old.empty else set()
+        affected |= set(linked["entity_id"].astype(str)) if not linked.empty else set()
+        new_e2c = _patch_to_chunks(old["entity_to_chunks"], new_em, "entity_id", affected)
+        new["entity_to_chunks"] = new_e2c
+        writes[INDEX_FILENAMES["entity_to_chunks"]] = new_e2c
+        artifacts["index_entity_to_chunks_v0"] = {"action": "patched" if state is not None else "recomputed", "reason": stale["index_entity_to_chunks_v0"], "rows_recomputed": len(affected)}
+
+    if "index_player_to_chunks_v0" in stale:
+        p2c = build_player_to_chunks(new_am)
+        if not p2c.empty:
+            writes[INDEX_FILENAMES["player_to_chunks"]] = p2c
+        artifacts["index_player_to_chunks_v0"] = {"action": "recomputed", "reason": stale["index_player_to_chunks_v0"], "rows": len(p2c)}
+
+    # --------------------------------------------------------------
+    # Evidence graph: patch edge multiset, rebuild nodes
+    # --------------------------------------------------------------
+    rec.end(ph, items_out=sum(len(df) for df in writes.values()))
+
+    ph = rec.begin("E evidence graph", items_in=len(new_c2e))
+    vocab_lookup = build_vocab_lookup(entities_df, aliases_df)
+    if "graph_evidence_edges_v0" in stale:
+        counts: EdgeCounts = old["edge_counts"]
+        cols = ["chunk_id", "relpath", "matched_vocabs", "entity_ids"]
+        if not old_c2e.empty:
+            gone = old_c2e[~old_c2e["chunk_id"].isin(id_map.keys()) | old_c2e["chunk_id"].isin(moved)]
+            for row in gone.loc[:, cols].itertuples(index=False, name=None):
+                counts.remove(chunk_edge_rows(*row))
+        moved_new = {id_map[o] for o in moved}
+        came = new_c2e[new_c2e["chunk_id"].isin(fresh_ids) | new_c2e["chunk_id"].isin(moved_new)]
+        for row in came.loc[:, cols].itertuples(index=False, name=None):
+            counts.add(chunk_edge_rows(*row))
+        if vocab_changed:
+            if old["vocab_lookup"] is not None:
+                counts.remove(vocab_edge_rows(old["vocab_lookup"]))
+            counts.add(vocab_edge_rows(vocab_lookup))
+        new["edge_counts"] = counts
+        new["vocab_lookup"] = vocab_lookup
+        writes[EVIDENCE_FILENAMES["edges"]] = counts.to_frame()
+        artifacts["graph_evidence_edges_v0"] = {"action": "patched" if state is not None else "recomputed", "reason": stale["graph_evidence_edges_v0"], "chunks_patched": len(came) + (len(gone) if not old_c2e.empty else 0)}
+
+    if "graph_evidence_nodes_v0" in stale:
+        source_files_df = build_source_files(chunks_df)
+        writes[EVIDENCE_FILENAMES["nodes"]] = build_evidence_nodes(entities_df, new_c2e, source_files_df, vocab_lookup)
+        artifacts["graph_evidence_nodes_v0"] = {"action": "recomputed", "reason": stale["graph_evidence_nodes_v0"]}
+    rec.end(ph, items_out=sum(len(writes[f]) for f in EVIDENCE_FILENAMES.values() if f in writes))
+
+    # --------------------------------------------------------------
+    # Semantic graph (independent of the evidence graph)
+    # --------------------------------------------------------------
+    if relationships_path and predicate_policy_path and ("graph_semantic_edges_v0" in stale or "graph_semantic_nodes_v0" in stale):
+        ph = rec.begin("G semantic graph")
+        from lib.semantic_graph import (
+            build_relationship_semantics,
+            build_semantic_edges,
+            build_semantic_nodes,
+            load_predicate_rules,
+            load_relationships,
+        )
+        semantics = build_relationship_semantics(load_relationships(relationships_path), load_predicate_rules(predicate_policy_path))
+        writes[SEMANTIC_FILENAMES["edges"]] = build_semantic_edges(semantics)
+        writes[SEMANTIC_FILENAMES["nodes"]] = build_semantic_nodes(semantics, pd.read_csv(vocab_entities_path))
+        for name in ("graph_semantic_edges_v0", "graph_semantic_nodes_v0"):
+            if name in stale:
+                artifacts[name] = {"action": "recomputed", "reason": stale[name]}
+        rec.end(ph, items_out=len(writes[SEMANTIC_FILENAMES["edges"]]))
+
+    # --------------------------------------------------------------
+    # Chunk search index (optional artifact): chunk_ids and mentions moved
+    # --------------------------------------------------------------
+    search_path = out_dir / SEARCH_FILENAME
+    search: Optional[ChunkSearchIndex] = None
+    if search_path.exists() and ("chunks_v0" in stale or "entity_mentions_v0" in stale):
+        ph = rec.begin("S search index", items_in=len(chunks_df))
+        search = _patch_search_index(search_path, chunks_df, fresh_chunks, id_map, new_em)
+        rec.end(ph, items_out=search.n_docs if search is not None else 0)
+        if search is None:
+            artifacts["search_chunks_v0"] = {"action": "removed", "reason": "existing index does not match the previous chunks"}
+        else:
+            artifacts["search_chunks_v0"] = {"action": "recomputed", "reason": stale.get("chunks_v0") or stale["entity_mentions_v0"]}
+
+    # --------------------------------------------------------------
+    # Write outputs, state, manifest, log
+    # --------------------------------------------------------------
+    ph = rec.begin("write outputs", items_in=len(writes))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if "search_chunks_v0" in artifacts:
+        if search is None:
+            search_path.unlink()
+        else:
+            search.save(search_path)
+    for fname, df in writes.items():
+        if fname.startswith("graph_semantic_"):
+            df.to_csv(out_dir / fname, index=False)
+        else:
+            df.to_csv(out_dir / fname, index=False, encoding="utf-8")
+    entry["written"] = sorted(writes)
+    if columnar:
+        entry["columnar"] = _write_columnar_twins(out_dir, writes)
+
+    _save_state(state_dir, manifest, new)
+    rec.end(ph, items_out=sum(len(df) for df in writes.values()))
+    entry["duration_s"] = round(time.perf_counter() - t0, 3)
+    _append_log(state_dir, entry)
+    return entry
+
+def _patch_search_index(
+    path: Path,
+    chunks_df: pd.DataFrame,
+    fresh_chunks: List[Dict[str, Any]],
+    id_map: Dict[int, int],
+    entity_mentions: pd.DataFrame,
+) -> Optional[ChunkSearchIndex]:
+    """
+    Rebuild the search index over the renumbered chunks, taking reused chunk
+    text from the existing index. None when that index does not cover the
+    previous chunks (it would be stale; the caller removes it).
+    """
+    fresh = {c["chunk_id"]: c for c in fresh_chunks}
+    old_id = {n: o for o, n in id_map.items()}
+    old_index: Optional[ChunkSearchIndex] = None
+    old_row: Dict[int, int] = {}
+    if old_id:
+        old_index = ChunkSearchIndex.open(path)
+        old_row = {int(cid): i for i, cid in enumerate(old_index.arrays["chunk_id"].tolist())}
+
+    records = []
+    for row in chunks_df[["chunk_id", "source_type", "relpath", "start_line", "end_line"]].itertuples(index=False):
+        cid = int(row.chunk_id)
+        if cid in fresh:
+            records.append(fresh[cid])
+            continue
+        r = old_row.get(old_id.get(cid, -1))
+        if r is None or old_index.tables["relpaths"][old_index.arrays["relpath"][r]] != row.relpath or int(old_index.arrays["start_line"][r]) != int(row.start_line):
+            return None
+        records.append({
+            "chunk_id": cid,
+            "source_type": row.source_type,
+            "relpath": row.relpath,
+            "start_line": row.start_line,
+            "end_line": row.end_line,
+            "lines": old_index.chunk_text(r),
+        })
+    return ChunkSearchIndex.build(records, entity_mentions, meta=old_index.meta if old_index is not None else None)
+
+def _write_columnar_twins(out_dir: Path, writes: Dict[str, pd.DataFrame]) -> List[str]:
+    """Parquet twins for the CSVs just written and for any existing CSV whose twin is missing or stale."""
+    twins = []
+    for fname in [*INDEX_FILENAMES.values(), *EVIDENCE_FILENAMES.values(), *SEMANTIC_FILENAMES.values()]:
+        p = out_dir / fname
+        if p.exists() and (fname in writes or not columnar_is_current(p)):
+            twins.append(write_columnar(writes[fname] if fname in writes else pd.read_csv(p), p).name)
+    return sorted(twins)
+
+def _append_log(state_dir: Path, entry: Dict[str, Any]) -> None:
+    state_dir.mkdir(parents=True, exist_ok=True)
+    with open(state_dir / LOG_FILENAME, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
@@ -0,0 +1,279 @@
+# lib/relationship_candidates.py
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from lib.columnar import read_artifact
+from lib.index_builder import INDEX_FILENAMES
+
+# Phase R4 / R5 output (kept in sync with IWTC_Semantic_Indexing.ipynb)
+CANDIDATE_COLS = [
+    "subject_id", "predicate", "object_id", "pair_type", "directional",
+    "shared_chunk_count", "shared_file_count", "source_types", "candidate_score", "curation_notes",
+]
+CANDIDATE_FILENAME = "candidate_relationships_{version}_{stamp}.csv"
+INDEX_VERSION = "v0"
+
+EVIDENCE_COLS = ["chunk_id", "source_id", "source_type", "relpath", "chunk_start_line", "chunk_end_line"]
+
+def entity_type(entity_ids: pd.Series) -> pd.Series:
+    """Entity id prefix before the first "_" (the pair_type vocabulary)."""
+    return entity_ids.astype(str).str.split("_", n=1).str[0]
+
+def _entity_list(value: Any) -> List[str]:
+    if isinstance(value, (list, tuple, np.ndarray)):  # columnar artifacts
+        return [str(x) for x in value]
+    return ("" if value is None or (isinstance(value, float) and np.isnan(value)) else str(value)).split("|")
+
+def chunk_entity_evidence(chunk_to_entities: pd.DataFrame) -> pd.DataFrame:
+    """Phase R1: DF_CHUNK_ENTITY_EVIDENCE, one row per distinct (chunk_id, entity_id)."""
+    return (
+        chunk_to_entities[EVIDENCE_COLS + ["entity_ids"]]
+        .assign(entity_id=lambda df: df["entity_ids"].map(_entity_list))
+        .explode("entity_id", ignore_index=True)
+        .assign(entity_id=lambda df: df["entity_id"].fillna("").astype(str).str.strip())
+        .loc[lambda df: df["entity_id"] != ""]
+        .drop(columns=["entity_ids"])
+        .drop_duplicates(subset=["chunk_id", "entity_id"])
+        .reset_index(drop=True)
+    )
+
+def load_pair_type_rules(path: Path) -> pd.DataFrame:
+    """Reviewed pair type policy (pair_type, include, directional), e.g. the Phase R5A export."""
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Pair type rules not found: {path}")
+    rules = pd.read_csv(path)
+    missing = [c for c in ("pair_type", "include", "directional") if c not in rules.columns]
+    if missing:
+        raise ValueError(f"Pair type rules are missing columns {missing}: {path}")
+    rules["pair_type"] = rules["pair_type"].astype(str).str.strip()
+    return rules
+
+# ------------------------------------------------------------------
+# Integer-coded co-occurrence
+# ------------------------------------------------------------------
+class PairIncidence:
+    """
+    R1 evidence as a binary chunk x entity matrix plus per-chunk file and
+    source type codes. Entity codes follow lexical id order, so a < b in
+    code space is the notebook's sorted (entity_id_a, entity_id_b) pair.
+    Pair statistics come from sparse products over the columns of one
+    entity type at a time; per-chunk pair tuples are never built.
+    """
+
+    def __init__(self, evidence: pd.DataFrame):
+        ent_codes, entities = pd.factorize(evidence["entity_id"], sort=True)
+        chunk_codes, _ = pd.factorize(evidence["chunk_id"])
+        self.entities = np.asarray(entities, dtype=object)
+        self.n_chunks = int(chunk_codes.max()) + 1 if len(chunk_codes) else 0
+        self.matrix = sparse.csc_matrix(
+            (np.ones(len(ent_codes), dtype=np.int64), (chunk_codes, ent_codes)),
+            shape=(self.n_chunks, len(self.entities)),
+        )
+
+        # R4 joins chunk attributes back on chunk_id; take them once per chunk
+        first = np.unique(chunk_codes, return_index=True)[1]
+        self.chunk_file = pd.factorize(evidence["relpath"].to_numpy()[first])[0]
+        st_codes, st_names = pd.factorize(evidence["source_type"].to_numpy()[first], sort=True)
+        self.chunk_source_type = st_codes
+        self.source_types = [str(x) for x in st_names]
+
+        types = entity_type(pd.Series(self.entities, dtype=object)).to_numpy()
+        self.type_columns: Dict[str, np.ndarray] = {t: np.flatnonzero(types == t) for t in sorted(set(types))}
+        self._by_source_type: Optional[List[sparse.csc_matrix]] = None
+
+    def _columns(self, entity_type_: str) -> np.ndarray:
+        return self.type_columns.get(entity_type_, np.zeros(0, dtype=np.int64))
+
+    def pairs(self, type_a: str, type_b: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pairs whose lexically smaller id has type_a and larger id type_b:
+        (a codes, b codes, shared chunk counts), ordered by (a, b).
+        """
+        cols_a, cols_b = self._columns(type_a), self._columns(type_b)
+        empty = np.zeros(0, dtype=np.int64)
+        if not len(cols_a) or not len(cols_b):
+            return empty, empty, empty
+        prod = (self.matrix[:, cols_a].T @ self.matrix[:, cols_b]).tocoo()
+        a, b = cols_a[prod.row], cols_b[prod.col]
+        keep = a < b
+        a, b, n = a[keep], b[keep], prod.data[keep].astype(np.int64)
+        order = np.lexsort((b, a))
+        return a[order], b[order], n[order]
+
+    def _lookup(self, counts: sparse.spmatrix, cols_a: np.ndarray, cols_b: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """counts[local a, local b] for global code pairs."""
+        if not len(a):
+            return np.zeros(0, dtype=np.int64)
+        rows, cols = np.searchsorted(cols_a, a), np.searchsorted(cols_b, b)
+        return np.asarray(counts.tocsr()[rows, cols]).ravel().astype(np.int64)
+
+    def file_counts(self, type_a: str, type_b: str, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Distinct files holding a chunk where both ids occur. The type_b columns
+        are expanded to (file, entity) columns, so one product counts chunks
+        per (a, file, b) and a second sums the files per (a, b).
+        """
+        cols_a, cols_b = self._columns(type_a), self._columns(type_b)
+        if not len(a):
+            return np.zeros(0, dtype=np.int64)
+        inc = self.matrix[:, cols_b].tocoo()
+        files = self.chunk_file[inc.row]
+        keep = files >= 0  # relpath missing: not a file
+        key_codes, keys = pd.factorize(files[keep].astype(np.int64) * len(cols_b) + inc.col[keep])
+        by_file = sparse.csr_matrix(
+            (np.ones(len(key_codes), dtype=np.int64), (inc.row[keep], key_codes)), shape=(self.n_chunks, len(keys))
+        )
+        per_file = (self.matrix[:, cols_a].T @ by_file).tocsr()
+        per_file.data[:] = 1
+        collapse = sparse.csr_matrix(
+            (np.ones(len(keys), dtype=np.int64), (np.arange(len(keys)), keys % len(cols_b))), shape=(len(keys), len(cols_b))
+        )
+        return self._lookup(per_file @ collapse, cols_a, cols_b, a, b)
+
+    def source_type_labels(self, type_a: str, type_b: str, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Sorted, "|"-joined source types of the chunks each pair shares (one product per source type)."""
+        cols_a, cols_b = self._columns(type_a), self._columns(type_b)
+        labels = np.full(len(a), "", dtype=object)
+        if not len(a):
+            return labels
+        if self._by_source_type is None:
+            by_row = self.matrix.tocsr()
+            self._by_source_type = [by_row[np.flatnonzero(self.chunk_source_type == code)].tocsc() for code in range(len(self.source_types))]
+        for name, sub in zip(self.source_types, self._by_source_type):
+            present = self._lookup(sub[:, cols_a].T @ sub[:, cols_b], cols_a, cols_b, a, b) > 0
+            labels[present] = np.where(labels[present] == "", name, labels[present] + "|" + name)
+        return labels
+
+def pair_type_summary(incidence: PairIncidence) -> pd.DataFrame:
+    """Phase R3: DF_PAIR_TYPE_SUMMARY (pair_type, pair_rows = chunk-level pair rows)."""
+    types = list(incidence.type_columns)
+    rows = []
+    for i, t in enumerate(types):
+        for u in types[i:]:
+            for first, second in ((t, u), (u, t)) if t != u else ((t, u),):
+                n = incidence.pairs(first, second)[2].sum()
+                if n:
+                    rows.append({"pair_type": f"{first}|{second}", "pair_rows": int(n)})
+    df = pd.DataFrame(rows, columns=["pair_type", "pair_rows"])
+    return df.sort_values(["pair_rows", "pair_type"], ascending=[False, True]).reset_index(drop=True)
+
+def pair_type_rule_template(summary: pd.DataFrame, include: bool = True, directional: bool = False) -> pd.DataFrame:
+    """Phase R3.5: one editable rule per observed pair type."""
+    return pd.DataFrame(
+        {"pair_type": sorted(summary["pair_type"]), "include": include, "directional": directional},
+        columns=["pair_type", "include", "directional"],
+    )
+
+# ------------------------------------------------------------------
+# Candidates
+# ------------------------------------------------------------------
+def iter_candidate_frames(incidence: PairIncidence, rules: pd.DataFrame) -> Iterator[pd.DataFrame]:
+    """
+    Phase R4 rows one included pair_type at a time, in pair_type order and
+    within it in the Phase R5 order (candidate_score desc, subject, object).
+    Excluded pair types are never computed.
+    """
+    included = rules.loc[rules["include"].astype(bool), ["pair_type", "directional"]].drop_duplicates()
+    for pair_type, group in included.groupby("pair_type", sort=True):
+        if pair_type.count("|") != 1:
+            continue
+        type_a, type_b = pair_type.split("|")
+        a, b, shared = incidence.pairs(type_a, type_b)
+        if not len(a):
+            continue
+        base = {
+            "subject_id": incidence.entities[a],
+            "predicate": "",
+            "object_id": incidence.entities[b],
+            "pair_type": pair_type,
+            "shared_chunk_count": shared,
+            "shared_file_count": incidence.file_counts(type_a, type_b, a, b),
+            "source_types": incidence.source_type_labels(type_a, type_b, a, b),
+            "candidate_score": shared,
+            "curation_notes": "",
+        }
+        frames = [pd.DataFrame({**base, "directional": d}) for d in sorted(group["directional"].tolist())]
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        yield (
+            df[CANDIDATE_COLS]
+            .sort_values(["candidate_score", "subject_id", "object_id"], ascending=[False, True, True], kind="stable")
+            .reset_index(drop=True)
+        )
+
+def build_relationship_candidates(chunk_to_entities: pd.DataFrame, rules: pd.DataFrame) -> pd.DataFrame:
+    """Phase R1-R4: DF_RELATIONSHIP_CANDIDATES in the notebook's ranking order."""
+    incidence = PairIncidence(chunk_entity_evidence(chunk_to_entities))
+    frames = list(iter_candidate_frames(incidence, rules))
+    if not frames:
+        return pd.DataFrame(columns=CANDIDATE_COLS)
+    return (
+        pd.concat(frames, ignore_index=True)
+        .sort_values(
+            ["candidate_score", "shared_file_count", "pair_type", "subject_id", "object_id", "directional"],
+            ascending=[False, False, True, True, True, True],
+            kind="stable",
+        )
+        .reset_index(drop=True)
+    )
+
+def write_relationship_candidates(
+    chunk_to_entities: pd.DataFrame,
+    rules: pd.DataFrame,
+    out_dir: Path,
+    stamp: Optional[str] = None,
+) -> Tuple[Path, int]:
+    """
+    Phase R5: stream candidate_relationships_v0_<stamp>.csv one pair_type at
+    a time (same rows and order as the notebook export). Returns (path, rows).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = stamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = out_dir / CANDIDATE_FILENAME.format(version=INDEX_VERSION, stamp=stamp)
+    incidence = PairIncidence(chunk_entity_evidence(chunk_to_entities))
+
+    rows = 0
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        pd.DataFrame(columns=CANDIDATE_COLS).to_csv(f, index=False)
+        for df in iter_candidate_frames(incidence, rules):
+            df.to_csv(f, index=False, header=False)
+            rows += len(df)
+    tmp.replace(path)
+    return path, rows
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate relationship candidates (Semantic Indexing R1-R5) from the chunk index.")
+    parser.add_argument("descriptor", type=Path, help="path to world_repository.yml")
+    parser.add_argument("--rules", type=Path, default=None, help="pair type rules CSV (pair_type, include, directional); omit to print the R3 summary")
+    parser.add_argument("--indexes", type=Path, default=None, help="read index_chunk_to_entities_v0 from here instead of indexes.path")
+    args = parser.parse_args(argv)
+
+    from lib.pipeline import load_world_descriptor
+
+    world = load_world_descriptor(args.descriptor, require_sources=False)
+    indexes = args.indexes or world.indexes
+    if indexes is None:
+        raise ValueError("indexes.path is missing from the descriptor; pass --indexes")
+    c2e = read_artifact(Path(indexes) / INDEX_FILENAMES["chunk_to_entities"])
+
+    if args.rules is None:
+        summary = pair_type_summary(PairIncidence(chunk_entity_evidence(c2e)))
+        print(summary.to_string(index=False))
+        print("\nWrite a rules CSV (pair_type,include,directional) and rerun with --rules.")
+        return 0
+
+    path, rows = write_relationship_candidates(c2e, load_pair_type_rules(args.rules), world.working_drafts)
+    print(f"Wrote: {path} ({rows} rows)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
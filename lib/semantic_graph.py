@@ -0,0 +1,117 @@
+# lib/semantic_graph.py
+from __future__ import annotations
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+from lib.columnar import write_columnar
+from lib.vocab_tables import normalize_vocab_csv
+
+RELATIONSHIP_COLS = {
+    "subject_id": ["subject_id", "subject", "source_id", "from_id"],
+    "predicate": ["predicate", "relationship", "relation", "edge", "verb"],
+    "object_id": ["object_id", "object", "target_id", "to_id"],
+}
+
+PREDICATE_POLICY_FILENAME = "data_policy_predicate_semantic_classes.csv"
+
+SEMANTIC_FILENAMES = {
+    "nodes": "graph_semantic_nodes_v0.csv",
+    "edges": "graph_semantic_edges_v0.csv",
+}
+
+SEMANTIC_EDGE_COLS = [
+    "subject_id", "predicate", "object_id",
+    "subject_type", "object_type", "pair_type",
+    "symmetric", "relationship_class",
+]
+
+def load_relationships(path: Path) -> pd.DataFrame:
+    """Phase R6: canonical relationships, whitespace-normalized and de-duplicated."""
+    path = Path(path)
+    if not path.exists():
+        raise ValueError(f"Canonical relationship file not found: {path}")
+
+    raw = pd.read_csv(path, dtype=str).fillna("")
+    df = normalize_vocab_csv(raw, RELATIONSHIP_COLS, "relationships")
+    if df.empty:
+        raise ValueError("Relationship CSV did not produce any usable rows after normalization.")
+
+    return (
+        df.assign(
+            subject_id=lambda d: d["subject_id"].astype(str).str.strip(),
+            predicate=lambda d: d["predicate"].astype(str).str.strip(),
+            object_id=lambda d: d["object_id"].astype(str).str.strip(),
+        )
+        .loc[lambda d: (d["subject_id"] != "") & (d["predicate"] != "") & (d["object_id"] != "")]
+        .drop_duplicates()
+        .reset_index(drop=True)
+    )
+
+def load_predicate_rules(path: Path) -> pd.DataFrame:
+    """Reviewed predicate policy (predicate, include, symmetric, relationship_class)."""
+    rules = pd.read_csv(Path(path))
+    rules["predicate"] = rules["predicate"].astype(str).str.strip()
+    return rules
+
+def build_relationship_semantics(relationships: pd.DataFrame, predicate_rules: pd.DataFrame) -> pd.DataFrame:
+    """Phase R9: DF_RELATIONSHIP_SEMANTICS."""
+    missing = sorted(set(relationships["predicate"]) - set(predicate_rules["predicate"]))
+    if missing:
+        raise ValueError(f"Predicates missing a policy rule: {missing}")
+
+    return (
+        relationships
+        .assign(
+            subject_type=lambda d: d["subject_id"].str.split("_", n=1).str[0],
+            object_type=lambda d: d["object_id"].str.split("_", n=1).str[0],
+        )
+        .merge(predicate_rules, on="predicate", how="left")
+        .assign(pair_type=lambda d: d["subject_type"] + "|" + d["object_type"])
+        [[
+            "subject_id", "subject_type", "predicate", "object_id", "object_type",
+            "pair_type", "include", "symmetric", "relationship_class",
+        ]]
+        .sort_values(["predicate", "subject_id", "object_id"], ascending=[True, True, True])
+        .reset_index(drop=True)
+    )
+
+def build_semantic_edges(semantics: pd.DataFrame) -> pd.DataFrame:
+    """Phase G1: included relationships in graph edge form."""
+    return (
+        semantics.loc[lambda d: d["include"]][SEMANTIC_EDGE_COLS]
+        .sort_values(["predicate", "subject_id", "object_id"], ascending=[True, True, True])
+    )
+
+def build_semantic_nodes(semantics: pd.DataFrame, entities_raw: pd.DataFrame) -> pd.DataFrame:
+    """Phase G2: distinct endpoints of included edges, labeled from the entity vocab."""
+    label_col = "canonical_name" if "canonical_name" in entities_raw.columns else "canonical"
+    included = semantics.loc[lambda d: d["include"]]
+    return (
+        pd.concat([included["subject_id"], included["object_id"]], ignore_index=True)
+        .drop_duplicates()
+        .to_frame(name="node_id")
+        .assign(node_type=lambda d: d["node_id"].str.split("_", n=1).str[0])
+        .merge(
+            entities_raw[["entity_id", label_col]],
+            left_on="node_id",
+            right_on="entity_id",
+            how="left",
+        )
+        .drop(columns="entity_id")
+        .rename(columns={label_col: "label"})
+        .sort_values(["node_type", "node_id"], ascending=[True, True])
+        .reset_index(drop=True)
+    )
+
+def write_semantic_artifacts(out_dir: Path, nodes: pd.DataFrame, edges: pd.DataFrame, columnar: bool = False) -> List[Path]:
+    """Write graph_semantic_nodes_v0.csv / graph_semantic_edges_v0.csv (promoted names; Parquet twins with columnar)."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = [out_dir / SEMANTIC_FILENAMES["nodes"], out_dir / SEMANTIC_FILENAMES["edges"]]
+    nodes.to_csv(paths[0], index=False)
+    edges.to_csv(paths[1], index=False)
+    if columnar:
+        paths += [write_columnar(nodes, paths[0]), write_columnar(edges, paths[1])]
+    return paths
@@ -0,0 +1,130 @@
+# lib/source_loader.py
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import io
+import json
+import os
+
+# Bump when reader behavior changes so stale cache entries are ignored
+READER_VERSION = 1
+
+TEXT_SUFFIXES = {".md", ".txt"}
+DOCX_SUFFIXES = {".docx"}
+
+# Only formats that are expensive to parse go through the cache + pool.
+# Plain text decodes faster than a cache entry can be read back.
+CACHED_SUFFIXES = DOCX_SUFFIXES
+
+def default_cache_dir(working_drafts_path: Path) -> Path:
+    """Cache location under working_drafts (provisional, safe to delete)."""
+    return Path(working_drafts_path) / "_cache" / "sources"
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def _decode_lines(suffix: str, data: bytes) -> List[str]:
+    """Phase 3 readers, working from bytes already read by the caller."""
+    if suffix in TEXT_SUFFIXES:
+        return data.decode("utf-8", errors="replace").splitlines()
+    if suffix in DOCX_SUFFIXES:
+        import docx  # python-docx; only needed when .docx sources are present
+        doc = docx.Document(io.BytesIO(data))
+        return [p.text for p in doc.paragraphs]  # blank paragraphs preserved as ""
+    raise ValueError(f"Unsupported file type: {suffix}")
+
+def _decode_job(job: Tuple[str, bytes]) -> List[str]:
+    suffix, data = job
+    return _decode_lines(suffix, data)
+
+def _cache_path(cache_dir: Path, digest: str, suffix: str) -> Path:
+    return cache_dir / digest[:2] / f"{digest}{suffix}.json"
+
+def _read_cache(path: Path) -> Optional[List[str]]:
+    if not path.exists():
+        return None
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    if payload.get("reader_version") != READER_VERSION:
+        return None
+    lines = payload.get("lines")
+    return lines if isinstance(lines, list) else None
+
+def _write_cache(path: Path, lines: List[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    tmp.write_text(
+        json.dumps({"reader_version": READER_VERSION, "lines": lines}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    os.replace(tmp, path)
+
+def load_sources(
+    source_files: Sequence[Dict[str, Any]],
+    cache_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Phase 3 loader. Takes the Phase 2 SOURCE_FILES records and returns
+    LOADED_SOURCES records (source_id, path, relpath, source_type,
+    file_type, lines) in the same order.
+
+    - .docx decoding is fanned out across a process pool
+    - decoded .docx lines are cached by content hash under cache_dir
+      (pass None to disable caching)
+    - unchanged files are served from the cache after a single read
+    """
+    cache_dir = Path(cache_dir) if cache_dir is not None else None
+
+    loaded: List[Dict[str, Any]] = []
+    pending: List[Tuple[int, str, bytes, Optional[Path]]] = []  # (pos, suffix, data, cache file)
+
+    for source_id, item in enumerate(source_files):
+        path = Path(item["path"])
+        suffix = path.suffix.lower()
+
+        if suffix not in TEXT_SUFFIXES and suffix not in DOCX_SUFFIXES:
+            raise ValueError(f"Unsupported file type for source_id={source_id}: {path}")
+
+        data = path.read_bytes()
+        lines: Optional[List[str]] = None
+        cache_file: Optional[Path] = None
+
+        if suffix in CACHED_SUFFIXES:
+            if cache_dir is not None:
+                cache_file = _cache_path(cache_dir, _content_hash(data), suffix)
+                lines = _read_cache(cache_file)
+            if lines is None:
+                pending.append((len(loaded), suffix, data, cache_file))
+        else:
+            lines = _decode_lines(suffix, data)
+
+        loaded.append(
+            {
+                "source_id": source_id,
+                "path": path,
+                "relpath": item.get("relpath", str(path)),
+                "source_type": item.get("source_type", "unknown"),
+                "file_type": suffix.lstrip("."),
+                "lines": lines,
+            }
+        )
+
+    if pending:
+        jobs = [(suffix, data) for _, suffix, data, _ in pending]
+        if len(jobs) == 1 or max_workers == 1:
+            decoded = [_decode_job(j) for j in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                decoded = list(pool.map(_decode_job, jobs))
+
+        for (pos, _, _, cache_file), lines in zip(pending, decoded):
+            loaded[pos]["lines"] = lines
+            if cache_file is not None:
+                _write_cache(cache_file, lines)
+
+    return loaded
@@ -1,10 +1,13 @@
 # lib/srd_reader.py
 from __future__ import annotations
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Iterable, Optional, List, Tuple
+import copy
 import json
 import os
 import re
+import sqlite3
 
 # Project root resolution: ENV override → default ~/iwtc-lab
 IWTC_ROOT = Path(os.environ.get("IWTC_ROOT", Path.home() / "iwtc-lab"))
@@ -14,6 +17,11 @@ SRD_DIRS = [
     IWTC_ROOT / "data" / "srd" / "2014",
 ]
 
+# Persistent name/slug index over the SRD monsters files (rebuilt when they change)
+SRD_INDEX_PATH = IWTC_ROOT / "data" / "srd" / "_monster_index.sqlite"
+SRD_INDEX_VERSION = 1
+NORMALIZED_CACHE_SIZE = 512
+
 def _load_json(path: Path) -> Any:
     return json.loads(path.read_text(encoding="utf-8"))
 
@@ -26,34 +34,159 @@ def _find_monsters_files() -> List[Path]:
                     files.append(p)
     return files
 
-def _by_name_casefold(name: str, arr: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-    n = name.casefold()
-    for x in arr:
-        if isinstance(x, dict) and x.get("name", "").casefold() == n:
-            return x
-    return None
+def _records(data: Any) -> List[Any]:
+    # 5e-bits/5e-database uses an array of dicts; some datasets use {"results":[...]}
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        return data["results"]
+    return []
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.casefold()).strip("-")
+
+def _file_signature(files: List[Path]) -> List[Tuple[str, int, int]]:
+    sig = []
+    for f in files:
+        st = f.stat()
+        sig.append((str(f), st.st_size, st.st_mtime_ns))
+    return sig
+
+class SrdIndex:
+    """
+    Casefolded name / slug -> monster record, over every SRD monsters file.
+
+    Built once into a SQLite file (one row per record, stored as compact
+    JSON) and reopened on later runs; rebuilt whenever the set of files or
+    any file's size/mtime changes. Name keys keep the first match in
+    SRD_DIRS/file order, like the linear scan did.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    @classmethod
+    def open(cls, path: Optional[Path] = SRD_INDEX_PATH, rebuild: bool = False) -> "SrdIndex":
+        files = _find_monsters_files()
+        sig = json.dumps([SRD_INDEX_VERSION, _file_signature(files)])
+        conn = None
+        if path is not None:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(path), check_same_thread=False)
+            except (OSError, sqlite3.Error):
+                conn = None
+        if conn is None:
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        except sqlite3.Error:
+            row = None
+        if rebuild or row is None or row[0] != sig:
+            cls._build(conn, files, sig)
+        return cls(conn)
+
+    @staticmethod
+    def _build(conn: sqlite3.Connection, files: List[Path], sig: str) -> None:
+        with conn:
+            conn.executescript(
+                """
+                DROP TABLE IF EXISTS meta;
+                DROP TABLE IF EXISTS records;
+                DROP TABLE IF EXISTS keys;
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE records (rid INTEGER PRIMARY KEY, file TEXT, pos INTEGER, name TEXT, json TEXT);
+                CREATE TABLE keys (kind TEXT, key TEXT, rid INTEGER, PRIMARY KEY (kind, key));
+                """
+            )
+            rid = 0
+            for f in files:
+                for pos, rec in enumerate(_records(_load_json(f))):
+                    if not isinstance(rec, dict):
+                        continue
+                    name = rec.get("name", "")
+                    name = name if isinstance(name, str) else ""
+                    conn.execute(
+                        "INSERT INTO records VALUES (?, ?, ?, ?, ?)",
+                        (rid, str(f), pos, name, json.dumps(rec, ensure_ascii=False, separators=(",", ":"))),
+                    )
+                    # first record wins for each key (files are visited in search order)
+                    conn.execute("INSERT OR IGNORE INTO keys VALUES ('name', ?, ?)", (name.casefold(), rid))
+                    slugs = {_slug(name)}
+                    if isinstance(rec.get("index"), str):
+                        slugs.add(rec["index"].casefold())
+                    for s in slugs - {""}:
+                        conn.execute("INSERT OR IGNORE INTO keys VALUES ('slug', ?, ?)", (s, rid))
+                    rid += 1
+            conn.execute("INSERT INTO meta VALUES ('signature', ?)", (sig,))
+        _normalized.cache_clear()
+
+    def _rids(self, names: List[str]) -> Dict[str, int]:
+        """name (as given) -> record id; exact casefolded name first, then slug."""
+        found: Dict[str, int] = {}
+        for kind, keyf in (("name", str.casefold), ("slug", _slug)):
+            todo = {n: keyf(n) for n in names if n not in found}
+            keys = sorted(set(todo.values()))
+            by_key: Dict[str, int] = {}
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                q = f"SELECT key, rid FROM keys WHERE kind = ? AND key IN ({','.join('?' * len(part))})"
+                by_key.update(self.conn.execute(q, [kind, *part]).fetchall())
+            for n, k in todo.items():
+                if k in by_key:
+                    found[n] = by_key[k]
+        return found
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Raw record (fresh dict, with _source_file) or None."""
+        return self.get_many([name]).get(name)
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """{name: raw record} for the names that were found."""
+        names = list(dict.fromkeys(names))
+        rids = self._rids(names)
+        rows: Dict[int, Tuple[str, str]] = {}
+        uniq = sorted(set(rids.values()))
+        for i in range(0, len(uniq), 500):
+            part = uniq[i:i + 500]
+            q = f"SELECT rid, file, json FROM records WHERE rid IN ({','.join('?' * len(part))})"
+            rows.update((rid, (f, j)) for rid, f, j in self.conn.execute(q, part))
+        out = {}
+        for n in names:
+            if n in rids:
+                f, j = rows[rids[n]]
+                rec = json.loads(j)
+                rec["_source_file"] = Path(f)  # provenance
+                out[n] = rec
+        return out
+
+    def names(self) -> List[str]:
+        """Every indexed monster name, in search order."""
+        return [r[0] for r in self.conn.execute("SELECT name FROM records ORDER BY rid")]
+
+_INDEX: Optional[SrdIndex] = None
+_INDEX_SIG: Optional[List[Tuple[str, int, int]]] = None
+
+def get_index(rebuild: bool = False) -> SrdIndex:
+    """Process-wide SrdIndex; reopened (and rebuilt if stale) when the SRD files change."""
+    global _INDEX, _INDEX_SIG
+    sig = _file_signature(_find_monsters_files())
+    if rebuild or _INDEX is None or sig != _INDEX_SIG:
+        _INDEX = SrdIndex.open(SRD_INDEX_PATH, rebuild=rebuild)
+        _INDEX_SIG = sig
+        _normalized.cache_clear()
+    return _INDEX
 
 def load_monster_raw(name: str) -> Dict[str, Any]:
     """
     Returns the raw JSON object for a monster from SRD (search 2024 then 2014).
     Raises FileNotFoundError if not found anywhere.
     """
-    files = _find_monsters_files()
-    for f in files:
-        data = _load_json(f)
-        # 5e-bits/5e-database uses an array of dicts for monsters resources.
-        if isinstance(data, list):
-            hit = _by_name_casefold(name, data)
-            if hit:
-                hit["_source_file"] = f  # provenance
-                return hit
-        # Some datasets use {"results":[...]}
-        if isinstance(data, dict) and "results" in data and isinstance(data["results"], list):
-            hit = _by_name_casefold(name, data["results"])
-            if hit:
-                hit["_source_file"] = f
-                return hit
-    raise FileNotFoundError(f"Monster '{name}' not found in SRD monsters JSON: {files}")
+    hit = get_index().get(name)
+    if hit is None:
+        raise FileNotFoundError(f"Monster '{name}' not found in SRD monsters JSON: {_find_monsters_files()}")
+    return hit
 
 def _stat(d: Dict[str, Any], k: str, fallback: int = 10) -> int:
     v = d.get(k) or d.get(k.upper()) or d.get(k.capitalize())
@@ -177,3 +310,34 @@ def normalize_minimal(raw: Dict[str, Any]) -> Dict[str, Any]:
     if src:
         out["_source_file"] = str(Path(src))
     return out
+
+@lru_cache(maxsize=NORMALIZED_CACHE_SIZE)
+def _normalized(key: str) -> Dict[str, Any]:
+    # key is the casefolded name, so "Goblin" and "goblin" share one entry
+    return normalize_minimal(load_monster_raw(key))
+
+def load_monster(name: str) -> Dict[str, Any]:
+    """normalize_minimal(load_monster_raw(name)), LRU-cached; returns a copy safe to edit."""
+    get_index()  # drops cached records if the SRD files changed
+    return copy.deepcopy(_normalized(name.casefold()))
+
+def load_monsters(names: Iterable[str], normalize: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Bulk lookup: {name: record} in the order given (normalized unless
+    normalize=False). Raises FileNotFoundError listing every missing name.
+    """
+    names = list(dict.fromkeys(names))
+    if normalize:
+        get_index()  # drops cached records if the SRD files changed
+        found = {}
+        for n in names:
+            try:
+                found[n] = copy.deepcopy(_normalized(n.casefold()))
+            except FileNotFoundError:
+                pass
+    else:
+        found = get_index().get_many(names)
+    missing = [n for n in names if n not in found]
+    if missing:
+        raise FileNotFoundError(f"Monsters not found in SRD monsters JSON: {missing}")
+    return {n: found[n] for n in names}
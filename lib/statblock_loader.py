@@ -1,8 +1,11 @@
 # lib/statblock_loader.py
 from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+import hashlib
 import json
+import os
 from ruamel.yaml import YAML
 
 _yaml = YAML(typ="safe")
@@ -22,11 +25,20 @@ SEARCH_ORDER = [
     DATA_DIR / "licensed",   # JSON (read-only)
     DATA_DIR / "srd",        # JSON (read-only)
 ]
+EXTENSIONS = (".yaml", ".yml", ".json")
+
+# Compiled statblock.v1 library (one JSON file, keyed by slug)
+LIBRARY_CACHE = DATA_DIR / "cache" / "statblock_library.json"
+LIBRARY_VERSION = 1
+
+def _slug(name: str) -> str:
+    """Monster name -> file stem ("Giant Rat" -> "giant-rat")."""
+    return name.strip().lower().replace(" ", "-")
 
 def _find_file(monster: str) -> Optional[Path]:
-    slug = monster.strip().lower().replace(" ", "-")
+    slug = _slug(monster)
     for base in SEARCH_ORDER:
-        for ext in (".yaml", ".yml", ".json"):
+        for ext in EXTENSIONS:
             p = base / "monsters" / f"{slug}{ext}"
             if p.exists():
                 return p
@@ -151,11 +163,190 @@ def load_statblock(monster: str) -> Tuple[Dict[str, Any], Path]:
 
 def save_homebrew(monster_slug: str, data_v1: Dict[str, Any]) -> Path:
     """Write only under homebrew. Raises if target would be SRD or licensed."""
-    target = DATA_DIR / "homebrew" / "monsters" / f"{monster_slug}.yaml"
+    target = DATA_DIR / "homebrew" / "monsters" / f"{_slug(monster_slug)}.yaml"
     target.parent.mkdir(parents=True, exist_ok=True)
     # Validate before writing
     errs = validate_statblock(data_v1)
     if errs:
         raise ValueError("Refusing to write invalid statblock:\n- " + "\n- ".join(errs))
-    _yaml.dump(data_v1, target.open("w", encoding="utf-8"))
+    with target.open("w", encoding="utf-8") as fh:
+        _yaml.dump(data_v1, fh)
+    _update_library(target, data_v1)
     return target
+
+# ---------------------------------------------------------------------------
+# Library compiler: every statblock, normalized + validated, in one cache file
+# ---------------------------------------------------------------------------
+
+# this session's copy of the library doc, and the cache file it belongs to
+_LIBRARY: Optional[Dict[str, Any]] = None
+_LIBRARY_PATH: Optional[Path] = None
+
+def _sha1(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+def _discover() -> Dict[str, Path]:
+    """slug -> the file load_statblock() would pick (SEARCH_ORDER, then extension order)."""
+    winners: Dict[str, Tuple[int, int, Path]] = {}
+    for b, base in enumerate(SEARCH_ORDER):
+        mdir = base / "monsters"
+        if not mdir.is_dir():
+            continue
+        for p in mdir.iterdir():
+            slug, ext = p.stem, p.suffix
+            # only names _find_file() can produce
+            if ext not in EXTENSIONS or slug != _slug(slug) or not p.is_file():
+                continue
+            rank = (b, EXTENSIONS.index(ext), p)
+            if slug not in winners or rank[:2] < winners[slug][:2]:
+                winners[slug] = rank
+    return {slug: r[2] for slug, r in sorted(winners.items())}
+
+def _compile_file(path: Path) -> Dict[str, Any]:
+    """One library entry: file signature plus the statblock or its errors."""
+    st = path.stat()
+    entry: Dict[str, Any] = {
+        "path": str(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha1": _sha1(path),
+        "statblock": None,
+        "errors": [],
+    }
+    try:
+        norm = _normalize_to_v1(_load_any(path))
+        errs = validate_statblock(norm)
+    except Exception as e:
+        errs = [f"{type(e).__name__}: {e}"]
+    if errs:
+        entry["errors"] = list(errs)
+    else:
+        entry["statblock"] = norm
+    return entry
+
+def _entry_current(entry: Optional[Dict[str, Any]], path: Path) -> bool:
+    """True if a cached entry still describes path (size+mtime, else content hash)."""
+    if not entry or entry.get("path") != str(path):
+        return False
+    st = path.stat()
+    if entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+        return True
+    if entry.get("size") == st.st_size and entry.get("sha1") == _sha1(path):
+        entry["mtime_ns"] = st.st_mtime_ns
+        return True
+    return False
+
+def _read_library(cache_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        doc = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if doc.get("version") != LIBRARY_VERSION or doc.get("search_order") != [str(p) for p in SEARCH_ORDER]:
+        return None
+    return doc
+
+def _session_or_cached(cache_path: Path) -> Optional[Dict[str, Any]]:
+    if _LIBRARY is not None and _LIBRARY_PATH == cache_path:
+        return _LIBRARY
+    return _read_library(cache_path)
+
+def _write_library(doc: Dict[str, Any], cache_path: Path) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_suffix(cache_path.suffix + ".tmp")
+    tmp.write_text(json.dumps(doc, ensure_ascii=False, default=str), encoding="utf-8")
+    os.replace(tmp, cache_path)
+
+def compile_library(
+    cache_path: Path = LIBRARY_CACHE,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> Dict[str, Any]:
+    """
+    Walk homebrew/, licensed/ and srd/ once and write the compiled library.
+
+    Precedence matches load_statblock(). Only files whose size/mtime (and
+    then content hash) changed since the last compile are re-parsed;
+    those are spread across a process pool (workers=1 parses in-process).
+    Returns the cache doc: {"entries": {slug: entry}} where each entry has
+    the source path, signature, and either "statblock" or "errors".
+    """
+    global _LIBRARY, _LIBRARY_PATH
+    cache_path = Path(cache_path)
+    old = None if force else _session_or_cached(cache_path)
+    old_entries = (old or {}).get("entries", {})
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    todo: List[Tuple[str, Path]] = []
+    touched = False
+    for slug, path in _discover().items():
+        entry = old_entries.get(slug)
+        mtime = entry.get("mtime_ns") if entry else None
+        if _entry_current(entry, path):
+            entries[slug] = entry
+            touched |= entry["mtime_ns"] != mtime
+        else:
+            todo.append((slug, path))
+
+    if todo:
+        paths = [p for _, p in todo]
+        if workers == 1 or len(paths) < 2:
+            compiled = [_compile_file(p) for p in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                compiled = list(pool.map(_compile_file, paths, chunksize=16))
+        entries.update((slug, e) for (slug, _), e in zip(todo, compiled))
+
+    doc = {
+        "version": LIBRARY_VERSION,
+        "search_order": [str(p) for p in SEARCH_ORDER],
+        "entries": dict(sorted(entries.items())),
+    }
+    if old is None or todo or touched or set(old_entries) != set(entries):
+        _write_library(doc, cache_path)
+    _LIBRARY, _LIBRARY_PATH = doc, cache_path
+    return doc
+
+def load_library(cache_path: Path = LIBRARY_CACHE, refresh: bool = True, workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    {slug: statblock.v1} for every valid statblock, from the compiled cache.
+    refresh=False trusts the cache file (or this session's copy) as is.
+    """
+    global _LIBRARY, _LIBRARY_PATH
+    cache_path = Path(cache_path)
+    doc = None
+    if not refresh:
+        doc = _session_or_cached(cache_path)
+    if doc is None:
+        doc = compile_library(cache_path, workers=workers)
+    _LIBRARY, _LIBRARY_PATH = doc, cache_path
+    return {slug: e["statblock"] for slug, e in doc["entries"].items() if e.get("statblock") is not None}
+
+def load_library_doc(cache_path: Path = LIBRARY_CACHE) -> Dict[str, Any]:
+    """The full cache doc (entries incl. errors), compiling it if missing."""
+    return _session_or_cached(Path(cache_path)) or compile_library(cache_path)
+
+def library_errors(cache_path: Path = LIBRARY_CACHE) -> Dict[str, List[str]]:
+    """{slug: validation errors} for files that failed to compile."""
+    doc = load_library_doc(cache_path)
+    return {slug: e["errors"] for slug, e in doc["entries"].items() if e.get("errors")}
+
+def _update_library(path: Path, data_v1: Dict[str, Any], cache_path: Path = LIBRARY_CACHE) -> None:
+    """save_homebrew() hook: refresh one slug in an existing cache without a full compile."""
+    global _LIBRARY, _LIBRARY_PATH
+    cache_path = Path(cache_path)
+    doc = _session_or_cached(cache_path)
+    if doc is None:
+        return  # no library yet; the next compile_library() picks the file up
+    # homebrew/<slug>.yaml is first in precedence, so it always wins its slug
+    st = path.stat()
+    doc["entries"][_slug(path.stem)] = {
+        "path": str(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha1": _sha1(path),
+        "statblock": json.loads(json.dumps(_normalize_to_v1(data_v1), default=str)),
+        "errors": [],
+    }
+    doc["entries"] = dict(sorted(doc["entries"].items()))
+    _write_library(doc, cache_path)
+    _LIBRARY, _LIBRARY_PATH = doc, cache_path
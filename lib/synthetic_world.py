@@ -0,0 +1,296 @@
+# lib/synthetic_world.py
+from __future__ import annotations
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import csv
+import random
+import shutil
+
+# Written into every generated world; generate_world(overwrite=True) only removes roots that have it
+SPEC_MARKER = Path("_meta") / "descriptors" / "synthetic_spec.txt"
+
+# Source types and the Phase 5 header styles each one exercises
+SOURCE_TYPES = ["session_notes", "pbp_transcripts", "auto_transcripts", "planning_notes", "recollections"]
+
+ENTITY_TYPES = ["person", "place", "faction", "org", "artifact", "creat"]
+
+# (predicate, include, symmetric, relationship_class, Q4 cost, reverse label)
+PREDICATES: List[Tuple[str, bool, bool, str, float, str]] = [
+    ("allied_with", True, True, "political", 2.0, "allied_with"),
+    ("at_war_with", True, True, "political", 2.0, "at_war_with"),
+    ("based_at", True, False, "location", 1.0, "base_of"),
+    ("belongs_to", True, False, "ownership", 1.0, "owns"),
+    ("current_member_of", True, False, "membership", 1.0, "has_member"),
+    ("former_member_of", True, False, "membership", 2.0, "had_member"),
+    ("leader_of", True, False, "leadership", 1.0, "led_by"),
+    ("knows_about", True, False, "knowledge", 3.0, "known_by"),
+    ("sibling_with", True, True, "kinship", 1.0, "sibling_with"),
+    ("parent_of", True, False, "kinship", 1.0, "child_of"),
+    ("rumored_with", False, True, "rumor", 5.0, "rumored_with"),
+]
+
+_SYLLABLES = [
+    "al", "an", "ar", "bel", "bra", "cor", "dar", "del", "el", "fen", "gar", "hal", "is", "jor", "kel",
+    "lor", "mar", "mir", "nor", "or", "pel", "quin", "ral", "sar", "sel", "tal", "tor", "ul", "val", "wen",
+    "xan", "yor", "zel", "ost", "vane", "rin", "dun", "ash", "mor", "thal",
+]
+_FILLER = (
+    "the a and to of in at on with from by we they she he it was were then went met saw found "
+    "told asked rain night fire road gate hall tower market river storm letter map blade coin "
+    "quietly later again before after because while during under over across toward"
+).split()
+_AUTHORS = ["zed", "Ana B", "bob b", "Quill", "marrow", "Vex", "tessa", "Old Tom", "ryn", "juniper"]
+
+@dataclass
+class WorldSpec:
+    """Scale knobs for generate_world(); the same spec and seed give the same world."""
+    files: int = 40
+    lines_per_file: int = 200
+    lines_per_chunk: int = 12
+    vocab_size: int = 150
+    aliases_per_entity: float = 0.5
+    entities_per_chunk: float = 3.0
+    players: int = 5
+    relationships: int = 300
+    seed: int = 0
+
+# Named scales used by lib.benchmark
+SIZES: Dict[str, WorldSpec] = {
+    "tiny": WorldSpec(files=8, lines_per_file=80, vocab_size=40, relationships=60),
+    "small": WorldSpec(files=40, lines_per_file=200, vocab_size=150, relationships=300),
+    "medium": WorldSpec(files=200, lines_per_file=400, vocab_size=800, relationships=2000),
+    "large": WorldSpec(files=800, lines_per_file=600, vocab_size=3000, relationships=10000),
+}
+
+@dataclass
+class SyntheticWorld:
+    """Paths and tables of a generated world (mirrors a descriptor-resolved repo)."""
+    root: Path
+    spec: WorldSpec
+    descriptor: Path
+    working_drafts: Path
+    indexes: Path
+    vocab_entities: Path
+    vocab_aliases: Path
+    author_aliases: Path
+    player_character_map: Path
+    relationships: Path
+    predicate_policy: Path
+    source_files: List[Dict[str, Any]] = field(default_factory=list)
+    predicate_cost: Dict[str, float] = field(default_factory=dict)
+    predicate_reverse: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def total_lines(self) -> int:
+        return self.spec.files * self.spec.lines_per_file
+
+def _name(r: random.Random, used: set, words: int) -> str:
+    while True:
+        parts = []
+        for _ in range(words):
+            w = "".join(r.choice(_SYLLABLES) for _ in range(r.randint(2, 3)))
+            parts.append(w.capitalize())
+        name = " ".join(parts)
+        if name not in used:
+            used.add(name)
+            return name
+
+def _make_vocab(r: random.Random, spec: WorldSpec) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, str]], List[Tuple[str, str, str]]]:
+    """(entities [(id, canonical, type)], aliases [(id, alias)], players [(id, name, author handle)])."""
+    used: set = set()
+    entities = []
+    for i in range(spec.vocab_size):
+        etype = ENTITY_TYPES[i % len(ENTITY_TYPES)]
+        name = _name(r, used, r.choice([1, 1, 2, 2, 3]))
+        entities.append((f"{etype}_{name.lower().replace(' ', '_')}_{i:05d}", name, etype))
+
+    aliases = []
+    for eid, name, _ in entities:
+        if r.random() < spec.aliases_per_entity:
+            parts = name.split()
+            aliases.append((eid, parts[-1] if len(parts) > 1 else _name(r, used, 1)))
+
+    players = []
+    for i in range(spec.players):
+        name = _name(r, used, 2)
+        handle = _AUTHORS[i % len(_AUTHORS)] + ("" if i < len(_AUTHORS) else str(i))
+        players.append((f"player_{name.lower().replace(' ', '_')}", name, handle))
+    return entities, aliases, players
+
+def _prose(r: random.Random, names: List[str], p_mention: float) -> str:
+    words = []
+    for _ in range(r.randint(6, 18)):
+        if r.random() < p_mention:
+            n = r.choice(names)
+            words.append(n if r.random() < 0.8 else n.lower())
+        else:
+            words.append(r.choice(_FILLER))
+    return " ".join(words)
+
+def _time(r: random.Random) -> str:
+    return f"{r.randint(1, 12)}:{r.randint(0, 59):02d} {r.choice(['AM', 'PM'])}"
+
+def _header(r: random.Random, source_type: str, n: int, handles: List[str]) -> str:
+    """One Phase 5 header line in the style of the source type."""
+    if source_type == "session_notes":
+        return f"## Session {n}" if r.random() < 0.5 else f"### Scene {n}"
+    if source_type == "pbp_transcripts":
+        author = r.choice(handles)
+        if r.random() < 0.7:
+            return f"* ### **{author}** **{_time(r)}**"
+        return f"**{author} — {_time(r)}**"
+    if source_type == "auto_transcripts":
+        return f"{r.randint(0, 2)}:{r.randint(0, 59):02d}:{r.randint(0, 59):02d}"
+    if source_type == "planning_notes":
+        return f"{'#' * r.randint(1, 3)} {r.choice(_FILLER).capitalize()} {n}"
+    return ""  # recollections: untyped prose, preamble only
+
+def _file_lines(r: random.Random, spec: WorldSpec, source_type: str, names: List[str], handles: List[str]) -> List[str]:
+    p_mention = min(1.0, spec.entities_per_chunk / max(1, spec.lines_per_chunk) / 12.0)
+    lines: List[str] = []
+    n = 1
+    while len(lines) < spec.lines_per_file:
+        if len(lines) % max(1, spec.lines_per_chunk) == 0:
+            h = _header(r, source_type, n, handles)
+            n += 1
+            if h:
+                lines.append(h)
+                continue
+        lines.append("" if r.random() < 0.08 else _prose(r, names, p_mention))
+    return lines[: spec.lines_per_file]
+
+def _write_csv(path: Path, header: List[str], rows: List[Tuple[Any, ...]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        w.writerows(rows)
+
+def _descriptor_text(root: Path) -> str:
+    read_paths = "\n".join(
+        f"    - path: _local/{st}\n      type: {st}" for st in SOURCE_TYPES if st != "recollections"
+    )
+    return (
+        "# Synthetic world_repository.yml (generated by lib.synthetic_world)\n"
+        f"world_root: {root.resolve()}\n"
+        "\n"
+        "sources:\n"
+        "  read_paths:\n"
+        f"{read_paths}\n"
+        "    - _local/recollections\n"
+        "\n"
+        "working_drafts:\n"
+        "  path: _local/machine_wip\n"
+        "\n"
+        "indexes:\n"
+        "  path: _meta/indexes\n"
+        "\n"
+        "vocabulary:\n"
+        "  entities: _meta/indexes/vocab_entities.csv\n"
+        "  aliases: _meta/indexes/vocab_aliases.csv\n"
+        "  author_aliases: _meta/indexes/vocab_author_aliases.csv\n"
+        "  player_character_map: _meta/indexes/vocab_map_player_character.csv\n"
+        "  relationships: _meta/indexes/world_relationships.csv\n"
+    )
+
+def generate_world(root: Path, spec: Optional[WorldSpec] = None, overwrite: bool = False) -> SyntheticWorld:
+    """
+    Write a deterministic synthetic world repository under root.
+
+    Layout follows data/config_examples/world_repository.yml: sources under
+    _local/<source_type>/, vocab and relationship CSVs plus the predicate
+    policy under _meta/indexes/, descriptor at _meta/descriptors/. Returns
+    the paths and the Phase 2 SOURCE_FILES list. root must be new or empty;
+    overwrite=True replaces a world this function generated earlier (one
+    with _meta/descriptors/synthetic_spec.txt), never any other directory.
+    """
+    spec = spec or WorldSpec()
+    root = Path(root)
+    if root.exists() and any(root.iterdir()):
+        if not (root / SPEC_MARKER).is_file():
+            raise ValueError(f"Refusing to write into a non-empty directory that is not a generated world: {root}")
+        if not overwrite:
+            raise ValueError(f"World root already exists: {root} (pass overwrite=True to regenerate it)")
+        shutil.rmtree(root)
+    r = random.Random(spec.seed)
+
+    entities, aliases, players = _make_vocab(r, spec)
+    names = [n for _, n, _ in entities] + [a for _, a in aliases]
+    handles = [h for _, _, h in players] or ["anon"]
+
+    # --- sources ---
+    files: List[Tuple[Path, str]] = []
+    for i in range(spec.files):
+        st = SOURCE_TYPES[i % len(SOURCE_TYPES)]
+        p = root / "_local" / st / f"{st}_{i:05d}{'.txt' if r.random() < 0.2 else '.md'}"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text("\n".join(_file_lines(r, spec, st, names, handles)), encoding="utf-8")
+        files.append((p, st if st != "recollections" else "unknown"))
+
+    # --- vocabulary ---
+    indexes = root / "_meta" / "indexes"
+    ent_rows = [(eid, name, etype, "world") for eid, name, etype in entities]
+    ent_rows += [(pid, name, "player", "table") for pid, name, _ in players]
+    _write_csv(indexes / "vocab_entities.csv", ["entity_id", "canonical_name", "entity_type", "layer"], ent_rows)
+    _write_csv(indexes / "vocab_aliases.csv", ["entity_id", "alias"], aliases)
+    _write_csv(indexes / "vocab_author_aliases.csv", ["author", "player_entity_id"], [(h, pid) for pid, _, h in players])
+    people = [eid for eid, _, etype in entities if etype == "person"] or [entities[0][0]]
+    _write_csv(
+        indexes / "vocab_map_player_character.csv",
+        ["player_entity_id", "character_entity_id"],
+        [(pid, people[i % len(people)]) for i, (pid, _, _) in enumerate(players)],
+    )
+
+    # --- curated relationships + predicate policy ---
+    ids = [eid for eid, _, _ in entities]
+    rels = set()
+    while len(rels) < min(spec.relationships, len(ids) * (len(ids) - 1)):
+        a, b = r.sample(ids, 2)
+        rels.add((a, r.choice(PREDICATES)[0], b))
+    _write_csv(indexes / "world_relationships.csv", ["subject_id", "predicate", "object_id"], sorted(rels))
+    _write_csv(
+        indexes / "data_policy_predicate_semantic_classes.csv",
+        ["predicate", "include", "symmetric", "relationship_class"],
+        [(p, inc, sym, cls) for p, inc, sym, cls, _, _ in PREDICATES],
+    )
+
+    # --- descriptor ---
+    descriptor = root / "_meta" / "descriptors" / "world_repository.yml"
+    descriptor.parent.mkdir(parents=True, exist_ok=True)
+    descriptor.write_text(_descriptor_text(root), encoding="utf-8")
+    (root / SPEC_MARKER).write_text(repr(asdict(spec)) + "\n", encoding="utf-8")
+
+    working_drafts = root / "_local" / "machine_wip"
+    working_drafts.mkdir(parents=True, exist_ok=True)
+
+    return SyntheticWorld(
+        root=root,
+        spec=spec,
+        descriptor=descriptor,
+        working_drafts=working_drafts,
+        indexes=indexes,
+        vocab_entities=indexes / "vocab_entities.csv",
+        vocab_aliases=indexes / "vocab_aliases.csv",
+        author_aliases=indexes / "vocab_author_aliases.csv",
+        player_character_map=indexes / "vocab_map_player_character.csv",
+        relationships=indexes / "world_relationships.csv",
+        predicate_policy=indexes / "data_policy_predicate_semantic_classes.csv",
+        source_files=source_files_for(root, files),
+        predicate_cost={p: cost for p, _, _, _, cost, _ in PREDICATES},
+        predicate_reverse={p: rev for p, _, _, _, _, rev in PREDICATES},
+    )
+
+def source_files_for(root: Path, files: List[Tuple[Path, str]]) -> List[Dict[str, Any]]:
+    """Phase 2 SOURCE_FILES records (stable case-insensitive path order)."""
+    ordered = sorted(files, key=lambda t: t[0].as_posix().lower())
+    return [
+        {
+            "source_id": f"src_{i:06d}",
+            "path": p,
+            "relpath": str(p.resolve().relative_to(Path(root).resolve())),
+            "source_type": st,
+            "ext": p.suffix.lower(),
+        }
+        for i, (p, st) in enumerate(ordered, start=1)
+    ]
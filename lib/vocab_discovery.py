@@ -0,0 +1,269 @@
+# lib/vocab_discovery.py
+from __future__ import annotations
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import re
+
+import pandas as pd
+
+from lib.chunker import Chunk, chunk_content_text
+
+# Phase 6a defaults (kept in sync with IWTC_Raw_Source_Indexing.ipynb)
+EXCLUDE_SOURCE_TYPES_CONTENT = {"auto_transcripts"}
+
+CONNECTORS = {
+    "of", "the", "and", "to", "in", "at", "on", "for", "from", "with", "by", "a", "an",
+}
+
+STOP_SINGLE = {
+    "I", "A", "An", "The", "And", "Or", "But", "We", "You", "He", "She", "They",
+    "This", "That", "These", "Those", "It", "Its", "Our", "My", "Your", "His", "Her",
+    "Session", "Sessions",
+    "No", "Yes", "What", "Why", "How", "When", "Where", "Who", "Whom", "Which",
+    "As", "If", "At", "In", "On", "Not", "With", "Without", "Within", "For", "From", "To", "Of",
+    "And", "Or", "But", "So", "Then", "Than", "Now", "Just", "Only", "Also", "Still", "Even",
+    "There", "Here", "Do", "Does", "Did", "Can", "Could", "Will", "Would", "Shall", "Should",
+    "May", "Might", "Must", "All", "One", "Well", "Go", "Ah", "After", "Oh", "Let", "AM", "PM",
+}
+
+STOP_TOKENS = {"##", "#", "###", ">", "*", "-", "_", "`"}
+
+MAX_EVIDENCE_PER_CANDIDATE = 5
+MAX_SNIPPET_CHARS = 160
+
+WORD_REGEX = re.compile(r"[A-Za-z][A-Za-z0-9'\-]*")
+TITLE_WORD_REGEX = re.compile(r"^[A-Z][a-z][A-Za-z'\-]*$")
+ACRONYM_REGEX = re.compile(r"^[A-Z]{2,8}$")
+
+# Phase 6a variant (greedy author group; Phase 7c uses a lazy one)
+PBP_HASH_HEADER_REGEX = re.compile(
+    r"^\s*(?:\d+\.\s*)?(?:[*-]\s*)?###\s+\*\*(?P<author>[^*]+)\*\*\s+\*\*(?P<ts>[^*]+)\*\*\s*$"
+)
+
+DEFAULT_BATCH_SIZE = 2000
+
+# (chunk_id, source_type, path, start_line, end_line, header_kind, header_line, content_text or None)
+ScanItem = Tuple[Any, str, str, Any, Any, Any, str, Optional[str]]
+
+def _is_proper(w: str) -> bool:
+    return bool(TITLE_WORD_REGEX.match(w) or ACRONYM_REGEX.match(w))
+
+def extract_candidates(text: str) -> List[str]:
+    """Phase 6b.2 candidates for one chunk: Title Case / acronym runs, then single propers."""
+    words = WORD_REGEX.findall(text)
+    candidates: List[str] = []
+
+    i, n = 0, len(words)
+    while i < n:
+        if _is_proper(words[i]):
+            parts = [words[i]]
+            cap_count = 1
+            j = i + 1
+            while j < n:
+                wj = words[j]
+                if _is_proper(wj):
+                    parts.append(wj)
+                    cap_count += 1
+                    j += 1
+                elif wj.lower() in CONNECTORS:
+                    parts.append(wj.lower())
+                    j += 1
+                else:
+                    break
+            if cap_count >= 2:
+                candidates.append(" ".join(parts))
+            i = j
+        else:
+            i += 1
+
+    if words:
+        first_word = words[0]
+        tail_set = set(words[1:])
+        for w in words:
+            if (
+                _is_proper(w)
+                and w not in STOP_TOKENS
+                and w not in STOP_SINGLE
+                and (w != first_word or w in tail_set)
+            ):
+                candidates.append(w)
+    return candidates
+
+def _empty_partial() -> Dict[str, Any]:
+    return {
+        "mentions": Counter(),
+        "chunks_mentioned": defaultdict(set),
+        "files_mentioned": defaultdict(set),
+        "by_source_type": defaultdict(Counter),
+        "evidence": defaultdict(list),
+        "header_mentions": Counter(),
+        "header_chunks": defaultdict(set),
+        "header_files": defaultdict(set),
+        "header_evidence": defaultdict(list),
+        "content_chunks_scanned": 0,
+    }
+
+def _scan_batch(items: Sequence[ScanItem]) -> Dict[str, Any]:
+    """Map step: Phase 6b.1 + 6b.2 aggregates for one batch of chunks, in order."""
+    agg = _empty_partial()
+    for chunk_id, source_type, path, start_line, end_line, header_kind, header_line, text in items:
+        # 6b.1: PbP header authors (no source_type filtering)
+        if header_kind == "pbp_hash" and header_line:
+            m = PBP_HASH_HEADER_REGEX.match(header_line)
+            author = " ".join((m.group("author") or "").split()) if m else ""
+            if author:
+                agg["header_mentions"][author] += 1
+                agg["header_chunks"][author].add(chunk_id)
+                agg["header_files"][author].add(path)
+                if len(agg["header_evidence"][author]) < MAX_EVIDENCE_PER_CANDIDATE:
+                    agg["header_evidence"][author].append(
+                        {
+                            "chunk_id": chunk_id,
+                            "source_type": source_type,
+                            "path": path,
+                            "start_line": start_line,
+                            "end_line": end_line,
+                            "header": header_line,
+                            "author": author,
+                            "timestamp": " ".join((m.group("ts") or "").split()),
+                        }
+                    )
+
+        # 6b.2: content candidates (text is None for excluded source types)
+        if text is None:
+            continue
+        agg["content_chunks_scanned"] += 1
+        if not text:
+            continue
+        candidates = extract_candidates(text)
+        if not candidates:
+            continue
+
+        snippet = text[: MAX_SNIPPET_CHARS - 3] + "..." if len(text) > MAX_SNIPPET_CHARS else text
+        agg["mentions"].update(candidates)
+        for cand in dict.fromkeys(candidates):
+            agg["chunks_mentioned"][cand].add(chunk_id)
+            agg["files_mentioned"][cand].add(path)
+            agg["by_source_type"][cand][source_type] += 1
+            if len(agg["evidence"][cand]) < MAX_EVIDENCE_PER_CANDIDATE:
+                agg["evidence"][cand].append(
+                    {
+                        "chunk_id": chunk_id,
+                        "source_type": source_type,
+                        "path": path,
+                        "start_line": start_line,
+                        "end_line": end_line,
+                        "snippet": snippet,
+                    }
+                )
+    return agg
+
+def _merge(total: Dict[str, Any], part: Dict[str, Any]) -> None:
+    """Reduce step. Parts must arrive in chunk order so first-seen order and evidence stay deterministic."""
+    for key in ("mentions", "header_mentions"):
+        total[key].update(part[key])
+    for key in ("chunks_mentioned", "files_mentioned", "header_chunks", "header_files"):
+        for k, v in part[key].items():
+            total[key][k] |= v
+    for k, v in part["by_source_type"].items():
+        total["by_source_type"][k].update(v)
+    for key in ("evidence", "header_evidence"):
+        for k, v in part[key].items():
+            room = MAX_EVIDENCE_PER_CANDIDATE - len(total[key][k])
+            if room > 0:
+                total[key][k].extend(v[:room])
+    total["content_chunks_scanned"] += part["content_chunks_scanned"]
+
+def _scan_item(chunk: Any, exclude_source_types: set) -> ScanItem:
+    source_type = chunk.get("source_type", "unknown")
+    if isinstance(chunk, Chunk):
+        header_line = (chunk.src["lines"][chunk.start_line - 1] or "").strip() if chunk.header_kind == "pbp_hash" else ""
+    else:
+        lines = chunk.get("lines", [])
+        header_line = (lines[0] or "").strip() if lines and chunk.get("header_kind") == "pbp_hash" else ""
+    text = None if source_type in exclude_source_types else chunk_content_text(chunk)
+    return (
+        chunk.get("chunk_id"),
+        source_type,
+        str(chunk.get("path", "")),
+        chunk.get("start_line"),
+        chunk.get("end_line"),
+        chunk.get("header_kind"),
+        header_line,
+        text,
+    )
+
+def _batches(items: Iterable[ScanItem], size: int) -> Iterable[List[ScanItem]]:
+    batch: List[ScanItem] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def discover_vocabulary(
+    chunks: Iterable[Any],
+    exclude_source_types: Optional[set] = None,
+    max_workers: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Phase 6b over CHUNKS_V0 (Chunk records or dicts), map-reduce style.
+
+    Chunk batches are scanned across a process pool (max_workers=1 scans
+    in-process) and the partial aggregates are merged in chunk order, so
+    the result, including first-seen order and the capped evidence lists,
+    equals the sequential notebook loop. Returns the Phase 6b globals
+    (mentions, chunks_mentioned, ..., header_evidence) plus
+    content_chunks_scanned. Pass exclude_source_types=set() to include
+    auto_transcripts.
+    """
+    if exclude_source_types is None:
+        exclude_source_types = EXCLUDE_SOURCE_TYPES_CONTENT
+
+    batches = list(_batches((_scan_item(c, exclude_source_types) for c in chunks), batch_size))
+    total = _empty_partial()
+
+    if len(batches) <= 1 or max_workers == 1:
+        for batch in batches:
+            _merge(total, _scan_batch(batch))
+        return total
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for part in pool.map(_scan_batch, batches):
+            _merge(total, part)
+    return total
+
+def _coverage_frame(counter: Counter, chunks: Dict[str, set], files: Dict[str, set], key: str, extra=None) -> pd.DataFrame:
+    rows = []
+    for name, total in counter.most_common():
+        row = {
+            key: name,
+            "mentions_total": total,
+            "chunks_mentioned": len(chunks[name]),
+            "files_mentioned": len(files[name]),
+        }
+        if extra is not None:
+            row.update(extra(name))
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    return df.sort_values(
+        by=["files_mentioned", "chunks_mentioned", "mentions_total"],
+        ascending=[False, False, False],
+    ).reset_index(drop=True)
+
+def build_candidate_vocab(agg: Dict[str, Any]) -> pd.DataFrame:
+    """Phase 6c: CANDIDATE_VOCAB ranked by file/chunk coverage."""
+    return _coverage_frame(
+        agg["mentions"], agg["chunks_mentioned"], agg["files_mentioned"], "candidate",
+        extra=lambda cand: {"source_types": dict(agg["by_source_type"][cand])},
+    )
+
+def build_header_authors(agg: Dict[str, Any]) -> pd.DataFrame:
+    """Phase 6c: HEADER_AUTHORS_V0 ranked by file/chunk coverage."""
+    return _coverage_frame(agg["header_mentions"], agg["header_chunks"], agg["header_files"], "author")
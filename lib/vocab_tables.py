@@ -0,0 +1,120 @@
+# lib/vocab_tables.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import warnings
+
+import pandas as pd
+
+# Semantic field -> acceptable CSV column names (first match wins).
+# Any other CSV columns are ignored on purpose.
+ENTITY_COLS: Dict[str, List[str]] = {
+    "entity_id": ["entity_id", "id"],
+    "canonical": ["canonical", "canonical_name", "name"],
+}
+ALIAS_COLS: Dict[str, List[str]] = {
+    "entity_id": ["entity_id", "id"],
+    "alias": ["alias", "alt", "alternate"],
+}
+AUTHOR_ALIAS_COLS: Dict[str, List[str]] = {
+    "author": ["author", "handle"],
+    "player_entity_id": ["player_entity_id", "player_id", "entity_id"],
+}
+
+def normalize_vocab_csv(df: Optional[pd.DataFrame], col_map: Dict[str, List[str]], label: str) -> pd.DataFrame:
+    """Rename human-facing CSV columns to semantic names; keep only those."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=list(col_map.keys()))
+
+    rename = {}
+    for semantic, options in col_map.items():
+        found = next((c for c in options if c in df.columns), None)
+        if found:
+            rename[found] = semantic
+
+    if len(df) > 0 and not rename:
+        warnings.warn(
+            f"[{label}] CSV has rows but none of the expected columns were found "
+            f"(columns: {list(df.columns)}; expected: {col_map})"
+        )
+        return pd.DataFrame(columns=list(col_map.keys()))
+
+    out = df.rename(columns=rename)
+    keep = [k for k in col_map.keys() if k in out.columns]
+    return out[keep].copy()
+
+def read_vocab_csv(path: Optional[Path], col_map: Dict[str, List[str]], label: str, required: bool = False) -> pd.DataFrame:
+    """Read a vocab CSV as strings (blank = "") and normalize its columns."""
+    if not path or not Path(path).exists():
+        if required:
+            raise FileNotFoundError(f"Missing required vocabulary file ({label}): {path}")
+        return pd.DataFrame(columns=list(col_map.keys()))
+    raw = pd.read_csv(Path(path), dtype=str).fillna("")
+    return normalize_vocab_csv(raw, col_map, label)
+
+def load_vocab_tables(entities_path: Path, aliases_path: Optional[Path] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Return (entities_df, aliases_df) as Phase 7a / Graph P3 load them."""
+    entities_df = read_vocab_csv(entities_path, ENTITY_COLS, "entities", required=True)
+    if entities_df.empty:
+        raise ValueError("Entities CSV did not produce any usable rows after normalization.")
+    aliases_df = read_vocab_csv(aliases_path, ALIAS_COLS, "aliases")
+    return entities_df, aliases_df
+
+def build_vocab_df(entities_df: pd.DataFrame, aliases_df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Phase 7a VOCAB_DF: canonical + alias text forms, longest first.
+    Columns: vocab, entity_id, canonical, match_kind, vocab_len.
+    """
+    rows = []
+    for _, r in entities_df.iterrows():
+        if r.get("entity_id", "") and r.get("canonical", ""):
+            rows.append(
+                {"vocab": r["canonical"], "entity_id": r["entity_id"], "canonical": r["canonical"], "match_kind": "canonical"}
+            )
+
+    if aliases_df is not None and not aliases_df.empty:
+        canon_by_id = dict(zip(entities_df["entity_id"], entities_df["canonical"]))
+        for _, r in aliases_df.iterrows():
+            if r.get("entity_id", "") and r.get("alias", ""):
+                rows.append(
+                    {"vocab": r["alias"], "entity_id": r["entity_id"], "canonical": canon_by_id.get(r["entity_id"], ""), "match_kind": "alias"}
+                )
+
+    vocab_df = pd.DataFrame(rows).drop_duplicates(subset=["vocab", "entity_id"]).reset_index(drop=True)
+    if vocab_df.empty:
+        raise ValueError("No vocabs available for linking.")
+
+    vocab_df["vocab_len"] = vocab_df["vocab"].str.len()
+    return vocab_df.sort_values(["vocab_len", "vocab"], ascending=[False, True]).reset_index(drop=True)
+
+def build_vocab_lookup(entities_df: pd.DataFrame, aliases_df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Graph/Index P3 DF_VOCAB_LOOKUP: vocab_id, vocab, vocab_kind, vocab_norm."""
+    rows = []
+    for _, r in entities_df.iterrows():
+        vid = str(r.get("entity_id", "")).strip()
+        v = str(r.get("canonical", "")).strip()
+        if vid and v:
+            rows.append([vid, v, "entity"])
+
+    if aliases_df is not None and not aliases_df.empty:
+        for _, r in aliases_df.iterrows():
+            vid = str(r.get("entity_id", "")).strip()
+            v = str(r.get("alias", "")).strip()
+            if vid and v:
+                rows.append([vid, v, "alias"])
+
+    lookup = pd.DataFrame(rows, columns=["vocab_id", "vocab", "vocab_kind"])
+    lookup["vocab_norm"] = lookup["vocab"].astype(str).str.strip().str.lower()
+    return lookup.drop_duplicates(subset=["vocab_id", "vocab_norm", "vocab_kind"]).reset_index(drop=True)
+
+def load_author_aliases(path: Optional[Path]) -> Dict[str, str]:
+    """Optional author handle -> player_entity_id map used by Phase 7c."""
+    df = read_vocab_csv(path, AUTHOR_ALIAS_COLS, "author_aliases")
+    out: Dict[str, str] = {}
+    if {"author", "player_entity_id"} <= set(df.columns):
+        for a, p in zip(df["author"], df["player_entity_id"]):
+            a = " ".join(str(a).split())
+            p = " ".join(str(p).split())
+            if a and p:
+                out[a] = p
+    return out